@@ -3,7 +3,11 @@
 import json
 import os
 import copy
+from contextlib import contextmanager
 from pathlib import Path
+from types import MappingProxyType
+
+from core.persistence import background_writer
 
 DEFAULT_CONFIG = {
     "hotkey": "alt_r",
@@ -12,20 +16,101 @@ DEFAULT_CONFIG = {
         "base_url": "http://localhost:8000/v1",
         "model": "Qwen/Qwen3-ASR-1.7B",
         "api_key": "EMPTY",
+        # 热词偏置：把用户词表与历史高频术语作为上下文发给 ASR，减少专有名词误识别
+        "hotwords_enabled": True,
+        "glossary": [],
+        "hotword_token_budget": 200,
     },
     "llm": {
         "base_url": "https://api.deepseek.com/v1",
         "model": "deepseek-chat",
         "api_key": "",
+        # 备用端点 [{"base_url", "model", "api_key"}, ...]：主端点出错时回退，
+        # 首 token 超过 first_token_deadline_ms 未到时对冲请求下一个端点（0 为不对冲）
+        "fallback_endpoints": [],
+        "first_token_deadline_ms": 3000,
+        "connect_timeout": 10.0,
+        "read_timeout": 60.0,
     },
     "translation": {
         "target_language": "English",
+        # 多语言同时翻译（并发请求，每种语言一个结果块）；为空时只翻译 target_language
+        "target_languages": [],
+        # 翻译记忆：精确命中直接复用历史译文，相近命中作为参考交给大模型
+        "memory_enabled": True,
+        "memory_min_score": 0.6,
+        # 组合键会话用一次请求同时完成优化与翻译（流式按分隔行拆分）
+        "combined_request": True,
+        # 未使用合并请求时，优化结果每出现一个完整句子就立即翻译该句，
+        # 最多同时翻译 pipeline_concurrency 句，译文按句子顺序拼接
+        "pipeline": True,
+        "pipeline_concurrency": 2,
     },
     "history": {
         "context_count": 5,
+        # relevant：按与当前转录的相关性检索；recent：仅取最近记录；
+        # vocabulary：注入从历史挖掘的个人词表（术语 + 纠错对）代替整句记录
+        "context_mode": "relevant",
+        # 注入历史 / 词表的估算 token 上限，0 为不限
+        "context_token_budget": 600,
+        # 用量账本中当前模型近 7 天每次请求的平均 prompt token 超过该值时，
+        # 按超出的部分收紧上面的预算；0 为不调整（预算不限时也不调整）
+        "context_prompt_target": 0,
+        # 热段：最近 hot_days 天且最多 hot_max_records 条记录常驻内存（0 为不限），
+        # 更早的记录按月封存为压缩归档段，启动时不加载
+        "hot_days": 30,
+        "hot_max_records": 2000,
+        # 历史记录保留天数，超过的记录被删除；0 为永久保留
+        "retention_days": 0,
     },
     "optimize": {
         "rules": "",
+        # ASR 流式输出期间，对已完整的句子提前发起优化（推测执行）
+        "speculative": True,
+        "speculative_min_chars": 12,
+        # 端到端时限（毫秒，自松开热键起算），0 为关闭。超时先复制识别原文，
+        # 大模型完成后若用户尚未粘贴则自动替换剪贴板与历史记录
+        "deadline_ms": 0,
+        # 用个人字符 n-gram 模型对 ASR 原文做本地同音纠错（候选来自个人词表纠错对），
+        # 得分提高超过 rescoring_margin（自然对数）才替换
+        "local_rescoring": True,
+        "rescoring_margin": 2.0,
+    },
+    "usage": {
+        # 按模型配置价格（每百万 token / 每分钟音频），用于折算费用，如
+        # {"deepseek-chat": {"prompt": 2.0, "cached": 0.5, "completion": 8.0}}
+        "prices": {},
+        # 每日预算，0 为不限；超出后提醒一次，并停止注入历史上下文
+        "daily_token_budget": 0,
+        "daily_cost_budget": 0.0,
+    },
+    "reoptimize": {
+        # 批量重新优化历史记录：同时进行的请求数与每分钟最多发起的请求数（0 为不限）
+        "concurrency": 2,
+        "requests_per_minute": 30,
+    },
+    "audio_archive": {
+        # 保存每段录音（压缩、按内容去重，见 core/audio_archive.py），默认关闭
+        "enabled": False,
+        # 录音归档容量上限，超出时淘汰最久未使用的录音；0 为不限
+        "max_mb": 1024,
+    },
+    "session": {
+        # 处理中再次按热键：当前会话转入后台继续处理，立即开始新一轮录音
+        "pipelined": True,
+    },
+    "paste": {
+        # 流式输入：优化结果每完成一句就直接输入到目标窗口，无需等待点击粘贴
+        "streaming": False,
+        # 注入方式：windows（SendInput 逐字输入）或 recording（只记录不输入，用于调试）
+        "injector": "windows",
+    },
+    "keepalive": {
+        # 空闲超过 interval_s 时向本地（localhost / 内网）ASR 与 LLM 端点发送极小请求保活
+        "enabled": False,
+        "interval_s": 240,
+        # 距上次请求超过该时长的会话视为冷启动，用于统计冷 / 热首 token 延迟
+        "cold_after_s": 600,
     },
     "startup": {
         "enabled": False,
@@ -33,8 +118,151 @@ DEFAULT_CONFIG = {
 }
 
 
+# ── 校验 ──────────────────────────────────────────────────────────────
+# 值的类型由 DEFAULT_CONFIG 中的默认值推断（数值不能为负）；以下为额外约束。
+# 列表元素类型（默认值为空列表，无法推断）
+_LIST_ITEM_TYPES = {
+    "asr.glossary": str,
+    "translation.target_languages": str,
+    "llm.fallback_endpoints": dict,
+}
+# 只能取固定值的键
+_CHOICES = {
+    "history.context_mode": ("relevant", "recent", "vocabulary"),
+    "paste.injector": ("windows", "recording"),
+}
+
+
+def _check_value(path: str, value, default) -> list[tuple[str, str]]:
+    if isinstance(default, dict):
+        if not isinstance(value, dict):
+            return [(path, "应为对象")]
+        return _check(value, default, path)
+    if isinstance(default, bool):
+        if not isinstance(value, bool):
+            return [(path, "应为 true / false")]
+    elif isinstance(default, int):
+        # 默认为整数的键（条数、毫秒数等）不接受小数；bool 是 int 的子类，也排除
+        if type(value) is not int:
+            return [(path, "应为整数")]
+        if value < 0:
+            return [(path, "不能为负数")]
+    elif isinstance(default, float):
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            return [(path, "应为数字")]
+        if value < 0:
+            return [(path, "不能为负数")]
+    elif isinstance(default, str):
+        if not isinstance(value, str):
+            return [(path, "应为字符串")]
+    elif isinstance(default, list):
+        if not isinstance(value, list):
+            return [(path, "应为列表")]
+        item_type = _LIST_ITEM_TYPES.get(path)
+        if item_type is not None and not all(isinstance(v, item_type) for v in value):
+            return [(path, f"的元素应为{'字符串' if item_type is str else '对象'}")]
+    choices = _CHOICES.get(path)
+    if choices is not None and value not in choices:
+        return [(path, f"应为 {' / '.join(choices)} 之一")]
+    return []
+
+
+def _check(data: dict, defaults: dict, prefix: str = "") -> list[tuple[str, str]]:
+    errors: list[tuple[str, str]] = []
+    for key, default in defaults.items():
+        if key in data:
+            path = f"{prefix}.{key}" if prefix else key
+            errors += _check_value(path, data[key], default)
+    return errors
+
+
+def _default_for(dotted_key: str):
+    """DEFAULT_CONFIG 中该键路径的默认值；不存在时抛出 KeyError。"""
+    value = DEFAULT_CONFIG
+    for k in dotted_key.split("."):
+        if not isinstance(value, dict) or k not in value:
+            raise KeyError(dotted_key)
+        value = value[k]
+    return value
+
+
+def validate_config(data: dict) -> list[str]:
+    """按默认配置的结构校验配置，返回错误描述列表（为空表示通过）。未知的键不校验。"""
+    if not isinstance(data, dict):
+        return ["配置文件顶层应为对象"]
+    return [f"{path} {reason}" for path, reason in _check(data, DEFAULT_CONFIG)]
+
+
+# ── 快照 ──────────────────────────────────────────────────────────────
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class ConfigSnapshot:
+    """某一版本配置的只读快照。
+
+    创建时把所有键路径（含中间层级）展开为扁平字典，get() 只需一次字典查找；
+    列表冻结为元组、字典冻结为只读映射，读取方无法改动共享的配置。
+    配置每次变化都生成新快照（version 递增）并整体替换，读取方看到的总是完整的某一版本。
+    """
+
+    __slots__ = ("version", "_flat")
+
+    def __init__(self, data: dict, version: int):
+        self.version = version
+        self._flat: dict = {}
+        self._compile(data, "")
+
+    def _compile(self, node: dict, prefix: str):
+        for key, value in node.items():
+            path = f"{prefix}.{key}" if prefix else key
+            self._flat[path] = _freeze(value)
+            if isinstance(value, dict):
+                self._compile(value, path)
+
+    def get(self, dotted_key: str, default=None):
+        value = self._flat.get(dotted_key)
+        return default if value is None else value
+
+
+def _leaf_diff(old, new, prefix: str = "") -> set[str]:
+    """两份配置之间取值不同的键路径（逐层比较字典，其余值整体比较）。"""
+    if isinstance(old, dict) and isinstance(new, dict):
+        changed: set[str] = set()
+        for key in old.keys() | new.keys():
+            path = f"{prefix}.{key}" if prefix else key
+            changed |= _leaf_diff(old.get(key), new.get(key), path)
+        return changed
+    return set() if old == new else {prefix}
+
+
+def _key_matches(changed_key: str, prefix: str) -> bool:
+    """changed_key 是否属于监听的 prefix（自身、子键或整体替换了其上级）。"""
+    return (
+        changed_key == prefix
+        or changed_key.startswith(prefix + ".")
+        or prefix.startswith(changed_key + ".")
+    )
+
+
 class Config:
-    """单例配置管理器，配置文件存储在 %APPDATA%/MouthWrite/config.json。"""
+    """单例配置管理器，配置文件存储在 %APPDATA%/MouthWrite/config.json。
+
+    修改通过 set() 进行，取值未变时不写文件也不通知。多处修改放在
+    ``with config.transaction():`` 中时，退出时只写一次文件、每个监听者只通知一次；
+    块内抛出异常时全部修改回滚。
+
+    组件通过 add_listener(prefix, callback) 关注某一组配置（如 "llm"、"hotkey"），
+    相关键变化后以 ``callback(changed_keys)`` 通知，据此只重建受影响的部分。
+
+    读取走当前的 ConfigSnapshot；写入前按 validate_config() 的规则校验。
+    配置文件被外部修改时由 core/config_watcher.py 调用 reload()，
+    校验不通过则保留当前配置。
+    """
 
     _instance = None
 
@@ -49,6 +277,11 @@ class Config:
             return
         self._initialized = True
         self._data = {}
+        self._snapshot = ConfigSnapshot({}, 0)
+        self._listeners: list[tuple[str, object]] = []
+        self._tx_depth = 0
+        self._tx_backup: dict = {}
+        self._tx_changed: set[str] = set()
         self._load()
 
     # ------------------------------------------------------------------
@@ -59,60 +292,174 @@ class Config:
         return app_dir / "config.json"
 
     # ------------------------------------------------------------------
+    def _read_file(self) -> dict | None:
+        """读取配置文件；文件不存在或无法解析时返回 None。"""
+        background_writer().flush()
+        try:
+            with open(self.config_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError):
+            return None
+        return data if isinstance(data, dict) else None
+
     def _load(self):
-        path = self.config_path
-        if path.exists():
-            try:
-                with open(path, "r", encoding="utf-8") as f:
-                    self._data = json.load(f)
-            except (json.JSONDecodeError, OSError):
-                self._data = copy.deepcopy(DEFAULT_CONFIG)
-        else:
-            self._data = copy.deepcopy(DEFAULT_CONFIG)
-            self.save()
+        data = self._read_file()
+        dirty = data is None
+        if data is None:
+            data = copy.deepcopy(DEFAULT_CONFIG)
 
         # 补全缺失的键（版本升级兼容）
-        self._merge_defaults(self._data, DEFAULT_CONFIG)
-        self.save()
+        dirty |= self._merge_defaults(data, DEFAULT_CONFIG)
+        # 启动时无法拒绝整个文件：不合法的值逐项恢复为默认值
+        for path, reason in _check(data, DEFAULT_CONFIG):
+            print(f"[MouthWrite] 配置项 {path} {reason}，已恢复默认值")
+            *parents, leaf = path.split(".")
+            node = data
+            for k in parents:
+                node = node[k]
+            node[leaf] = copy.deepcopy(_default_for(path))
+            dirty = True
+        self._data = data
+        self._swap()
+        # 文件缺失、补了新键或修正了取值时才写回
+        if dirty:
+            self.save()
+
+    def _swap(self):
+        self._snapshot = ConfigSnapshot(self._data, self._snapshot.version + 1)
 
-    def _merge_defaults(self, data: dict, defaults: dict):
+    def _merge_defaults(self, data: dict, defaults: dict) -> bool:
+        """补全缺失的默认值，返回是否有改动。"""
+        changed = False
         for key, default_value in defaults.items():
             if key not in data:
                 data[key] = copy.deepcopy(default_value)
+                changed = True
             elif isinstance(default_value, dict) and isinstance(data.get(key), dict):
-                self._merge_defaults(data[key], default_value)
+                changed |= self._merge_defaults(data[key], default_value)
+        return changed
 
     # ------------------------------------------------------------------
     def save(self):
-        with open(self.config_path, "w", encoding="utf-8") as f:
-            json.dump(self._data, f, indent=2, ensure_ascii=False)
+        """序列化后交给后台线程写入（原子替换），不阻塞调用线程。"""
+        background_writer().replace(
+            self.config_path, json.dumps(self._data, indent=2, ensure_ascii=False)
+        )
 
-    def reload(self):
-        self._load()
+    def reload(self) -> bool:
+        """重新读取配置文件（外部修改后），返回是否应用了变化。
+
+        文件无法解析或校验不通过时保留当前配置；事务进行中不重新读取。
+        """
+        if self._tx_depth:
+            return False
+        data = self._read_file()
+        if data is None:
+            return False
+        self._merge_defaults(data, DEFAULT_CONFIG)
+        errors = validate_config(data)
+        if errors:
+            print(f"[MouthWrite] 配置文件校验失败，保留当前配置: {'; '.join(errors)}")
+            return False
+        changed = _leaf_diff(self._data, data)
+        if not changed:
+            return False
+        self._data = data
+        self._swap()
+        print(f"[MouthWrite] 已重新加载配置: {', '.join(sorted(changed))}")
+        self._notify(changed)
+        return True
 
     # ------------------------------------------------------------------
     def get(self, dotted_key: str, default=None):
-        """通过点号分隔的键路径获取值，例如 ``get('asr.base_url')``。"""
-        keys = dotted_key.split(".")
-        value = self._data
-        for k in keys:
-            if isinstance(value, dict):
-                value = value.get(k)
-                if value is None:
-                    return default
-            else:
-                return default
-        return value
+        """通过点号分隔的键路径获取值，例如 ``get('asr.base_url')``。
+
+        列表 / 字典以只读形式（元组 / 只读映射）返回。
+        """
+        return self._snapshot.get(dotted_key, default)
+
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """当前配置快照；需要在一段处理中读到同一版本的多项配置时使用。"""
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
 
     def set(self, dotted_key: str, value):
-        """通过点号分隔的键路径设置值并自动持久化。"""
+        """通过点号分隔的键路径设置值并持久化（事务中推迟到提交时）。
+
+        取值不符合配置结构时抛出 ValueError。
+        """
+        try:
+            errors = _check_value(dotted_key, value, _default_for(dotted_key))
+        except KeyError:
+            errors = []
+        if errors:
+            raise ValueError("; ".join(f"{path} {reason}" for path, reason in errors))
         keys = dotted_key.split(".")
         d = self._data
         for k in keys[:-1]:
             d = d.setdefault(k, {})
+        # 传入的是原来的列表 / 字典（就地修改后写回）时无法比较，按有变化处理
+        old = d.get(keys[-1])
+        mutated = old is value and isinstance(value, (dict, list))
+        if keys[-1] in d and old == value and not mutated:
+            return
         d[keys[-1]] = value
+        self._swap()
+        if self._tx_depth:
+            self._tx_changed.add(dotted_key)
+            return
         self.save()
+        self._notify({dotted_key})
 
-    @property
-    def data(self) -> dict:
-        return self._data
+    @contextmanager
+    def transaction(self):
+        """批量修改：退出时写一次文件并统一通知；抛出异常时回滚全部修改。
+
+        可以嵌套，只有最外层提交。
+        """
+        if self._tx_depth == 0:
+            self._tx_backup = copy.deepcopy(self._data)
+            self._tx_changed = set()
+        self._tx_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._tx_depth -= 1
+            if self._tx_depth == 0:
+                self._data = self._tx_backup
+                self._tx_changed = set()
+                self._swap()
+            raise
+        self._tx_depth -= 1
+        if self._tx_depth == 0:
+            changed, self._tx_changed = self._tx_changed, set()
+            if changed:
+                self.save()
+                self._notify(changed)
+
+    # ------------------------------------------------------------------
+    def add_listener(self, prefix: str, callback):
+        """关注 prefix（如 ``"llm"``、``"asr.glossary"``）下的配置变化。
+
+        提交后调用 ``callback(changed_keys)``，changed_keys 为本次变化中
+        与 prefix 相关的键路径集合。
+        """
+        self._listeners.append((prefix, callback))
+
+    def remove_listener(self, callback):
+        self._listeners = [(p, cb) for p, cb in self._listeners if cb != callback]
+
+    def _notify(self, changed: "set[str]"):
+        if not changed:
+            return
+        for prefix, callback in list(self._listeners):
+            keys = {k for k in changed if _key_matches(k, prefix)}
+            if keys:
+                try:
+                    callback(keys)
+                except Exception as e:
+                    print(f"[MouthWrite] 配置变更回调出错（{prefix}）: {e}")
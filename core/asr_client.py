@@ -11,6 +11,8 @@ import json
 import httpx
 from PySide6.QtCore import QThread, Signal
 
+from core.http_pool import shared_client
+
 # 用于自动识别 DashScope 类 API 的关键词
 _DASHSCOPE_KEYWORDS = ("dashscope", "aliyuncs")
 
@@ -44,6 +46,7 @@ class ASRWorker(QThread):
         model: str,
         api_key: str,
         audio_base64: str,
+        context: str = "",
         parent=None,
     ):
         super().__init__(parent)
@@ -51,10 +54,15 @@ class ASRWorker(QThread):
         self._model = model
         self._api_key = api_key
         self._audio_base64 = audio_base64
+        self._context = context
         self._dashscope = _is_dashscope(self._base_url)
 
     def _build_payload(self) -> dict:
-        """根据 API 类型构建请求 payload。"""
+        """根据 API 类型构建请求 payload。
+
+        context 非空时作为 system 消息发送：Qwen3-ASR 会把其中的热词 / 专有名词
+        作为识别偏置，减少同音误识别。
+        """
         data_uri = f"data:audio/wav;base64,{self._audio_base64}"
 
         if self._dashscope:
@@ -77,6 +85,10 @@ class ASRWorker(QThread):
                     "enable_itn": False,
                 },
             }
+            if self._context:
+                payload["messages"].insert(
+                    0, {"role": "system", "content": [{"text": self._context}]}
+                )
         else:
             # 本地 vLLM 格式：audio_url
             payload = {
@@ -95,6 +107,10 @@ class ASRWorker(QThread):
                     }
                 ],
             }
+            if self._context:
+                payload["messages"].insert(
+                    0, {"role": "system", "content": self._context}
+                )
         return payload
 
     def run(self):
@@ -108,24 +124,25 @@ class ASRWorker(QThread):
         raw_text = ""
         try:
             timeout = httpx.Timeout(connect=10.0, read=120.0, write=10.0, pool=10.0)
-            with httpx.Client(timeout=timeout) as client:
-                with client.stream("POST", url, json=payload, headers=headers) as resp:
-                    resp.raise_for_status()
-                    for line in resp.iter_lines():
-                        if not line.startswith("data: "):
-                            continue
-                        data_str = line[6:]
-                        if data_str.strip() == "[DONE]":
-                            break
-                        try:
-                            chunk = json.loads(data_str)
-                            delta = chunk["choices"][0].get("delta", {})
-                            content = delta.get("content", "")
-                            if content:
-                                raw_text += content
-                                self.chunk_received.emit(content)
-                        except (json.JSONDecodeError, KeyError, IndexError):
-                            continue
+            with shared_client().stream(
+                "POST", url, json=payload, headers=headers, timeout=timeout
+            ) as resp:
+                resp.raise_for_status()
+                for line in resp.iter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    data_str = line[6:]
+                    if data_str.strip() == "[DONE]":
+                        break
+                    try:
+                        chunk = json.loads(data_str)
+                        delta = chunk["choices"][0].get("delta", {})
+                        content = delta.get("content", "")
+                        if content:
+                            raw_text += content
+                            self.chunk_received.emit(content)
+                    except (json.JSONDecodeError, KeyError, IndexError):
+                        continue
 
             cleaned = clean_asr_output(raw_text)
             self.finished_text.emit(cleaned)
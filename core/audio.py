@@ -57,12 +57,22 @@ class AudioRecorder(QObject):
             self._frames.append(indata.copy())
 
     # ------------------------------------------------------------------
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate
+
+    def get_pcm(self) -> np.ndarray:
+        """录制的 int16 PCM（帧 × 声道）。"""
+        if not self._frames:
+            return np.zeros((0, self._channels), dtype=np.int16)
+        return np.concatenate(self._frames, axis=0)
+
     def get_audio_base64(self) -> str:
         """将录制的音频编码为 WAV 格式的 Base64 字符串。"""
         if not self._frames:
             return ""
 
-        audio_data = np.concatenate(self._frames, axis=0)
+        audio_data = self.get_pcm()
 
         buf = io.BytesIO()
         with wave.open(buf, "wb") as wf:
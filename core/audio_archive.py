@@ -0,0 +1,301 @@
+"""录音归档 —— 可选保存每次会话的录音，便于回放识别有误的录音或整理测试语料。
+
+  · 默认关闭（audio_archive.enabled）；开启后每段录音在发送识别的同时存入 audio/ 目录，
+    历史记录的 audio 字段保存录音的键
+  · 按内容寻址：键为（采样率、声道数与）PCM 数据的 BLAKE2b 摘要，相同录音只存一份
+  · 无损压缩，不依赖额外的音频编解码库：一阶差分 → zigzag → 高低字节分离 → zlib，
+    语音通常压缩到原始 PCM 的六成左右（直接 zlib 约为七成半）
+  · 总大小超过 audio_archive.max_mb 时按最近使用时间淘汰最旧的录音；
+    被淘汰录音对应的历史记录仍保留 audio 字段，load() 返回 None
+  · load() 把录音解压到 audio/cache/ 下的 .npy 文件，以只读 np.memmap 返回，
+    同一录音再次读取时直接映射缓存；缓存最多保留 _CACHE_FILES 个
+  · 压缩与写入由单个后台线程按顺序进行，store() 只计算摘要、入队后立即返回；
+    同一录音在队列中只保留一份，load() / info() 遇到尚未写完的录音时等待其写完
+
+录音文件格式::
+
+    MAGIC | 采样率(u32) | 声道数(u16) | 帧数(u64) | zlib 压缩数据     （小端）
+"""
+
+import hashlib
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from core.persistence import atomic_write
+
+_MAGIC = b"MWAUDIO1"
+_HEADER = struct.Struct("<8sIHQ")
+_SUFFIX = ".mwa"
+_LEVEL = 6
+# 解压缓存最多保留的录音数
+_CACHE_FILES = 8
+
+
+# ── 编解码 ────────────────────────────────────────────────
+def encode_pcm(pcm: np.ndarray) -> bytes:
+    """int16 PCM（帧 × 声道）→ 压缩数据。"""
+    delta = np.diff(pcm.astype(np.int32), axis=0, prepend=0)
+    # 差分按 16 位回绕，解码时累加同样回绕，保证无损
+    delta = delta.astype(np.int16).astype(np.int32)
+    zigzag = ((delta << 1) ^ (delta >> 15)).astype("<u2")
+    # 高低字节分开存放：静音与小幅度段的高字节几乎全为 0，压缩率明显更高
+    planes = zigzag.reshape(-1).view(np.uint8).reshape(-1, 2).T
+    return zlib.compress(planes.tobytes(), _LEVEL)
+
+
+def decode_pcm(data: bytes, frames: int, channels: int) -> np.ndarray:
+    """encode_pcm 的逆过程，返回 int16 PCM（帧 × 声道）。"""
+    planes = np.frombuffer(zlib.decompress(data), dtype=np.uint8).reshape(2, -1)
+    zigzag = np.ascontiguousarray(planes.T).view("<u2").reshape(frames, channels)
+    zigzag = zigzag.astype(np.int32)
+    delta = ((zigzag >> 1) ^ -(zigzag & 1)).astype(np.int16)
+    return np.cumsum(delta, axis=0, dtype=np.int16)
+
+
+class AudioArchive:
+    """按内容寻址的录音归档目录。"""
+
+    def __init__(self, directory: Path, max_bytes: int = 0):
+        self._dir = Path(directory)
+        self._cache_dir = self._dir / "cache"
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # 写入队列与 _lock 共用同一把锁
+        self._cond = threading.Condition(self._lock)
+        # 键 → (PCM, 采样率)：已入队、尚未写完的录音（按入队顺序，正在写的在最前）
+        self._pending: dict[str, tuple[np.ndarray, int]] = {}
+        self._thread: threading.Thread | None = None
+        # 键 → 文件大小；第一次用到时扫描目录
+        self._sizes: dict[str, int] | None = None
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value: int):
+        """修改容量上限（0 为不限），超出时立即在后台淘汰。"""
+        self._max_bytes = value
+        threading.Thread(target=self._evict, daemon=True).start()
+
+    @staticmethod
+    def key_of(pcm: np.ndarray, sample_rate: int) -> str:
+        pcm = np.ascontiguousarray(pcm, dtype="<i2")
+        channels = pcm.shape[1] if pcm.ndim > 1 else 1
+        h = hashlib.blake2b(digest_size=16)
+        h.update(struct.pack("<IH", sample_rate, channels))
+        h.update(pcm.tobytes())
+        return h.hexdigest()
+
+    def path_of(self, key: str) -> Path:
+        return self._dir / f"{key}{_SUFFIX}"
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(self._index().values())
+
+    # ── 写入 ──────────────────────────────────────────────
+    def store(self, pcm: np.ndarray, sample_rate: int) -> str:
+        """保存一段 int16 PCM（帧 × 声道，或单声道一维），返回录音的键。
+
+        只在调用线程中计算摘要，压缩与写入交给后台写入线程；
+        相同录音已在队列中时不再重复入队。
+        """
+        pcm = np.ascontiguousarray(pcm, dtype="<i2")
+        if pcm.ndim == 1:
+            pcm = pcm.reshape(-1, 1)
+        key = self.key_of(pcm, sample_rate)
+        with self._cond:
+            if key not in self._pending:
+                self._pending[key] = (pcm, sample_rate)
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="MouthWrite-audio", daemon=True
+                    )
+                    self._thread.start()
+                self._cond.notify_all()
+        return key
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """等待队列中的录音全部写完，返回是否在超时前完成。"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending, timeout)
+
+    def _wait_written(self, key: str):
+        """（持有 _lock 时调用）等待该录音从写入队列中写完。"""
+        self._cond.wait_for(lambda: key not in self._pending)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                # 写完前留在队列中，读取方据此等待
+                key, (pcm, sample_rate) = next(iter(self._pending.items()))
+            try:
+                written = self._write(key, pcm, sample_rate)
+            except Exception as e:
+                # 写入线程不能退出，否则之后的录音都会卡在队列中
+                print(f"[MouthWrite] 保存录音失败: {e}")
+                written = False
+            with self._cond:
+                del self._pending[key]
+                self._cond.notify_all()
+            if written:
+                self._evict(keep=key)
+
+    def _write(self, key: str, pcm: np.ndarray, sample_rate: int) -> bool:
+        """（写入线程）压缩并写入一段录音，返回是否写入了新文件。"""
+        path = self.path_of(key)
+        with self._lock:
+            if key in self._index():
+                # 相同录音已存在：只刷新使用时间
+                self._touch(path)
+                return False
+        header = _HEADER.pack(_MAGIC, sample_rate, pcm.shape[1], pcm.shape[0])
+        blob = header + encode_pcm(pcm)
+        with self._lock:
+            try:
+                self._dir.mkdir(parents=True, exist_ok=True)
+                atomic_write(path, blob)
+            except OSError as e:
+                print(f"[MouthWrite] 保存录音失败: {e}")
+                return False
+            self._index()[key] = len(blob)
+        return True
+
+    # ── 读取 ──────────────────────────────────────────────
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            return key in self._pending or key in self._index()
+
+    def info(self, key: str) -> tuple[int, int, int] | None:
+        """(采样率, 声道数, 帧数)；录音不存在（或已被淘汰）时返回 None。"""
+        with self._lock:
+            self._wait_written(key)
+        try:
+            with open(self.path_of(key), "rb") as f:
+                header = f.read(_HEADER.size)
+        except OSError:
+            return None
+        if len(header) < _HEADER.size:
+            return None
+        magic, sample_rate, channels, frames = _HEADER.unpack(header)
+        return (sample_rate, channels, frames) if magic == _MAGIC else None
+
+    def load(self, key: str) -> np.memmap | None:
+        """返回录音的 int16 PCM（帧 × 声道）只读内存映射；不存在时返回 None。"""
+        cache = self._cache_dir / f"{key}.npy"
+        with self._lock:
+            self._wait_written(key)
+            if key not in self._index():
+                return None
+            self._touch(self.path_of(key))
+            if cache.exists():
+                self._touch(cache)
+            elif not self._decode_to(key, cache):
+                return None
+            self._prune_cache(keep=cache)
+        return np.load(cache, mmap_mode="r")
+
+    def _decode_to(self, key: str, cache: Path) -> bool:
+        """（持有 _lock 时调用）解压录音写入缓存文件。"""
+        # 临时文件不以 .npy 结尾，不会被 _prune_cache() 当作缓存
+        tmp = cache.with_name(cache.name + ".tmp")
+        try:
+            blob = self.path_of(key).read_bytes()
+            magic, _, channels, frames = _HEADER.unpack_from(blob)
+            if magic != _MAGIC:
+                raise ValueError("文件头无效")
+            pcm = decode_pcm(blob[_HEADER.size:], frames, channels)
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            # 传入文件对象：传入路径时 np.save 会自动补上 .npy 后缀
+            with open(tmp, "wb") as f:
+                np.save(f, pcm)
+            os.replace(tmp, cache)
+        except (OSError, ValueError, struct.error, zlib.error) as e:
+            print(f"[MouthWrite] 读取录音 {key} 失败: {e}")
+            try:
+                tmp.unlink(missing_ok=True)
+            except OSError:
+                pass
+            return False
+        return True
+
+    # ── 淘汰 ──────────────────────────────────────────────
+    def _index(self) -> dict[str, int]:
+        """（持有 _lock 时调用）键 → 文件大小。"""
+        if self._sizes is None:
+            self._sizes = {}
+            try:
+                with os.scandir(self._dir) as it:
+                    for entry in it:
+                        if entry.is_file() and entry.name.endswith(_SUFFIX):
+                            self._sizes[entry.name[:-len(_SUFFIX)]] = entry.stat().st_size
+            except OSError:
+                pass
+        return self._sizes
+
+    @staticmethod
+    def _touch(path: Path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _evict(self, keep: str = ""):
+        """总大小超出上限时，按最近使用时间从旧到新删除录音（keep 除外）。"""
+        with self._lock:
+            sizes = self._index()
+            total = sum(sizes.values())
+            if self._max_bytes <= 0 or total <= self._max_bytes:
+                return
+            used = []
+            for key in sizes:
+                try:
+                    used.append((self.path_of(key).stat().st_mtime, key))
+                except OSError:
+                    used.append((0.0, key))
+            used.sort()
+            evicted = 0
+            for _, key in used:
+                if total <= self._max_bytes:
+                    break
+                if key == keep:
+                    continue
+                try:
+                    self.path_of(key).unlink(missing_ok=True)
+                except OSError:
+                    continue
+                total -= sizes.pop(key)
+                try:
+                    (self._cache_dir / f"{key}.npy").unlink(missing_ok=True)
+                except OSError:
+                    pass
+                evicted += 1
+        if evicted:
+            print(f"[MouthWrite] 录音归档超出容量上限，已淘汰 {evicted} 段最旧的录音")
+
+    def _prune_cache(self, keep: Path):
+        """（持有 _lock 时调用）缓存超过 _CACHE_FILES 个时删除最久未用的。"""
+        try:
+            # 持有锁时没有进行中的解压，剩下的临时文件都是中途退出留下的
+            for tmp in self._cache_dir.glob("*.npy.tmp"):
+                tmp.unlink(missing_ok=True)
+            files = sorted(
+                self._cache_dir.glob("*.npy"), key=lambda p: p.stat().st_mtime
+            )
+        except OSError:
+            return
+        for path in files[:max(len(files) - _CACHE_FILES, 0)]:
+            if path == keep:
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                # Windows 下仍被映射的缓存无法删除，下次再清理
+                pass
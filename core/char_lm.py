@@ -0,0 +1,172 @@
+"""个人字符 n-gram 语言模型 —— 本地对 ASR 同音误识别做重打分纠正。
+
+从历史记录的优化结果中增量训练一个字符级 n-gram 模型（默认 3 阶），
+计数存放在按哈希分桶的定长数组里（array('H')，16 位无符号），内存占用固定、
+与语料规模无关。每个桶的计数达到 65535 后不再增加（饱和，不回绕）；训练字数受
+capacity 限制，通常只有极常见的单字 / 二元组会达到上限，其计数偏小，相关的
+Stupid Backoff 比值随之失真。
+打分采用 Stupid Backoff，不做归一化，只用于比较同一位置的候选替换。
+
+候选替换来自个人词表挖掘出的纠错对（误识别 → 正确写法）：
+当原文中出现误识别片段、且替换后局部得分提高超过 margin 时才替换，
+因此 LLM 收到的输入更干净，未配置大模型时也能得到基本纠正。
+"""
+
+import math
+import threading
+from array import array
+from collections.abc import Iterable
+
+# 句首填充字符，使开头的字符也有完整上下文
+_BOS = "\x02"
+# Stupid Backoff 每回退一阶的惩罚系数
+_BACKOFF = 0.4
+
+
+class CharNGramLM:
+    """哈希分桶的字符 n-gram 计数模型，支持增量训练与局部打分。
+
+    每个 n-gram 按哈希值的高低两段落入两个桶（Count-Min Sketch），
+    读取时取较小值：桶冲突只会让计数偏大，取最小值可大幅抵消冲突。
+    Python 内置 hash() 在进程内稳定，模型只驻留内存、启动时由历史记录重建。
+    """
+
+    def __init__(self, order: int = 3, buckets: int = 1 << 20):
+        self._order = order
+        self._buckets = buckets
+        # _tables[k] 存放 k 阶 n-gram 的计数（k = 1..order），16 位计数饱和于 65535
+        self._tables = [array("H")] + [
+            array("H", bytes(2 * buckets)) for _ in range(order)
+        ]
+        self._total = 0
+        self._lock = threading.Lock()
+
+    @property
+    def order(self) -> int:
+        return self._order
+
+    @property
+    def total_chars(self) -> int:
+        return self._total
+
+    @property
+    def capacity(self) -> int:
+        """建议的训练字数上限。超出后桶趋于饱和，未见过的 n-gram 也会有计数，
+        纠正率明显下降（见 scripts/bench_char_lm.py）。"""
+        return self._buckets // 2
+
+    # ── 训练 ──────────────────────────────────────────────
+    def train(self, text: str):
+        """累加一段文本的 n-gram 计数。"""
+        if not text:
+            return
+        n = self._order
+        padded = _BOS * (n - 1) + text
+        buckets = self._buckets
+        tables = self._tables
+        with self._lock:
+            for i in range(n - 1, len(padded)):
+                for k in range(1, n + 1):
+                    h = hash(padded[i - k + 1:i + 1])
+                    table = tables[k]
+                    for b in (h % buckets, (h >> 32) % buckets):
+                        if table[b] < 0xFFFF:
+                            table[b] += 1
+            self._total += len(text)
+
+    def train_many(self, texts: Iterable[str], capacity: int | None = None):
+        """依次训练，累计字数达到 capacity（默认为 self.capacity）后停止
+        （调用方应把最新文本排在前面）。新增记录的增量训练也经由这里，同样受上限约束。"""
+        if capacity is None:
+            capacity = self.capacity
+        for text in texts:
+            if self._total >= capacity:
+                break
+            self.train(text)
+
+    def train_async(
+        self, texts: Iterable[str], capacity: int | None = None
+    ) -> threading.Thread:
+        """在后台线程中批量训练（texts 可为惰性迭代器，在该线程中遍历），返回线程对象。"""
+        thread = threading.Thread(
+            target=self.train_many, args=(texts, capacity), daemon=True
+        )
+        thread.start()
+        return thread
+
+    # ── 打分 ──────────────────────────────────────────────
+    def _count(self, gram: str) -> int:
+        h = hash(gram)
+        table = self._tables[len(gram)]
+        return min(table[h % self._buckets], table[(h >> 32) % self._buckets])
+
+    def _log_prob(self, context: str, ch: str) -> float:
+        """Stupid Backoff：从最高阶开始，计数为 0 时回退到低一阶并乘以惩罚系数。"""
+        penalty = 0.0
+        for k in range(self._order, 1, -1):
+            ctx = context[len(context) - (k - 1):]
+            c = self._count(ctx + ch)
+            if c:
+                denom = max(self._count(ctx), c)
+                return penalty + math.log(c / denom)
+            penalty += math.log(_BACKOFF)
+        c = self._count(ch)
+        return penalty + math.log((c + 1) / (self._total + self._buckets))
+
+    def score(self, text: str) -> float:
+        """整段文本的对数得分（越大越像用户的常用表达）。"""
+        return self.score_span(text, 0, len(text))
+
+    def score_span(self, text: str, start: int, end: int) -> float:
+        """只对 text[start:end] 及其后 order - 1 个字符打分（上下文取自前文）。
+
+        替换 text 中的一段后，只有这些位置的条件概率会变化。
+        """
+        return self._span(text, start, end)[0]
+
+    def _span(self, text: str, start: int, end: int) -> tuple[float, int]:
+        """score_span() 的得分与参与打分的字符数。"""
+        n = self._order
+        padded = _BOS * (n - 1) + text
+        stop = min(len(text), end + n - 1)
+        total = 0.0
+        for i in range(start, stop):
+            j = i + n - 1
+            total += self._log_prob(padded[j - n + 1:j], padded[j])
+        return total, max(stop - start, 0)
+
+    # ── 重打分 ────────────────────────────────────────────
+    def rescore(
+        self,
+        text: str,
+        candidates: list[tuple[str, str]],
+        margin: float = 2.0,
+    ) -> tuple[str, list[tuple[str, str]]]:
+        """尝试把 text 中的误识别片段替换为候选写法。
+
+        candidates 为 (误识别, 正确写法) 列表；替换后局部得分须比原文高出
+        margin（自然对数）才采用。返回 (新文本, 实际采用的替换列表)。
+
+        两种写法长度不同时打分的字符数也不同，而每个字符的对数概率都为负，
+        直接比较总分会偏向更短的写法：因此按每字平均对数概率比较，
+        再乘以较长一侧的字符数折算回总分的量级与 margin 比较。
+        """
+        if not self._total or not text:
+            return text, []
+        applied: list[tuple[str, str]] = []
+        for wrong, right in candidates:
+            if not wrong or wrong == right:
+                continue
+            start = text.find(wrong)
+            while start >= 0:
+                replaced = text[:start] + right + text[start + len(wrong):]
+                before, n_before = self._span(text, start, start + len(wrong))
+                after, n_after = self._span(replaced, start, start + len(right))
+                gain = after / max(n_after, 1) - before / max(n_before, 1)
+                if gain * max(n_before, n_after) > margin:
+                    text = replaced
+                    applied.append((wrong, right))
+                    start = text.find(wrong, start + len(right))
+                else:
+                    start = text.find(wrong, start + len(wrong))
+        return text, applied
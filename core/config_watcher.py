@@ -0,0 +1,67 @@
+"""配置文件监视 —— config.json 被外部修改（手动编辑、同步工具）后自动重新加载。
+
+  · 同时监视文件与所在目录：配置保存采用“写临时文件 + 原子替换”，替换后原文件的
+    监视会失效，需要从目录变化中重新发现并加入
+  · 目录中的其他文件（历史记录、用量）也会触发目录变化，按修改时间与大小过滤
+  · 变化经 _DEBOUNCE_MS 防抖后调用 Config.reload()：内容未变（包括应用自己的写入）
+    时不做任何事；校验不通过时保留当前配置
+"""
+
+from PySide6.QtCore import QFileSystemWatcher, QObject, QTimer
+
+from config import Config
+
+
+class ConfigWatcher(QObject):
+    """监视 config.json，外部修改后在主线程中重新加载配置。"""
+
+    _DEBOUNCE_MS = 300
+
+    def __init__(self, config: Config, parent=None):
+        super().__init__(parent)
+        self._config = config
+        self._path = config.config_path
+        self._stamp = self._file_stamp()
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_changed)
+        self._watcher.directoryChanged.connect(self._on_changed)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self._DEBOUNCE_MS)
+        self._timer.timeout.connect(self._reload)
+
+    def start(self):
+        self._watcher.addPath(str(self._path.parent))
+        self._watch_file()
+
+    def stop(self):
+        self._timer.stop()
+        paths = self._watcher.files() + self._watcher.directories()
+        if paths:
+            self._watcher.removePaths(paths)
+
+    # ── 内部 ──────────────────────────────────────────────
+    def _file_stamp(self) -> tuple[int, int] | None:
+        try:
+            st = self._path.stat()
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _watch_file(self):
+        path = str(self._path)
+        if path not in self._watcher.files() and self._path.exists():
+            self._watcher.addPath(path)
+
+    def _on_changed(self, _path: str):
+        self._timer.start()
+
+    def _reload(self):
+        self._watch_file()
+        stamp = self._file_stamp()
+        if stamp is None or stamp == self._stamp:
+            return
+        self._stamp = stamp
+        self._config.reload()
@@ -3,11 +3,17 @@
 流程：长按热键 → 录音 → ASR（流式，写入 asr 块）
       → LLM 优化（流式，写入 optimize 块）→ 复制 + 自动粘贴
       → [可选] 用户点击翻译 → LLM 翻译（流式，写入 translate 块）→ 复制
+      组合键会话默认合并为一次请求：优化结果与译文以分隔行拆分，流式分别写入两块
+      ASR 仍在输出时即对已完整的句子推测执行优化，最终文本匹配则保留推测结果
 
 窗口关闭方式：点击窗口外部 / 按任意键 / 再次按热键开始新一轮
+处理中再次按热键：当前会话转入后台队列继续处理，立即开始新一轮录音，结果按顺序交付
 """
 
 import ctypes
+import threading
+import time
+from datetime import date
 
 from pynput.keyboard import Key as PynputKey, Controller as KbController
 from pynput import mouse as pynput_mouse
@@ -28,14 +34,39 @@ from config import Config
 from core.hotkey import HotkeyListener
 from core.audio import AudioRecorder
 from core.asr_client import ASRWorker, clean_asr_output
+from core.char_lm import CharNGramLM
 from core.llm_client import (
+    CombinedStreamSplitter,
     LLMWorker,
-    TRANSLATE_PROMPT,
     build_optimize_prompt,
+    build_translate_prompt,
+    estimate_tokens,
+    split_combined_output,
 )
+from core.audio_archive import AudioArchive
 from core.history import HistoryManager
+from core.llm_router import LLMRouter, prune_endpoint_stats
+from core.http_pool import close_shared_client
+from core.injector import RecordingInjector, TextInjector, WindowsTextInjector
+from core.keepalive import KeepAlivePinger
+from core.reoptimize import ReoptimizeJob
+from core.sentences import SentenceSplitter, complete_prefix
+from core.session_queue import BackgroundSession, SessionQueue
+from core.speculation import SpeculativeOptimization
+from core.translation_pipeline import SentenceTranslationPipeline
+from core.translation_memory import TranslationMemory
+from core.usage import SessionUsage, UsageLedger, total_tokens
+from core.vocabulary import PersonalVocabulary, build_hotword_context
 from gui.main_window import FloatingWindow
 
+# 变化后需要重新保活 / 清理端点统计的配置键（整组替换时键为组名本身）
+_ENDPOINT_KEYS = {
+    "asr": {"asr", "asr.base_url", "asr.model", "asr.api_key"},
+    "llm": {
+        "llm", "llm.base_url", "llm.model", "llm.api_key", "llm.fallback_endpoints",
+    },
+}
+
 
 class Controller(QObject):
     """控制器：监听热键 → 录音 → ASR → LLM 优化 → 剪贴板 + 自动粘贴。"""
@@ -44,6 +75,8 @@ class Controller(QObject):
     _mouse_dismiss_requested = Signal()
     # 线程安全的 paste 请求信号（从 pynput 鼠标回调线程发射）
     _mouse_paste_requested = Signal()
+    # 后台构建好的翻译记忆（构建线程发射，回到主线程换入）：(翻译记忆, 构建序号)
+    _translation_memory_ready = Signal(object, int)
 
     def __init__(self, window: FloatingWindow, parent=None):
         super().__init__(parent)
@@ -67,6 +100,69 @@ class Controller(QObject):
         self._asr_buffer = ""
         self._raw_asr_text = ""
         self._optimized_text = ""
+        self._translate_source = ""
+        self._translate_target = ""
+        self._combined_splitter: CombinedStreamSplitter | None = None
+        # ASR 流式期间对已完整句子发起的推测优化
+        self._speculation: SpeculativeOptimization | None = None
+        # 分句流水线翻译（优化仍在输出时逐句翻译）
+        self._translate_pipeline: SentenceTranslationPipeline | None = None
+        # 本轮分句翻译出过错：之后改为整段翻译
+        self._pipeline_failed = False
+        # 多语言并发翻译：worker → 目标语言，以及各语言结果（失败为 None）
+        self._fanout_workers: dict[LLMWorker, str] = {}
+        self._fanout_results: dict[str, str | None] = {}
+        self._fanout_targets: list[str] = []
+
+        # 用量统计：本轮会话累计 + 按天账本
+        self._session_usage = SessionUsage()
+        self._usage_ledger = UsageLedger()
+        self._session_record_id: int | None = None
+        self._audio_seconds = 0.0
+        self._budget_alert_day = ""
+        # 录音归档（可选）：按历史记录的 audio 字段取回录音；本轮录音的键写入历史记录
+        self.audio_archive = AudioArchive(
+            self._config.config_path.with_name("audio"),
+            max_bytes=self._audio_archive_max_bytes(),
+        )
+        self._session_audio = ""
+
+        # 流式输入：优化结果逐句直接写入目标窗口
+        self._injector: TextInjector | None = None
+        self._inject_splitter: SentenceSplitter | None = None
+        self._injected_text = ""
+
+        # 本地端点保活 + 冷 / 热启动首 token 延迟统计
+        self._pinger = KeepAlivePinger(self._config, parent=self)
+        self._idle_s = 0.0
+        self._asr_started = 0.0
+        self._asr_first_seen = False
+        self._llm_started = 0.0
+        self._llm_first_seen = False
+
+        # ASR 热词上下文缓存：仅在词表 / 用户词表变化时重建
+        self._asr_context_key: tuple | None = None
+        self._asr_context_text = ""
+
+        # 流水线会话：处理中再次按热键时，当前会话转入后台队列
+        self._sessions = SessionQueue(
+            make_asr_worker=self._make_asr_worker,
+            make_llm_worker=lambda prompt: self._make_llm_worker(
+                prompt, track_usage=False
+            ),
+            optimize_prompt=self._background_optimize_prompt,
+            translate_prompt=self._background_translate_prompt,
+            rescore=self._rescore_asr,
+            llm_enabled=lambda: bool(self._config.get("llm.api_key", "")),
+            parent=self,
+        )
+        self._sessions.delivered.connect(self._on_session_delivered)
+        self._sessions.drained.connect(self._on_sessions_drained)
+        # 前台会话每次按热键递增，用于识别过期的延迟回调
+        self._session_seq = 0
+        # 队列未清空时前台结果暂缓交付：(回调, (优化结果, 译文))
+        self._held_delivery = None
+        self._held_result: tuple[str, str] | None = None
 
         # 状态
         self._busy = False
@@ -74,8 +170,50 @@ class Controller(QObject):
         self._waiting_paste = False
         self._translate_for_current_session = False
 
+        # 端到端时限（SLO）：超时先交付识别原文，大模型完成后再替换
+        self._deadline_timer = QTimer(self)
+        self._deadline_timer.setSingleShot(True)
+        self._deadline_timer.timeout.connect(self._on_deadline)
+        self._release_time = 0.0
+        self._deadline_hit = False
+        self._deferred_record_id: int | None = None
+        self._pasted = False
+
         # 历史记录
-        self._history = HistoryManager()
+        self._history = HistoryManager.from_config(self._config)
+        # 以下派生数据都由全部历史（含归档）构建，在后台线程中读取快照，不阻塞启动
+        # 翻译记忆（由历史译文构建，翻译完成后增量写入）；构建期间先用空的翻译记忆，
+        # 期间新增的译文记在 _tm_pending 中，换入时补写
+        self._tm = TranslationMemory()
+        self._tm_pending: list[tuple[str, str, str]] | None = None
+        self._tm_generation = 0
+        self._translation_memory_ready.connect(self._on_translation_memory_ready)
+        self._rebuild_translation_memory()
+        # 个人词表：启动时后台挖掘全部历史，之后随每条新记录增量更新
+        self._vocab = PersonalVocabulary()
+        self._history.add_listener(self._vocab.add_record)
+        self._vocab.add_records_async(self._history.iter_snapshot())
+        # 个人字符语言模型：由历史优化结果训练（最新优先），用于本地同音纠错
+        self._char_lm = CharNGramLM()
+        self._history.add_listener(
+            lambda record: self._char_lm.train_many(
+                (record.get("optimized_text", ""),), self._char_lm.capacity
+            )
+        )
+        self._char_lm.train_async(
+            r.get("optimized_text", "")
+            for r in self._history.iter_snapshot(newest_first=True)
+        )
+
+        # 批量重新优化历史记录（设置页面发起；上次未完成时从检查点继续）
+        self.reoptimizer = ReoptimizeJob(
+            self._history,
+            make_worker=lambda prompt: self._make_llm_worker(prompt, track_usage=False),
+            build_prompt=self._reoptimize_prompt,
+            checkpoint_path=self._config.config_path.with_name("reoptimize.json"),
+            parent=self,
+        )
+        self.reoptimizer.usage_added.connect(self._on_reoptimize_usage)
 
         # 鼠标监听器（用于检测点击窗口外部）
         self._mouse_listener: pynput_mouse.Listener | None = None
@@ -103,17 +241,54 @@ class Controller(QObject):
         self._mouse_paste_requested.connect(self._on_mouse_paste)
         self._window.translate_clicked.connect(self._on_translate)
         self._window.window_closed.connect(self._on_window_closed)
+        self._window.block_copy_requested.connect(self._on_block_copy)
         self._audio.error_occurred.connect(self._on_audio_error)
 
+        # 配置变化（设置保存等）时只更新受影响的组件；请求本身每次按当前配置创建
+        for prefix in ("hotkey", "hotkey_translate_modifier"):
+            self._config.add_listener(prefix, self._on_hotkey_config_changed)
+        self._config.add_listener("asr", self._on_asr_config_changed)
+        self._config.add_listener("llm", self._on_llm_config_changed)
+        self._config.add_listener("keepalive", self._on_keepalive_config_changed)
+        self._config.add_listener(
+            "translation.target_language", self._on_target_language_changed
+        )
+        self._config.add_listener("audio_archive", self._on_audio_archive_config_changed)
+        self._config.add_listener("history", self._on_history_config_changed)
+
     # ── 启停 ─────────────────────────────────────────────────
     def start(self):
         self._hotkey.start()
+        self._pinger.start()
 
     def stop(self):
         self._hotkey.stop()
+        self._pinger.stop()
         self._audio.stop()
         self._stop_dismiss_mode()
+        self._sessions.cancel_all()
+        # 进行中的重新优化保存检查点，下次启动后可继续
+        self.reoptimizer.pause()
         self._cleanup_workers()
+        close_shared_client()
+
+    @property
+    def usage_ledger(self) -> UsageLedger:
+        """用量账本，设置页面共用这一实例显示汇总。"""
+        return self._usage_ledger
+
+    @property
+    def history(self) -> HistoryManager:
+        """正在使用的历史记录。设置页面共用这一实例：同一进程中只能有一个实例封存归档，
+        否则另一实例合并重写的归档段会让这里缓存的段索引失效。"""
+        return self._history
+
+    def on_history_replaced(self):
+        """历史记录在设置页面被导入 / 清空后（导入会重新编号记录）重建派生数据。
+
+        翻译记忆随之重建；个人词表与字符语言模型只会增量学习，下次启动时再完整重建。
+        """
+        self._rebuild_translation_memory()
 
     def update_hotkey(self):
         self._hotkey.update_hotkey(
@@ -121,6 +296,67 @@ class Controller(QObject):
             self._config.get("hotkey_translate_modifier", "ctrl_r"),
         )
 
+    # ── 配置变化 ─────────────────────────────────────────────
+    def _on_hotkey_config_changed(self, keys: set[str]):
+        self.update_hotkey()
+
+    def _on_asr_config_changed(self, keys: set[str]):
+        # 热词开关 / 词表 / 预算可能变化：下次识别时重建热词上下文
+        self._asr_context_key = None
+        if keys & _ENDPOINT_KEYS["asr"]:
+            self._pinger.endpoints_changed()
+
+    def _on_llm_config_changed(self, keys: set[str]):
+        if keys & _ENDPOINT_KEYS["llm"]:
+            prune_endpoint_stats(self._llm_endpoints())
+            self._pinger.endpoints_changed()
+
+    def _on_keepalive_config_changed(self, keys: set[str]):
+        self._pinger.endpoints_changed()
+
+    def _on_target_language_changed(self, keys: set[str]):
+        # 旧记录没有 target_language 字段，按当前目标语言归入翻译记忆，需要重建
+        self._rebuild_translation_memory()
+
+    def _on_audio_archive_config_changed(self, keys: set[str]):
+        self.audio_archive.max_bytes = self._audio_archive_max_bytes()
+
+    def _on_history_config_changed(self, keys: set[str]):
+        self._history.set_hot_window(**HistoryManager.window_from_config(self._config))
+
+    def _audio_archive_max_bytes(self) -> int:
+        return int(self._config.get("audio_archive.max_mb", 1024)) * 1024 * 1024
+
+    def _rebuild_translation_memory(self):
+        """在后台线程中由全部历史重建翻译记忆，完成后回到主线程换入。"""
+        self._tm_generation += 1
+        self._tm_pending = []
+        generation = self._tm_generation
+        records = self._history.iter_snapshot()
+        language = self._config.get("translation.target_language", "English")
+
+        def build():
+            tm = TranslationMemory.from_history(records, default_language=language)
+            self._translation_memory_ready.emit(tm, generation)
+
+        threading.Thread(target=build, name="MouthWrite-tm", daemon=True).start()
+
+    @Slot(object, int)
+    def _on_translation_memory_ready(self, tm: TranslationMemory, generation: int):
+        if generation != self._tm_generation:
+            # 构建期间又发起了重建，以最后一次为准
+            return
+        for entry in self._tm_pending or ():
+            tm.add(*entry)
+        self._tm_pending = None
+        self._tm = tm
+
+    def _remember_translation(self, source: str, translation: str, language: str):
+        """写入翻译记忆；重建进行中时同时记下，换入新的翻译记忆时补写。"""
+        self._tm.add(source, translation, language)
+        if self._tm_pending is not None:
+            self._tm_pending.append((source, translation, language))
+
     # ═══════════════════════════════════════════════════════════
     #  交互关闭：点击外部 / 任意键
     # ═══════════════════════════════════════════════════════════
@@ -200,9 +436,13 @@ class Controller(QObject):
                 self._stop_dismiss_mode()
                 self._window.close()
                 self._busy = False
+            elif self._can_hand_off():
+                # 上一轮仍在处理：转入后台继续，悬浮窗立即用于新一轮录音
+                self._hand_off_session()
             else:
                 return
         self._busy = True
+        self._session_seq += 1
         self._stop_dismiss_mode()
         self._cleanup_workers()
 
@@ -214,6 +454,19 @@ class Controller(QObject):
         self._raw_asr_text = ""
         self._optimized_text = ""
         self._translate_for_current_session = False
+        self._deadline_hit = False
+        self._deferred_record_id = None
+        self._pasted = False
+        self._cancel_translate_pipeline()
+        self._pipeline_failed = False
+        self._inject_splitter = None
+        self._injected_text = ""
+        self._session_usage = SessionUsage()
+        self._session_record_id = None
+        self._session_audio = ""
+        self._combined_splitter = None
+        self._held_delivery = None
+        self._held_result = None
 
         # 播放开始提示音
         self._start_player.setPosition(0)
@@ -251,46 +504,128 @@ class Controller(QObject):
         if not audio_b64:
             self._reset_and_close()
             return
+        self._audio_seconds = self._audio.get_duration()
 
         self._window.set_state(FloatingWindow.STATE_RECOGNIZING)
         self._window.add_block("asr")
 
-        self._asr_worker = ASRWorker(
+        self._release_time = time.monotonic()
+        self._idle_s = self._pinger.mark_activity()
+        self._asr_started = self._release_time
+        self._asr_first_seen = False
+        deadline_ms = self._config.get("optimize.deadline_ms", 0)
+        if (
+            deadline_ms > 0
+            and self._config.get("llm.api_key", "")
+            and not self._streaming_paste_enabled()
+        ):
+            self._deadline_timer.start(deadline_ms)
+
+        self._asr_worker = self._make_asr_worker(audio_b64)
+        self._asr_worker.chunk_received.connect(self._on_asr_chunk)
+        self._asr_worker.finished_text.connect(self._on_asr_done)
+        self._asr_worker.error.connect(self._on_asr_error)
+        self._asr_worker.start()
+
+        # 识别请求发出后再归档录音（只计算摘要，压缩与写入在后台线程）
+        if self._config.get("audio_archive.enabled", False):
+            self._session_audio = self.audio_archive.store(
+                self._audio.get_pcm(), self._audio.sample_rate
+            )
+
+    def _make_asr_worker(self, audio_b64: str) -> ASRWorker:
+        """以当前识别配置创建（但不启动）一个流式 ASRWorker。"""
+        return ASRWorker(
             base_url=self._config.get("asr.base_url"),
             model=self._config.get("asr.model"),
             api_key=self._config.get("asr.api_key"),
             audio_base64=audio_b64,
+            context=self._asr_context(),
             parent=self,
         )
-        self._asr_worker.chunk_received.connect(self._on_asr_chunk)
-        self._asr_worker.finished_text.connect(self._on_asr_done)
-        self._asr_worker.error.connect(self._on_asr_error)
-        self._asr_worker.start()
+
+    def _asr_context(self) -> str:
+        """ASR 热词上下文（用户词表 + 历史高频术语），按词表版本缓存。"""
+        if not self._config.get("asr.hotwords_enabled", True):
+            return ""
+        glossary = tuple(self._config.get("asr.glossary", []) or [])
+        budget = self._config.get("asr.hotword_token_budget", 200)
+        key = (self._vocab.version, glossary, budget)
+        if key != self._asr_context_key:
+            self._asr_context_key = key
+            self._asr_context_text = build_hotword_context(
+                list(glossary), self._vocab.top_terms(100), budget
+            )
+        return self._asr_context_text
 
     @Slot(str)
     def _on_asr_chunk(self, text: str):
+        if not self._asr_first_seen:
+            self._asr_first_seen = True
+            self._pinger.record_first_token(
+                "asr", (time.monotonic() - self._asr_started) * 1000, self._idle_s
+            )
         self._asr_buffer += text
         cleaned = clean_asr_output(self._asr_buffer)
         self._window.set_block_text("asr", cleaned)
+        if self._speculation is None and self._speculation_allowed():
+            prefix = complete_prefix(cleaned)
+            if len(prefix) >= self._config.get("optimize.speculative_min_chars", 12):
+                self._start_speculation(prefix)
 
     @Slot(str)
     def _on_asr_done(self, cleaned_text: str):
         self._raw_asr_text = cleaned_text
         self._window.set_block_text("asr", cleaned_text)
+        self._session_usage.add_asr(self._config.get("asr.model"), self._audio_seconds)
 
         llm_key = self._config.get("llm.api_key", "")
         if not llm_key:
-            # 无 LLM，原文直接作为优化结果保存
-            self._history.add_record(cleaned_text, cleaned_text)
-            if self._translate_for_current_session:
-                self._window.set_status_text("未配置大模型 API Key，无法翻译，已返回原文")
-            self._finish_with_paste(cleaned_text, "optimize")
+            self._finish_without_llm(cleaned_text)
             return
 
-        QTimer.singleShot(300, self._start_optimization)
+        if self._deadline_hit:
+            # 时限在识别阶段就已耗尽：立即交付原文，优化照常进行
+            self._deliver_deferred()
+
+        if self._streaming_paste_enabled():
+            self._begin_streaming_paste()
+
+        if self._speculation is not None:
+            rest = self._speculation.confirm(cleaned_text)
+            if rest is not None:
+                # 推测前缀仍然成立：保留推测结果，立即继续，无需再等待
+                self._resume_speculation(rest)
+                return
+            self._speculation.discard()
+            self._speculation = None
+
+        seq = self._session_seq
+        QTimer.singleShot(300, lambda: self._start_optimization_if_current(seq))
+
+    def _finish_without_llm(self, cleaned_text: str):
+        """无 LLM：原文（经本地同音纠错）直接作为优化结果保存。"""
+        corrected = self._rescore_asr(cleaned_text)
+        if self._hold_until_queue_drained(
+            lambda: self._finish_without_llm(cleaned_text), corrected
+        ):
+            return
+        self._session_record_id = self._history.add_record(
+            cleaned_text, corrected, audio=self._session_audio
+        )["id"]
+        if self._translate_for_current_session:
+            self._window.set_status_text("未配置大模型 API Key，无法翻译，已返回原文")
+        if corrected != cleaned_text:
+            self._window.add_block("optimize")
+            self._window.set_block_text("optimize", corrected)
+        self._finish_with_paste(corrected, "optimize")
 
     @Slot(str)
     def _on_asr_error(self, err: str):
+        self._deadline_timer.stop()
+        if self._speculation is not None:
+            self._speculation.discard()
+            self._speculation = None
         self._window.set_block_text("asr", f"识别失败: {err}")
         self._window.set_state(FloatingWindow.STATE_ERROR)
         self._start_dismiss_mode()
@@ -299,76 +634,394 @@ class Controller(QObject):
     # ═══════════════════════════════════════════════════════════
     #  阶段 3: LLM 文字优化
     # ═══════════════════════════════════════════════════════════
-    def _build_optimize_prompt(self) -> str:
-        """构建优化 prompt，注入最近 N 条历史记录作为上下文。"""
+    def _history_context_lines(self, text: str) -> list[str]:
+        """挑选注入 prompt 的历史记录行。
+
+        relevant 模式按与当前转录文本的相关性（BM25）取前 N 条，
+        不足 N 条时用最近记录补齐；recent 模式只取最近 N 条。
+        所有行的估算 token 总数不超过 _context_token_budget()（0 为不限）。
+        """
         ctx_count = self._config.get("history.context_count", 5)
+        if ctx_count <= 0:
+            return []
+        budget = self._context_token_budget()
         recent = self._history.get_recent(ctx_count)
-        rules_override = self._config.get("optimize.rules", "")
-        if recent:
-            lines = []
-            for r in recent:
-                lines.append(f"[{r['time']}] {r.get('optimized_text', '')}")
-            history_text = "\n".join(lines)
-            return build_optimize_prompt(
-                text=self._raw_asr_text,
-                history=history_text,
-                rules_override=rules_override,
-            )
+        if self._config.get("history.context_mode", "relevant") == "relevant":
+            candidates = self._history.search_relevant(text, ctx_count)
+            seen = {r["id"] for r in candidates}
+            candidates += [r for r in recent if r["id"] not in seen]
+        else:
+            candidates = recent
+
+        lines: list[str] = []
+        used = 0
+        for r in candidates:
+            if len(lines) >= ctx_count:
+                break
+            line = f"[{r['time']}] {r.get('optimized_text', '')}"
+            cost = estimate_tokens(line)
+            if budget > 0 and used + cost > budget:
+                continue
+            lines.append(line)
+            used += cost
+        return lines
+
+    def _context_token_budget(self) -> int:
+        """历史上下文预算：history.context_token_budget，按用量账本中实际的 prompt 大小收紧。
+
+        设置了 history.context_prompt_target 时，若当前模型近 7 天每次请求的平均
+        prompt token 超出目标值，从预算中扣除超出的部分（最少为 0，即不注入历史）。
+        """
+        budget = self._config.get("history.context_token_budget", 600)
+        target = self._config.get("history.context_prompt_target", 0)
+        if budget <= 0 or target <= 0:
+            return budget
+        average = self._usage_ledger.average_prompt_tokens(
+            self._config.get("llm.model", "")
+        )
+        if average <= target:
+            return budget
+        return max(budget - int(average - target), 0)
+
+    def _build_optimize_prompt(
+        self,
+        translate_to: str | None = None,
+        text: str | None = None,
+    ) -> str:
+        """构建优化 prompt，注入与当前文本相关的历史记录作为上下文。
+
+        vocabulary 模式下改为注入个人词表，prompt 更短且术语召回更好。
+        translate_to 非空时构建“优化 + 翻译”合并模式的 prompt。
+        text 默认为本轮完整转录文本，推测执行时传入部分文本。
+        """
+        if text is None:
+            text = self._raw_asr_text
+        text = self._rescore_asr(text)
+        history = vocabulary = None
+        mode = self._config.get("history.context_mode", "relevant")
+        if self._usage_over_budget():
+            # 今日用量已超预算：不再注入历史上下文，压缩 prompt
+            mode = "none"
+        if mode == "vocabulary":
+            vocabulary = self._vocab.prompt_text(
+                self._config.get("history.context_token_budget", 600)
+            ) or None
+        elif mode != "none":
+            lines = self._history_context_lines(text)
+            history = "\n".join(lines) if lines else None
+        return build_optimize_prompt(
+            text=text,
+            history=history,
+            rules_override=self._config.get("optimize.rules", ""),
+            translate_to=translate_to,
+            vocabulary=vocabulary,
+        )
+
+    def _reoptimize_prompt(self, text: str) -> str:
+        """批量重新优化的 prompt：当前规则（及个人词表），不注入历史记录——
+        历史中正是待替换的旧优化结果。"""
+        vocabulary = None
+        if self._config.get("history.context_mode", "relevant") == "vocabulary":
+            vocabulary = self._vocab.prompt_text(
+                self._config.get("history.context_token_budget", 600)
+            ) or None
         return build_optimize_prompt(
-            text=self._raw_asr_text,
-            history=None,
-            rules_override=rules_override,
+            text=self._rescore_asr(text),
+            rules_override=self._config.get("optimize.rules", ""),
+            vocabulary=vocabulary,
         )
 
+    def _rescore_asr(self, text: str) -> str:
+        """用个人字符语言模型对 ASR 文本做本地同音纠错，交给大模型的输入更干净。"""
+        if not self._config.get("optimize.local_rescoring", True):
+            return text
+        corrected, applied = self._char_lm.rescore(
+            text,
+            self._vocab.top_corrections(200),
+            self._config.get("optimize.rescoring_margin", 2.0),
+        )
+        if applied:
+            print(f"[MouthWrite] 本地同音纠错: {applied}")
+        return corrected
+
+    def _llm_endpoints(self) -> list[dict]:
+        """主端点 + 备用端点（llm.fallback_endpoints），按优先级排列。"""
+        primary = {
+            "base_url": self._config.get("llm.base_url"),
+            "model": self._config.get("llm.model"),
+            "api_key": self._config.get("llm.api_key"),
+        }
+        fallbacks = [
+            ep for ep in self._config.get("llm.fallback_endpoints", []) or []
+            if ep.get("base_url") and ep.get("model")
+        ]
+        return [primary, *fallbacks]
+
+    def _make_llm_worker(
+        self, prompt: str, track_usage: bool = True
+    ) -> LLMWorker | LLMRouter:
+        """以当前大模型配置创建（但不启动）一个流式请求。
+
+        配置了备用端点时返回 LLMRouter（首 token 超时对冲 / 出错回退），
+        信号与 LLMWorker 一致。track_usage 为 False 时用量由调用方自行统计。
+        """
+        endpoints = self._llm_endpoints()
+        connect_timeout = self._config.get("llm.connect_timeout", 10.0)
+        read_timeout = self._config.get("llm.read_timeout", 60.0)
+        if len(endpoints) > 1:
+            worker = LLMRouter(
+                endpoints,
+                prompt,
+                first_token_deadline_ms=self._config.get(
+                    "llm.first_token_deadline_ms", 3000
+                ),
+                connect_timeout=connect_timeout,
+                read_timeout=read_timeout,
+                parent=self,
+            )
+        else:
+            worker = LLMWorker(
+                base_url=endpoints[0]["base_url"],
+                model=endpoints[0]["model"],
+                api_key=endpoints[0]["api_key"],
+                prompt=prompt,
+                parent=self,
+                connect_timeout=connect_timeout,
+                read_timeout=read_timeout,
+            )
+        if track_usage:
+            worker.usage_received.connect(self._on_llm_usage)
+        return worker
+
+    def _start_llm_worker(self, prompt: str, on_chunk, on_done, on_error):
+        """以当前大模型配置启动一个流式 LLMWorker。"""
+        self._llm_worker = self._make_llm_worker(prompt)
+        self._llm_started = time.monotonic()
+        self._llm_first_seen = False
+        self._llm_worker.chunk_received.connect(self._on_llm_first_token)
+        self._llm_worker.chunk_received.connect(on_chunk)
+        self._llm_worker.finished_text.connect(on_done)
+        self._llm_worker.error.connect(on_error)
+        self._llm_worker.start()
+
+    def _start_optimization_if_current(self, seq: int):
+        """延迟启动的优化：期间会话已转入后台（或已开始新一轮）时不再启动。"""
+        if seq == self._session_seq and self._busy:
+            self._start_optimization()
+
     def _start_optimization(self):
         self._window.set_state(FloatingWindow.STATE_OPTIMIZING)
         self._window.add_block("optimize")
 
-        prompt = self._build_optimize_prompt()
-        self._llm_worker = LLMWorker(
-            base_url=self._config.get("llm.base_url"),
-            model=self._config.get("llm.model"),
-            api_key=self._config.get("llm.api_key"),
-            prompt=prompt,
-            parent=self,
+        if self._use_combined_request():
+            self._start_combined()
+            return
+
+        self._start_llm_worker(
+            self._build_optimize_prompt(),
+            self._on_optimize_chunk,
+            self._on_optimize_done,
+            self._on_optimize_error,
         )
-        self._llm_worker.chunk_received.connect(self._on_optimize_chunk)
-        self._llm_worker.finished_text.connect(self._on_optimize_done)
-        self._llm_worker.error.connect(self._on_optimize_error)
-        self._llm_worker.start()
+
+    def _use_combined_request(self) -> bool:
+        """组合键会话且只有一种目标语言时，优化与翻译合并为一次请求。"""
+        return (
+            self._translate_for_current_session
+            and self._config.get("translation.combined_request", True)
+            and len(self._target_languages()) == 1
+        )
+
+    # ── 推测执行 ──────────────────────────────────────────
+    def _speculation_allowed(self) -> bool:
+        if not self._config.get("optimize.speculative", True):
+            return False
+        if not self._config.get("llm.api_key", ""):
+            return False
+        # 合并模式使用不同的 prompt，不做推测
+        return not self._use_combined_request()
+
+    def _start_speculation(self, prefix: str):
+        """ASR 仍在输出时，先对已完整的句子前缀发起优化请求。"""
+        worker = self._make_llm_worker(self._build_optimize_prompt(text=prefix))
+        self._speculation = SpeculativeOptimization(prefix, worker, parent=self)
+        self._speculation.start()
+
+    def _resume_speculation(self, rest: str):
+        """推测前缀已确认：推测结果直接进入 optimize 块，剩余部分另发请求。"""
+        self._window.set_state(FloatingWindow.STATE_OPTIMIZING)
+        self._window.add_block("optimize")
+        spec = self._speculation
+        spec.chunk_received.connect(self._on_optimize_chunk)
+        spec.finished_text.connect(self._on_optimize_done)
+        spec.error.connect(self._on_optimize_error)
+        rest_worker = (
+            self._make_llm_worker(self._build_optimize_prompt(text=rest))
+            if rest
+            else None
+        )
+        spec.resume(rest_worker)
 
     @Slot(str)
     def _on_optimize_chunk(self, text: str):
         self._window.append_to_block("optimize", text)
+        if self._inject_splitter is not None:
+            for sentence in self._inject_splitter.feed(text):
+                self._inject(sentence)
+        if self._translate_for_current_session and self._pipeline_allowed():
+            # 组合键会话：完整句子一出现就开始翻译，不等优化全部结束
+            if self._translate_pipeline is None:
+                self._start_translate_pipeline()
+            self._translate_pipeline.feed(text)
 
     @Slot(str)
     def _on_optimize_done(self, full_text: str):
+        if self._hold_until_queue_drained(
+            lambda: self._on_optimize_done(full_text), full_text
+        ):
+            return
         self._optimized_text = full_text
-        # 保存到历史记录
-        self._history.add_record(self._raw_asr_text, full_text)
+        if self._inject_splitter is not None:
+            self._inject(self._inject_splitter.flush())
+        # 保存到历史记录（超时交付过原文时，替换当时写入的记录）
+        if self._deferred_record_id is not None:
+            self._history.update_record(
+                self._deferred_record_id, optimized_text=full_text
+            )
+        else:
+            self._session_record_id = self._history.add_record(
+                self._raw_asr_text, full_text, audio=self._session_audio
+            )["id"]
         if self._translate_for_current_session:
-            # 组合键模式：优化后直接进入翻译流程
-            self._on_translate()
+            # 组合键模式：优化后直接进入翻译流程（分句流水线已在进行时只需收尾）
+            if self._translate_pipeline is not None:
+                self._close_translate_pipeline(full_text)
+            else:
+                self._on_translate()
+            return
+        if self._injected_text:
+            self._finish_streaming_paste(full_text)
             return
         self._finish_with_paste(full_text, "optimize")
 
     @Slot(str)
     def _on_optimize_error(self, err: str):
+        if self._hold_until_queue_drained(
+            lambda: self._on_optimize_error(err), self._raw_asr_text
+        ):
+            return
         self._window.set_block_text("optimize", f"优化失败: {err}")
         self._window.set_status_text("优化失败，已使用原文")
         self._optimized_text = self._raw_asr_text
+        self._cancel_translate_pipeline()
+        if self._injected_text:
+            # 已有部分优化结果写入目标窗口，无法撤回：停止输入，原文放入剪贴板备用
+            self._inject_splitter = None
+            self._copy_to_clipboard(self._raw_asr_text)
+            self._window.set_state(FloatingWindow.STATE_DONE)
+            self._window.set_status_text("优化中断，已输入部分内容，原文已复制")
+            self._start_dismiss_mode()
+            self._commit_usage()
+            return
         if self._translate_for_current_session:
             # 组合键模式下，优化失败也尝试翻译原文
             self._on_translate()
             return
         self._finish_with_paste(self._raw_asr_text, "optimize")
 
+    # ═══════════════════════════════════════════════════════════
+    #  阶段 3′: 优化 + 翻译合并请求（组合键会话）
+    # ═══════════════════════════════════════════════════════════
+    def _start_combined(self):
+        """一次流式请求同时返回优化结果与译文，省去第二次请求的预填充与往返。"""
+        target = self._target_languages()[0]
+        self._translate_source = ""
+        self._translate_target = target
+        self._combined_splitter = CombinedStreamSplitter()
+        self._start_llm_worker(
+            self._build_optimize_prompt(translate_to=target),
+            self._on_combined_chunk,
+            self._on_combined_done,
+            self._on_combined_error,
+        )
+
+    def _route_combined(self, parts: list[tuple[str, str]]):
+        for block, text in parts:
+            if (
+                block == "translate"
+                and self._window.state != FloatingWindow.STATE_TRANSLATING
+            ):
+                self._window.set_state(FloatingWindow.STATE_TRANSLATING)
+                self._window.add_block("translate")
+            self._window.append_to_block(block, text)
+
+    @Slot(str)
+    def _on_combined_chunk(self, text: str):
+        if self._combined_splitter is not None:
+            self._route_combined(self._combined_splitter.feed(text))
+
+    @Slot(str)
+    def _on_combined_done(self, full_text: str):
+        if self._hold_until_queue_drained(
+            lambda: self._on_combined_done(full_text),
+            *split_combined_output(full_text),
+        ):
+            return
+        splitter, self._combined_splitter = self._combined_splitter, None
+        if splitter is not None:
+            self._route_combined(splitter.flush())
+        optimized, translated = split_combined_output(full_text)
+        if not translated:
+            # 模型未按格式输出分隔行：按普通优化结果处理，再走独立翻译
+            self._window.set_block_text("optimize", optimized)
+            self._on_optimize_done(optimized)
+            return
+
+        self._window.set_block_text("optimize", optimized)
+        self._window.set_block_text("translate", translated)
+        self._optimized_text = optimized
+        self._translate_source = optimized
+        if self._deferred_record_id is not None:
+            self._history.update_record(
+                self._deferred_record_id,
+                optimized_text=optimized,
+                translated_text=translated,
+                target_language=self._translate_target,
+            )
+        else:
+            self._session_record_id = self._history.add_record(
+                self._raw_asr_text,
+                optimized,
+                translated,
+                target_language=self._translate_target,
+                audio=self._session_audio,
+            )["id"]
+        self._remember_translation(optimized, translated, self._translate_target)
+        self._finish_translation(translated)
+
+    @Slot(str)
+    def _on_combined_error(self, err: str):
+        if self._hold_until_queue_drained(
+            lambda: self._on_combined_error(err), self._raw_asr_text
+        ):
+            return
+        splitter, self._combined_splitter = self._combined_splitter, None
+        if splitter is not None and splitter.block == "translate":
+            # 优化部分已完整返回，仅翻译中断
+            self._on_translate_error(err)
+            return
+        self._on_optimize_error(err)
+
     # ═══════════════════════════════════════════════════════════
     #  阶段 4: 翻译
     # ═══════════════════════════════════════════════════════════
     @Slot()
     def _on_translate(self):
-        self._stop_dismiss_mode()
+        if self._deadline_hit:
+            # 超时已交付原文、正在等待点击粘贴：保留点击监听，只退出按键关闭
+            self._hotkey.set_dismiss_mode(False)
+        else:
+            self._stop_dismiss_mode()
 
         llm_key = self._config.get("llm.api_key", "")
         if not llm_key:
@@ -379,45 +1032,267 @@ class Controller(QObject):
         if not text:
             return
 
-        target = self._config.get("translation.target_language", "English")
-        prompt = TRANSLATE_PROMPT.format(target_language=target, text=text)
+        targets = self._target_languages()
+        if len(targets) > 1:
+            self._start_fanout(text, targets)
+            return
+        target = targets[0]
+        self._translate_source = text
+        self._translate_target = target
 
         self._window.set_state(FloatingWindow.STATE_TRANSLATING)
-        self._window.add_block("translate")
-
-        self._llm_worker = LLMWorker(
-            base_url=self._config.get("llm.base_url"),
-            model=self._config.get("llm.model"),
-            api_key=self._config.get("llm.api_key"),
-            prompt=prompt,
-            parent=self,
+        if self._window.has_block("translate"):
+            # 分句翻译失败后改为整段翻译：清掉已输出的部分译文
+            self._window.set_block_text("translate", "")
+        else:
+            self._window.add_block("translate")
+
+        reference = None
+        if self._config.get("translation.memory_enabled", True):
+            match = self._tm.lookup(
+                text, target, self._config.get("translation.memory_min_score", 0.6)
+            )
+            if match is not None and match.exact:
+                # 精确命中翻译记忆：直接复用历史译文，不再请求大模型
+                self._window.set_block_text("translate", match.translation)
+                self._on_translate_done(match.translation)
+                self._window.set_status_text("翻译完成（来自翻译记忆）")
+                return
+            if match is not None:
+                reference = (match.source, match.translation)
+        if self._pipeline_allowed():
+            # 分句并发翻译：长文本的首个译文 token 更早出现
+            self._start_translate_pipeline()
+            self._translate_pipeline.feed(text)
+            self._translate_pipeline.close()
+            return
+        self._start_llm_worker(
+            build_translate_prompt(text, target, reference),
+            self._on_translate_chunk,
+            self._on_translate_done,
+            self._on_translate_error,
         )
-        self._llm_worker.chunk_received.connect(self._on_translate_chunk)
-        self._llm_worker.finished_text.connect(self._on_translate_done)
-        self._llm_worker.error.connect(self._on_translate_error)
-        self._llm_worker.start()
 
     @Slot(str)
     def _on_translate_chunk(self, text: str):
+        if not self._window.has_block("translate"):
+            # 分句流水线在优化仍在输出时就产出了译文
+            self._window.add_block("translate")
         self._window.append_to_block("translate", text)
 
+    # ── 分句流水线翻译 ────────────────────────────────────
+    def _pipeline_allowed(self) -> bool:
+        if self._pipeline_failed or not self._config.get("translation.pipeline", True):
+            return False
+        if not self._config.get("llm.api_key", ""):
+            return False
+        if len(self._target_languages()) > 1:
+            return False
+        return self._combined_splitter is None
+
+    def _translate_sentence_prompt(self, sentence: str) -> str:
+        """单句翻译 prompt：相近的翻译记忆作为参考。"""
+        reference = None
+        if self._config.get("translation.memory_enabled", True):
+            match = self._tm.lookup(
+                sentence,
+                self._translate_target,
+                self._config.get("translation.memory_min_score", 0.6),
+            )
+            if match is not None and not match.exact:
+                reference = (match.source, match.translation)
+        return build_translate_prompt(sentence, self._translate_target, reference)
+
+    def _lookup_sentence_translation(self, sentence: str) -> str | None:
+        """单句精确命中翻译记忆时直接复用译文。"""
+        if not self._config.get("translation.memory_enabled", True):
+            return None
+        match = self._tm.lookup(sentence, self._translate_target, 1.0)
+        return match.translation if match is not None and match.exact else None
+
+    def _start_translate_pipeline(self):
+        self._cancel_translate_pipeline()
+        self._translate_target = self._target_languages()[0]
+        pipeline = SentenceTranslationPipeline(
+            lambda sentence: self._make_llm_worker(
+                self._translate_sentence_prompt(sentence)
+            ),
+            max_concurrency=self._config.get("translation.pipeline_concurrency", 2),
+            lookup=self._lookup_sentence_translation,
+            parent=self,
+        )
+        pipeline.chunk_received.connect(self._on_translate_chunk)
+        pipeline.finished_text.connect(self._on_translate_done)
+        pipeline.error.connect(self._on_translate_pipeline_error)
+        self._translate_pipeline = pipeline
+
+    def _close_translate_pipeline(self, full_text: str):
+        """优化结束：整段精确命中翻译记忆时直接采用，否则等待剩余句子译完。"""
+        self._translate_source = full_text
+        self._window.set_state(FloatingWindow.STATE_TRANSLATING)
+        if not self._window.has_block("translate"):
+            self._window.add_block("translate")
+        cached = self._lookup_sentence_translation(full_text)
+        if cached is not None:
+            self._cancel_translate_pipeline()
+            self._window.set_block_text("translate", cached)
+            self._on_translate_done(cached)
+            self._window.set_status_text("翻译完成（来自翻译记忆）")
+            return
+        self._translate_pipeline.close()
+
+    @Slot(str)
+    def _on_translate_pipeline_error(self, err: str):
+        """某一句翻译失败（流水线已自行取消其余句子）：改为整段翻译一次。
+
+        优化仍在输出时不切换状态，等 _on_optimize_done 发现没有流水线后再发起翻译。
+        """
+        print(f"[MouthWrite] 分句翻译失败，改为整段翻译: {err}")
+        self._translate_pipeline = None
+        self._pipeline_failed = True
+        if self._window.state == FloatingWindow.STATE_TRANSLATING:
+            self._on_translate()
+
+    def _cancel_translate_pipeline(self):
+        if self._translate_pipeline is not None:
+            self._translate_pipeline.cancel()
+            self._translate_pipeline = None
+
     @Slot(str)
     def _on_translate_done(self, full_text: str):
-        self._copy_to_clipboard(full_text)
-        # 给最近的历史记录补充翻译
-        self._history.update_last_translation(full_text)
+        self._translate_pipeline = None
+        # 给最近的历史记录补充翻译，并写入翻译记忆
+        self._history.update_last_translation(full_text, self._translate_target)
+        self._remember_translation(self._translate_source, full_text, self._translate_target)
+        self._finish_translation(full_text)
+
+    def _finish_translation(
+        self, text: str, block: str = "translate", status: str = "翻译完成"
+    ):
+        if self._deadline_hit:
+            self._deliver_upgrade(text, block)
+            self._commit_usage()
+            return
+        self._deadline_timer.stop()
+        self._copy_to_clipboard(text)
         self._window.mark_translated()
         self._window.set_state(FloatingWindow.STATE_DONE)
-        self._window.set_status_text("翻译完成")
-        self._window.show_block_copied("translate")
+        self._window.set_status_text(status)
+        self._window.show_block_copied(block)
+        self._commit_usage()
         # 翻译完成后与中文直出一致：等待左键点击输入框再粘贴
         self._start_waiting_for_click()
 
     @Slot(str)
     def _on_translate_error(self, err: str):
+        self._deadline_timer.stop()
         self._window.set_block_text("translate", f"翻译失败: {err}")
         self._window.set_state(FloatingWindow.STATE_ERROR)
         self._start_dismiss_mode()
+        self._commit_usage()
+
+    # ── 多语言并发翻译 ────────────────────────────────────
+    def _target_languages(self) -> list[str]:
+        """本轮翻译的目标语言（去重、保持顺序），未配置列表时为单一目标语言。"""
+        languages = [
+            lang.strip()
+            for lang in self._config.get("translation.target_languages", []) or []
+            if lang.strip()
+        ]
+        if not languages:
+            languages = [self._config.get("translation.target_language", "English")]
+        return list(dict.fromkeys(languages))
+
+    @staticmethod
+    def _fanout_block(language: str) -> str:
+        return f"translate:{language}"
+
+    def _start_fanout(self, text: str, targets: list[str]):
+        """同时向每种目标语言发起翻译，总耗时取决于最慢的一种而非总和。"""
+        self._translate_source = text
+        self._fanout_targets = targets
+        self._fanout_results = {}
+        self._fanout_workers = {}
+        self._window.set_state(FloatingWindow.STATE_TRANSLATING)
+        for lang in targets:
+            self._window.add_block(
+                self._fanout_block(lang), title=f"翻译结果（{lang}）", copyable=True
+            )
+
+        memory = self._config.get("translation.memory_enabled", True)
+        min_score = self._config.get("translation.memory_min_score", 0.6)
+        for lang in targets:
+            reference = None
+            match = self._tm.lookup(text, lang, min_score) if memory else None
+            if match is not None and match.exact:
+                self._window.set_block_text(self._fanout_block(lang), match.translation)
+                self._fanout_results[lang] = match.translation
+                continue
+            if match is not None:
+                reference = (match.source, match.translation)
+            worker = self._make_llm_worker(build_translate_prompt(text, lang, reference))
+            self._fanout_workers[worker] = lang
+            worker.chunk_received.connect(self._on_fanout_chunk)
+            worker.finished_text.connect(self._on_fanout_done)
+            worker.error.connect(self._on_fanout_error)
+            worker.start()
+        self._maybe_finish_fanout()
+
+    @Slot(str)
+    def _on_fanout_chunk(self, text: str):
+        lang = self._fanout_workers.get(self.sender())
+        if lang is not None:
+            self._window.append_to_block(self._fanout_block(lang), text)
+
+    @Slot(str)
+    def _on_fanout_done(self, full_text: str):
+        lang = self._fanout_workers.get(self.sender())
+        if lang is None:
+            return
+        self._fanout_results[lang] = full_text
+        self._maybe_finish_fanout()
+
+    @Slot(str)
+    def _on_fanout_error(self, err: str):
+        lang = self._fanout_workers.get(self.sender())
+        if lang is None:
+            return
+        self._window.set_block_text(self._fanout_block(lang), f"翻译失败: {err}")
+        self._fanout_results[lang] = None
+        self._maybe_finish_fanout()
+
+    def _maybe_finish_fanout(self):
+        if len(self._fanout_results) < len(self._fanout_targets):
+            return
+        translations = {
+            lang: self._fanout_results[lang]
+            for lang in self._fanout_targets
+            if self._fanout_results[lang]
+        }
+        if not translations:
+            self._deadline_timer.stop()
+            self._window.set_state(FloatingWindow.STATE_ERROR)
+            self._start_dismiss_mode()
+            self._commit_usage()
+            return
+        self._history.update_last_translations(translations)
+        for lang, text in translations.items():
+            self._remember_translation(self._translate_source, text, lang)
+        # 默认复制第一种成功的语言，其余语言可通过块内"复制"按钮切换
+        lang, text = next(iter(translations.items()))
+        self._finish_translation(
+            text,
+            self._fanout_block(lang),
+            f"翻译完成（{len(translations)} 种语言，点击“复制”切换剪贴板内容）",
+        )
+
+    @Slot(str)
+    def _on_block_copy(self, block: str):
+        """块内"复制"按钮：把该块内容放入剪贴板，之后点击输入框即粘贴该内容。"""
+        text = self._window.get_block_text(block)
+        if text:
+            self._copy_to_clipboard(text)
+            self._window.show_block_copied(block)
 
     # ═══════════════════════════════════════════════════════════
     #  辅助方法
@@ -427,14 +1302,304 @@ class Controller(QObject):
 
         不再自动粘贴到输入框，而是监听鼠标左键点击，点击后执行粘贴。
         """
+        if self._deadline_hit:
+            self._deliver_upgrade(text, copied_block)
+            self._commit_usage()
+            return
+        self._deadline_timer.stop()
         self._copy_to_clipboard(text)
         # 直出中文模式不再使用手动翻译按钮，隐藏翻译按钮
         self._window.mark_translated()
         self._window.set_state(FloatingWindow.STATE_DONE)
         self._window.show_block_copied(copied_block)
+        self._commit_usage()
         # 启动等待点击模式
         self._start_waiting_for_click()
 
+    # ── 流式输入 ──────────────────────────────────────────
+    def _streaming_paste_enabled(self) -> bool:
+        """流式输入只用于中文直出会话；翻译会话仍在完成后点击粘贴。"""
+        return (
+            self._config.get("paste.streaming", False)
+            and not self._translate_for_current_session
+            and bool(self._config.get("llm.api_key", ""))
+        )
+
+    def _make_injector(self) -> TextInjector:
+        if self._config.get("paste.injector", "windows") == "recording":
+            return RecordingInjector()
+        return WindowsTextInjector(self._prev_hwnd)
+
+    def _begin_streaming_paste(self):
+        self._injector = self._make_injector()
+        self._inject_splitter = SentenceSplitter()
+        self._injected_text = ""
+
+    def _inject(self, text: str):
+        """把一个完整句子写入目标窗口；目标窗口失去焦点时停止流式输入。"""
+        if not text or self._injector is None:
+            return
+        if self._injector.inject(text):
+            self._injected_text += text
+            return
+        print("[MouthWrite] 目标窗口已切换，停止流式输入")
+        self._inject_splitter = None
+
+    def _finish_streaming_paste(self, full_text: str):
+        """优化结束：全部已写入时直接完成；中途停止时剩余部分走点击粘贴。"""
+        self._inject_splitter = None
+        if full_text.startswith(self._injected_text):
+            remaining = full_text[len(self._injected_text):]
+        else:
+            remaining = full_text
+        if remaining.strip():
+            self._finish_with_paste(remaining, "optimize")
+            self._window.set_status_text("目标窗口已切换，剩余内容已复制，点击输入框粘贴")
+            return
+        self._deadline_timer.stop()
+        self._pasted = True
+        self._copy_to_clipboard(full_text)
+        self._window.mark_translated()
+        self._window.set_state(FloatingWindow.STATE_DONE)
+        self._window.set_status_text("已直接输入到目标窗口（同时已复制）")
+        self._window.show_block_copied("optimize")
+        self._start_dismiss_mode()
+        self._commit_usage()
+
+    # ── 流水线会话 ────────────────────────────────────────
+    def _can_hand_off(self) -> bool:
+        return self._config.get("session.pipelined", True) and self._window.state in (
+            FloatingWindow.STATE_RECOGNIZING,
+            FloatingWindow.STATE_OPTIMIZING,
+            FloatingWindow.STATE_TRANSLATING,
+        )
+
+    def _hand_off_session(self):
+        """把处理中的前台会话转入后台队列，尽量接管已在进行的请求。"""
+        self._deadline_timer.stop()
+        self._cancel_translate_pipeline()
+        translate_to = (
+            self._target_languages()[0] if self._translate_for_current_session else ""
+        )
+        session = self._sessions.enqueue(
+            raw_text=self._raw_asr_text,
+            translate_to=translate_to,
+            record_id=self._session_record_id,
+            usage=self._session_usage,
+            audio=self._session_audio,
+        )
+        if self._held_result is not None:
+            # 结果已就绪、只是在排队等待交付
+            session.optimized_text, session.translated_text = self._held_result
+            self._held_delivery = self._held_result = None
+            session.start()
+        elif not self._raw_asr_text and self._asr_worker is not None:
+            # 识别中：接管 ASR 请求（推测优化随前台清理一并丢弃）
+            session.audio_seconds = self._audio_seconds
+            session.adopt(self._asr_worker, "asr")
+            self._asr_worker = None
+        elif (
+            self._combined_splitter is not None
+            and self._llm_worker is not None
+            and self._llm_worker.isRunning()
+        ):
+            # 优化 + 翻译合并请求进行中：窗口已是翻译状态，但优化结果尚未完整，
+            # 整个请求作为优化阶段交给后台会话，由其拆分出优化结果与译文
+            session.adopt(self._llm_worker, "optimize", [self._llm_worker])
+            self._llm_worker = None
+        elif self._window.state == FloatingWindow.STATE_TRANSLATING:
+            # 翻译中：优化结果已入历史，后台以单次请求重新翻译
+            session.optimized_text = self._optimized_text or self._raw_asr_text
+            session.start()
+        elif self._speculation is not None:
+            session.adopt(self._speculation, "optimize", self._speculation.workers())
+            self._speculation = None
+        elif self._llm_worker is not None and self._llm_worker.isRunning():
+            session.adopt(self._llm_worker, "optimize", [self._llm_worker])
+            self._llm_worker = None
+        else:
+            # 优化尚未发出（识别结束后的短暂延迟内）：由后台会话发起
+            session.start()
+        self._combined_splitter = None
+        print(f"[MouthWrite] 会话 #{session.seq} 转入后台，队列中 {len(self._sessions)} 个")
+
+    def _background_optimize_prompt(self, text: str, translate_to: str) -> str:
+        combined = bool(translate_to) and self._config.get(
+            "translation.combined_request", True
+        )
+        return self._build_optimize_prompt(
+            translate_to=translate_to if combined else None, text=text
+        )
+
+    def _background_translate_prompt(self, text: str, target: str) -> str:
+        reference = None
+        if self._config.get("translation.memory_enabled", True):
+            match = self._tm.lookup(
+                text, target, self._config.get("translation.memory_min_score", 0.6)
+            )
+            if match is not None:
+                reference = (match.source, match.translation)
+        return build_translate_prompt(text, target, reference)
+
+    def _hold_until_queue_drained(
+        self, deliver, optimized: str, translated: str = ""
+    ) -> bool:
+        """后台队列未清空时暂缓交付前台结果，队列清空后再调用 deliver。"""
+        if not self._sessions.pending:
+            return False
+        self._held_delivery = deliver
+        self._held_result = (optimized, translated)
+        self._window.set_status_text(f"等待前 {len(self._sessions)} 段处理完成…")
+        return True
+
+    @Slot(object)
+    def _on_session_delivered(self, session: BackgroundSession):
+        """按顺序交付后台会话：写入历史、记录用量、复制到剪贴板。"""
+        if session.audio_seconds:
+            session.usage.add_asr(self._config.get("asr.model"), session.audio_seconds)
+        if not session.raw_text:
+            print(f"[MouthWrite] 后台会话 #{session.seq} 识别失败: {session.error}")
+            return
+        optimized = session.optimized_text or session.raw_text
+        translation = {}
+        if session.translated_text:
+            translation = {
+                "translated_text": session.translated_text,
+                "target_language": session.translate_to,
+            }
+            self._remember_translation(optimized, session.translated_text, session.translate_to)
+        if session.record_id is not None:
+            self._history.update_record(
+                session.record_id, optimized_text=optimized, **translation
+            )
+            record_id = session.record_id
+        else:
+            record_id = self._history.add_record(
+                session.raw_text, optimized, audio=session.audio, **translation
+            )["id"]
+        self._commit_usage(session.usage, record_id)
+        self._copy_to_clipboard(session.result)
+        status = "上一段已完成并复制"
+        if session.error:
+            status += "（处理失败，已使用原文）"
+        if self._window.isVisible():
+            self._window.set_status_text(status)
+        print(f"[MouthWrite] 后台会话 #{session.seq} 已交付")
+
+    @Slot()
+    def _on_sessions_drained(self):
+        deliver, self._held_delivery = self._held_delivery, None
+        self._held_result = None
+        if deliver is not None:
+            deliver()
+
+    # ── 端到端时限 ────────────────────────────────────────
+    @Slot()
+    def _on_deadline(self):
+        """时限已到而大模型仍未完成：先交付识别原文，进入等待点击粘贴。"""
+        if not self._busy or self._deadline_hit:
+            return
+        if self._sessions.pending:
+            # 前面还有后台会话未交付：提前交付原文会打乱剪贴板 / 历史顺序
+            return
+        self._deadline_hit = True
+        print(
+            f"[MouthWrite] 超出端到端时限 "
+            f"{self._config.get('optimize.deadline_ms', 0)} ms"
+            f"（阶段: {self._window.state}），先交付识别原文"
+        )
+        if self._raw_asr_text:
+            self._deliver_deferred()
+        # 否则识别尚未结束，由 _on_asr_done 在拿到原文后立即交付
+
+    def _deliver_deferred(self):
+        """复制识别原文并写入历史，大模型完成后由 _deliver_upgrade 替换。"""
+        if self._deferred_record_id is not None:
+            return
+        text = self._raw_asr_text
+        record = self._history.add_record(text, text, audio=self._session_audio)
+        self._deferred_record_id = self._session_record_id = record["id"]
+        self._copy_to_clipboard(text)
+        self._window.mark_translated()
+        self._window.set_state(FloatingWindow.STATE_DONE)
+        self._window.set_status_text("大模型响应较慢，已先复制原文，完成后自动替换")
+        self._window.show_block_copied("asr")
+        self._start_waiting_for_click()
+
+    def _deliver_upgrade(self, text: str, copied_block: str):
+        """超时后大模型才完成：用户尚未粘贴时用最终结果替换剪贴板。"""
+        elapsed_ms = (time.monotonic() - self._release_time) * 1000
+        print(f"[MouthWrite] 大模型在 {elapsed_ms:.0f} ms 后完成（已超时交付原文）")
+        if self._pasted or text == self._raw_asr_text:
+            return
+        self._copy_to_clipboard(text)
+        if self._window.isVisible():
+            self._window.set_state(FloatingWindow.STATE_DONE)
+            self._window.set_status_text("已替换为优化结果")
+            self._window.show_block_copied(copied_block)
+            if self._mouse_listener is None:
+                # 点击粘贴的监听已被中途停止：重新等待点击，粘贴最终结果
+                self._start_waiting_for_click()
+
+    @Slot(str)
+    def _on_llm_first_token(self, _text: str):
+        if not self._llm_first_seen:
+            self._llm_first_seen = True
+            self._pinger.record_first_token(
+                "llm", (time.monotonic() - self._llm_started) * 1000, self._idle_s
+            )
+
+    # ── 用量统计 ──────────────────────────────────────────
+    @Slot(dict)
+    def _on_llm_usage(self, usage: dict):
+        worker = self.sender()
+        if isinstance(worker, (LLMWorker, LLMRouter)):
+            model = worker.model
+        else:
+            model = self._config.get("llm.model")
+        self._session_usage.add_llm(model, usage)
+
+    def _on_reoptimize_usage(self):
+        self._commit_usage(self.reoptimizer.usage)
+        if self._usage_over_budget():
+            print("[MouthWrite] 今日用量已超出预算，暂停重新优化")
+            self.reoptimizer.pause()
+
+    def _commit_usage(
+        self, usage: SessionUsage | None = None, record_id: int | None = None
+    ):
+        """会话（或其中一段流程）结束：新增用量记入账本，并写入对应历史记录。
+
+        默认提交前台会话；后台会话交付时传入其自身的用量与记录 id。
+        """
+        if usage is None:
+            usage, record_id = self._session_usage, self._session_record_id
+        delta = usage.commit(self._config.get("usage.prices", {}) or {})
+        if delta is None:
+            return
+        self._usage_ledger.add(delta)
+        if record_id is not None:
+            self._history.update_record(record_id, usage=usage.to_dict())
+        if self._usage_over_budget() and self._budget_alert_day != date.today().isoformat():
+            # 每天只提醒一次
+            self._budget_alert_day = date.today().isoformat()
+            today = self._usage_ledger.day()
+            print(
+                f"[MouthWrite] 今日用量已超出预算："
+                f"{total_tokens(today)} tokens，费用 {today.get('cost', 0.0):.4f}"
+            )
+            self._window.set_status_text("今日大模型用量已超出预算，已停止注入历史上下文")
+
+    def _usage_over_budget(self) -> bool:
+        token_budget = self._config.get("usage.daily_token_budget", 0)
+        cost_budget = self._config.get("usage.daily_cost_budget", 0.0)
+        if not token_budget and not cost_budget:
+            return False
+        today = self._usage_ledger.day()
+        if token_budget and total_tokens(today) >= token_budget:
+            return True
+        return bool(cost_budget) and today.get("cost", 0.0) >= cost_budget
+
     def _copy_to_clipboard(self, text: str):
         clipboard = QGuiApplication.clipboard()
         if clipboard is not None:
@@ -464,6 +1629,13 @@ class Controller(QObject):
             return
         if not self._waiting_paste:
             return
+        # 窗口内的点击（如块内"复制"按钮）不触发粘贴
+        try:
+            geo: QRect = self._window.geometry()
+            if self._window.isVisible() and geo.contains(QPoint(int(x), int(y))):
+                return
+        except Exception:
+            pass
 
         # 停止一次性监听
         self._waiting_paste = False
@@ -481,6 +1653,7 @@ class Controller(QObject):
 
     def _do_paste_and_close(self):
         """先关闭 GUI，再执行粘贴。"""
+        self._pasted = True
         self._dismiss_window()
         # 等待 GUI 关闭、焦点回到用户点击的窗口后，再粘贴
         QTimer.singleShot(150, self._do_paste)
@@ -504,6 +1677,9 @@ class Controller(QObject):
     def _on_window_closed(self):
         self._stop_dismiss_mode()
         self._busy = False
+        if self._deadline_hit and not self._pasted:
+            # 已超时交付原文但用户尚未粘贴：保留大模型请求，完成后替换剪贴板
+            return
         self._cleanup_workers()
 
     @Slot(str)
@@ -514,7 +1690,14 @@ class Controller(QObject):
         self._busy = False
 
     def _cleanup_workers(self):
-        for worker in (self._asr_worker, self._llm_worker):
+        self._deadline_timer.stop()
+        self._cancel_translate_pipeline()
+        if self._speculation is not None:
+            self._speculation.discard()
+            self._speculation = None
+        for worker in (self._asr_worker, self._llm_worker, *self._fanout_workers):
             if worker is not None and worker.isRunning():
+                if isinstance(worker, (LLMWorker, LLMRouter)):
+                    worker.cancel()
                 worker.quit()
                 worker.wait(2000)
@@ -1,92 +1,572 @@
-"""历史记录管理模块 —— 本地 JSON 持久化每次转录/优化/翻译结果。"""
+"""历史记录管理模块 —— 本地 JSONL 日志持久化每次转录/优化/翻译结果。"""
 
 import json
 import os
-from datetime import datetime
+import shutil
+import threading
+from collections import deque
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timedelta
 from pathlib import Path
 
+from core.history_archive import (
+    SEGMENT_ERRORS,
+    ArchiveSegment,
+    HistoryArchive,
+    SealPlan,
+    month_of,
+    text_fields,
+)
+from core.history_io import content_hash, merge_by_time
+from core.history_store import HistoryStore
+from core.text_index import NGramIndex, normalize_text
+
+
+_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _days_ago(days: int) -> str:
+    return (datetime.now() - timedelta(days=days)).strftime(_TIME_FORMAT)
+
 
 class HistoryManager:
-    """管理转录历史记录，存储在 %APPDATA%/MouthWrite/history.json。
+    """管理转录历史记录，存储在 %APPDATA%/MouthWrite/history.jsonl（追加日志，
+    见 core/history_store.py）。旧版 history.json 在首次启动时迁移并改名为 .bak。
 
     每条记录格式::
 
         {
+            "id": 42,                      # 自增编号，旧版本记录加载时补齐
             "time": "2026-02-07 14:30:00",
             "asr_text": "原始转录文本",
             "optimized_text": "优化后文本",
-            "translated_text": ""          # 可选
+            "translated_text": "",         # 可选
+            "target_language": "English",  # 可选，翻译目标语言
+            "translations": {              # 可选，多语言翻译时每种语言的译文
+                "English": "...", "Japanese": "..."
+            },
+            "usage": {...},                # 可选，本次会话的用量（见 core/usage.py）
+            "audio": "3f2a..."             # 可选，录音归档中的键（见 core/audio_archive.py）
         }
 
-    记录按时间倒序排列（最新在前）。
+    对外接口按时间倒序返回记录（最新在前）；内部按写入顺序保存，新增只需追加。
+
+    记录不设条数上限，分为两部分：
+      · 热段：最近 hot_days 天（且最多 hot_max_records 条）的记录，
+        常驻内存，search_relevant 只看热段
+      · 归档：更早的记录按月封存为压缩段（history/ 目录，见 core/history_archive.py），
+        启动时不加载；count / get_recent / get_page / search / iter_records 会继续读取归档
+    retention_days 大于 0 时，超过保留期限的记录被删除。三者均为 0 表示不限，
+    取自配置 history.*（见 from_config()），可用 set_hot_window() 更新。
+
+    由全部记录构建的派生数据（翻译记忆、个人词表等）使用 iter_snapshot()，
+    在后台线程中逐块读取归档，不阻塞主线程。
+    归档记录只读，update_record() 只能更新热段中的记录。
+
+    新增记录触发的封存在后台线程中写出归档段，写好后在下一次新增时于主线程换入；
+    期间这些记录仍留在热段中，读取结果不受影响。封存期间被更新的记录会让这次封存作废，
+    稍后重新封存。启动 / 重新加载时的封存仍同步进行。
+
+    相关性检索与全文搜索共用一个字符二元组索引（覆盖热段的原文、优化结果与译文），
+    在第一次检索时才构建，之后随新增 / 更新 / 封存增量维护。
     """
 
-    _MAX_RECORDS = 500
+    # 新增记录时，热段超出上限这么多条（或最旧记录超出期限一天）才封存，
+    # 避免每次新增都重写当月的归档段
+    _SEAL_SLACK_RECORDS = 200
+    _SEAL_SLACK_DAYS = 1
 
-    def __init__(self):
-        self._path = self._get_path()
+    def __init__(
+        self, hot_days: int = 30, hot_max_records: int = 2000, retention_days: int = 0
+    ):
+        self._hot_days = hot_days
+        self._hot_max_records = hot_max_records
+        self._retention_days = retention_days
+        app_dir = self._get_dir()
+        self._legacy_path = app_dir / "history.json"
+        self._store = HistoryStore(app_dir / "history.jsonl")
+        self._archive = HistoryArchive(app_dir / "history")
+        # 最旧在前
         self._records: list[dict] = []
+        self._by_id: dict[int, dict] = {}
+        self._next_id = 1
+        self._index: NGramIndex | None = None
+        self._listeners: list = []
+        # 后台封存：线程、写好的结果 (封存条数, 新段)、封存范围内最大的 id、期间是否有记录被更新
+        self._seal_thread: threading.Thread | None = None
+        self._seal_result: tuple[int, SealPlan | None] | None = None
+        self._sealing_upto = 0
+        self._seal_stale = False
         self._load()
 
+    @classmethod
+    def from_config(cls, config) -> "HistoryManager":
+        """按配置 history.* 中的热段范围与保留期限创建。"""
+        return cls(**cls.window_from_config(config))
+
     @staticmethod
-    def _get_path() -> Path:
+    def window_from_config(config) -> dict:
+        return {
+            "hot_days": config.get("history.hot_days", 30),
+            "hot_max_records": config.get("history.hot_max_records", 2000),
+            "retention_days": config.get("history.retention_days", 0),
+        }
+
+    @staticmethod
+    def _get_dir() -> Path:
         app_dir = Path(os.environ.get("APPDATA", ".")) / "MouthWrite"
         app_dir.mkdir(parents=True, exist_ok=True)
-        return app_dir / "history.json"
+        return app_dir
 
     # ── 加载 / 保存 ──────────────────────────────────────
     def _load(self):
-        if self._path.exists():
+        if self._store.exists():
+            self._records = self._store.load()
+            self._assign_ids()
+        else:
+            self._migrate_legacy()
+        # 封存后、热段日志重写前崩溃会让记录同时留在两处：以归档为准
+        archived = self._archive.last_id
+        if self._records and self._records[0]["id"] <= archived:
+            self._records = [r for r in self._records if r["id"] > archived]
+            self._by_id = {r["id"]: r for r in self._records}
+            self._store.rewrite(self._records)
+        self._index = None
+        self._seal_old_records()
+        self._maybe_compact()
+
+    def _migrate_legacy(self):
+        """一次性迁移旧版 history.json（最新在前的 JSON 数组）。"""
+        self._records = []
+        if self._legacy_path.exists():
             try:
-                with open(self._path, "r", encoding="utf-8") as f:
+                with open(self._legacy_path, "r", encoding="utf-8") as f:
                     data = json.load(f)
                 if isinstance(data, list):
-                    self._records = data
+                    self._records = [r for r in reversed(data) if isinstance(r, dict)]
             except (json.JSONDecodeError, OSError):
                 self._records = []
+        self._assign_ids()
+        if not self._legacy_path.exists():
+            return
+        self._store.rewrite(self._records)
+        if self._store.exists():
+            try:
+                os.replace(
+                    self._legacy_path,
+                    self._legacy_path.with_name(self._legacy_path.name + ".bak"),
+                )
+            except OSError:
+                pass
+            print(f"[MouthWrite] 已迁移 {len(self._records)} 条历史记录到 history.jsonl")
+
+    def _assign_ids(self):
+        """为缺少 id 的旧记录按时间先后补齐编号，并重建 id 映射。"""
+        self._next_id = 1 + max(
+            (r["id"] for r in self._records if isinstance(r.get("id"), int)),
+            default=self._archive.last_id,
+        )
+        for rec in self._records:
+            if not isinstance(rec.get("id"), int):
+                rec["id"] = self._next_id
+                self._next_id += 1
+        self._by_id = {r["id"]: r for r in self._records}
+
+    def _seal_old_records(self, slack: bool = False):
+        """把超出热段范围的旧记录封存到归档，并按保留期限删除过期记录。
+
+        slack 为 True 时（新增记录时）只在超出范围一定余量后才封存，
+        且归档段在后台线程中写出，由之后的 _finish_seal() 换入。
+        """
+        self._finish_seal(wait=not slack)
+        if self._seal_thread is not None:
+            # 上一次封存仍在进行
+            return
+        hot_days, hot_max, keep_from = self._hot_window()
+        hot_from = _days_ago(hot_days) if hot_days > 0 else ""
 
-    def _save(self):
+        records = self._records
+        excess = len(records) - hot_max if hot_max > 0 else 0
+        if slack:
+            over_count = excess > self._SEAL_SLACK_RECORDS
+            over_age = bool(hot_from and records) and records[0].get("time", "") < _days_ago(
+                hot_days + self._SEAL_SLACK_DAYS
+            )
+            if not (over_count or over_age):
+                return
+        elif keep_from:
+            dropped = self._archive.drop_before(keep_from)
+            if dropped:
+                print(f"[MouthWrite] 已删除 {dropped} 条超过保留期限的历史记录")
+
+        n = max(excess, 0)
+        while hot_from and n < len(records) and records[n].get("time", "") < hot_from:
+            n += 1
+        if n == 0:
+            return
+        # 早于保留期限的记录直接丢弃，不再封存
+        sealed = [r for r in records[:n] if r.get("time", "") >= keep_from]
+        if slack:
+            self._sealing_upto = records[n - 1]["id"]
+            self._seal_stale = False
+            # update_record 只整体替换字段值：浅拷贝即可避免后台序列化时记录被改动
+            self._seal_thread = threading.Thread(
+                target=self._seal_in_background,
+                args=(n, [dict(r) for r in sealed]),
+                name="MouthWrite-seal",
+                daemon=True,
+            )
+            self._seal_thread.start()
+            return
+        try:
+            self._archive.seal(sealed)
+        except SEGMENT_ERRORS as e:
+            print(f"[MouthWrite] 封存历史记录失败: {e}")
+            return
+        self._drop_sealed(n)
+
+    def _seal_in_background(self, n: int, records: list[dict]):
+        """（封存线程）写出新的归档段，结果留给主线程换入。"""
         try:
-            with open(self._path, "w", encoding="utf-8") as f:
-                json.dump(self._records, f, ensure_ascii=False, indent=2)
-        except OSError:
-            pass
+            plan = self._archive.prepare_seal(records)
+        except SEGMENT_ERRORS as e:
+            print(f"[MouthWrite] 封存历史记录失败: {e}")
+            n, plan = 0, None
+        self._seal_result = (n, plan)
+
+    def _finish_seal(self, wait: bool = True):
+        """换入后台封存写好的归档段并从热段移除这些记录。
+
+        wait 为 False 时封存尚未完成就直接返回；封存期间有记录被更新时放弃这次结果。
+        """
+        thread = self._seal_thread
+        if thread is None:
+            return
+        if wait:
+            thread.join()
+        elif thread.is_alive():
+            return
+        self._seal_thread = None
+        n, plan = self._seal_result or (0, None)
+        self._seal_result = None
+        self._sealing_upto = 0
+        if self._seal_stale:
+            if plan is not None:
+                self._archive.discard_seal(plan)
+            return
+        if plan is not None:
+            self._archive.commit_seal(plan)
+        if n:
+            self._drop_sealed(n)
+
+    def _drop_sealed(self, n: int):
+        """已封存（或已过期）的最旧 n 条记录移出热段。"""
+        for old in self._records[:n]:
+            self._by_id.pop(old["id"], None)
+            if self._index is not None:
+                self._index.remove(old["id"])
+        del self._records[:n]
+        self._store.rewrite(self._records)
+
+    def set_hot_window(self, hot_days: int, hot_max_records: int, retention_days: int):
+        """更新热段范围与保留期限，超出新范围的记录在下一次新增时封存 / 删除。"""
+        self._hot_days = hot_days
+        self._hot_max_records = hot_max_records
+        self._retention_days = retention_days
+
+    def _hot_window(self) -> tuple[int, int, str]:
+        """(热段天数, 热段条数上限, 保留期限起点时间)；0 / 空串表示不限。"""
+        hot_days = self._hot_days
+        hot_max = self._hot_max_records
+        retention_days = self._retention_days
+        if retention_days > 0:
+            hot_days = min(hot_days, retention_days) if hot_days > 0 else retention_days
+        keep_from = _days_ago(retention_days) if retention_days > 0 else ""
+        return hot_days, hot_max, keep_from
+
+    def _maybe_compact(self):
+        """更新行 / 已淘汰记录过多时，以内存中的存活记录重写日志。"""
+        if self._store.needs_compaction(len(self._records)):
+            self._store.rewrite(self._records)
+
+    # ── 检索索引 ──────────────────────────────────────────
+    @staticmethod
+    def _index_text(record: dict) -> str:
+        return "\n".join(text_fields(record))
+
+    def _ensure_index(self) -> NGramIndex:
+        if self._index is None:
+            self._index = NGramIndex()
+            for rec in self._records:
+                self._index.add(rec["id"], self._index_text(rec))
+        return self._index
 
     # ── 公共接口 ──────────────────────────────────────────
+    def add_listener(self, callback):
+        """注册新增记录的回调 ``callback(record)``，供词表等派生数据增量更新。"""
+        self._listeners.append(callback)
+
     def add_record(
         self,
         asr_text: str,
         optimized_text: str,
         translated_text: str = "",
-    ):
-        """添加一条记录（时间自动生成），最新在前。"""
+        target_language: str = "",
+        audio: str = "",
+    ) -> dict:
+        """添加一条记录（时间自动生成），最新在前。返回新记录。
+
+        audio 为该段录音在录音归档中的键（未开启归档时为空）。
+        """
         record: dict = {
-            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "id": self._next_id,
+            "time": datetime.now().strftime(_TIME_FORMAT),
             "asr_text": asr_text,
             "optimized_text": optimized_text,
         }
+        self._next_id += 1
         if translated_text:
             record["translated_text"] = translated_text
-        self._records.insert(0, record)
-        if len(self._records) > self._MAX_RECORDS:
-            self._records = self._records[: self._MAX_RECORDS]
-        self._save()
+            if target_language:
+                record["target_language"] = target_language
+        if audio:
+            record["audio"] = audio
+        self._records.append(record)
+        self._by_id[record["id"]] = record
+        if self._index is not None:
+            self._index.add(record["id"], self._index_text(record))
+        self._store.append(record)
+        self._seal_old_records(slack=True)
+        self._maybe_compact()
+        for callback in self._listeners:
+            callback(record)
+        return record
 
-    def update_last_translation(self, translated_text: str):
-        """给最近一条记录补充翻译结果。"""
+    def update_record(self, record_id: int, **fields) -> bool:
+        """按 id 更新热段记录的字段（如延迟到达的优化结果），返回是否找到记录。"""
+        record = self._by_id.get(record_id)
+        if record is None:
+            return False
+        if record_id <= self._sealing_upto:
+            # 正在后台封存的记录被改动：作废这次封存，稍后连同新内容重新封存
+            self._seal_stale = True
+        record.update(fields)
+        if self._index is not None:
+            self._index.add(record_id, self._index_text(record))
+        self._store.update(record_id, fields)
+        self._maybe_compact()
+        return True
+
+    def update_last_translation(
+        self, translated_text: str, target_language: str = ""
+    ):
+        """给最近一条记录补充翻译结果（及目标语言，供翻译记忆使用）。"""
         if self._records:
-            self._records[0]["translated_text"] = translated_text
-            self._save()
+            fields = {"translated_text": translated_text}
+            if target_language:
+                fields["target_language"] = target_language
+            self.update_record(self._records[-1]["id"], **fields)
+
+    def update_last_translations(self, translations: dict[str, str]):
+        """给最近一条记录补充多语言译文；第一种语言同时写入 translated_text。"""
+        if self._records and translations:
+            language, text = next(iter(translations.items()))
+            self.update_record(
+                self._records[-1]["id"],
+                translated_text=text,
+                target_language=language,
+                translations=dict(translations),
+            )
 
     def get_recent(self, n: int) -> list[dict]:
-        return self._records[:n]
+        """最新的 n 条记录（热段不足时继续读取归档）。"""
+        return self.get_page(0, n)
+
+    def get_record(self, record_id: int) -> dict | None:
+        """按 id 取热段中的记录（归档记录返回 None）。"""
+        return self._by_id.get(record_id)
 
-    def get_all(self) -> list[dict]:
-        return self._records.copy()
+    def count(self) -> int:
+        """记录总数（热段 + 归档）。"""
+        return len(self._records) + self._archive.count
+
+    def get_page(self, offset: int, limit: int) -> list[dict]:
+        """按时间倒序分页：跳过最新的 offset 条，返回其后最多 limit 条。
+
+        热段取完后继续从归档读取，只解压用到的块。
+        """
+        offset = max(offset, 0)
+        if limit <= 0:
+            return []
+        end = len(self._records) - offset
+        page = self._records[max(end - limit, 0):max(end, 0)][::-1]
+        if len(page) < limit:
+            page += self._archive.get_page(
+                max(offset - len(self._records), 0), limit - len(page)
+            )
+        return page
+
+    def iter_records(self) -> Iterator[dict]:
+        """按时间先后（最旧在前）逐条返回全部记录（归档 + 热段），归档逐块解压。"""
+        yield from self._archive.iter_oldest_first()
+        yield from list(self._records)
+
+    def iter_snapshot(self, newest_first: bool = False) -> Iterator[dict]:
+        """全部记录（归档 + 热段）在调用时刻的快照，可交给后台线程遍历。
+
+        在主线程调用：此时固定热段副本并打开各归档段的独立副本，之后的新增、
+        封存与合并都不影响遍历结果。newest_first 为 True 时从最新记录起返回。
+        """
+        return self._iter_segments(
+            self._archive.snapshot(), list(self._records), newest_first
+        )
+
+    @staticmethod
+    def _iter_segments(
+        segments: list[ArchiveSegment], hot: list[dict], newest_first: bool
+    ) -> Iterator[dict]:
+        try:
+            if newest_first:
+                yield from reversed(hot)
+                for segment in reversed(segments):
+                    yield from segment.iter_newest_first()
+            else:
+                for segment in segments:
+                    yield from segment.iter_records()
+                yield from hot
+        except SEGMENT_ERRORS as e:
+            print(f"[MouthWrite] 读取历史归档失败: {e}")
+        finally:
+            for segment in segments:
+                segment.close()
+
+    def search_relevant(self, text: str, limit: int) -> list[dict]:
+        """按 BM25（字符二元组）检索与 text 最相关的记录，按相关性降序。"""
+        if limit <= 0 or not self._records:
+            return []
+        hits = self._ensure_index().search(text, limit)
+        return [self._by_id[doc_id] for doc_id, _ in hits if doc_id in self._by_id]
+
+    def search(self, query: str, limit: int = 200) -> list[dict]:
+        """全文搜索：原文、优化结果或译文中包含 query 的记录，最新在前。
+
+        先用二元组索引求交得到候选（最近写入的在前，取够 limit 条即停止），
+        再对候选做规范化后的子串校验（忽略大小写、空白与标点）。
+        单个字符的查询无法走索引，从最新记录起顺序扫描。
+        热段中不足 limit 条时继续按时间倒序搜索归档段：各块的布隆过滤器排除
+        不可能命中的块，其余块先在检索列中查找，只解析确有命中的块。
+        """
+        needle = normalize_text(query)
+        if not needle or limit <= 0:
+            return []
+        if len(needle) < 2:
+            candidates = (r["id"] for r in reversed(self._records))
+        else:
+            candidates = self._ensure_index().match(needle)
+        results: list[dict] = []
+        for record_id in candidates:
+            record = self._by_id.get(record_id)
+            if record is None:
+                continue
+            if self._contains(record, needle):
+                results.append(record)
+                if len(results) >= limit:
+                    break
+        results.sort(key=lambda r: r["id"], reverse=True)
+        if len(results) < limit:
+            for record in self._archive.search(needle):
+                results.append(record)
+                if len(results) >= limit:
+                    break
+        return results
+
+    @staticmethod
+    def _contains(record: dict, needle: str) -> bool:
+        return any(needle in normalize_text(t) for t in text_fields(record))
 
     def clear(self):
+        self._finish_seal()
         self._records.clear()
-        self._save()
+        self._by_id.clear()
+        self._index = None
+        self._store.clear()
+        self._archive.clear()
 
     def reload(self):
+        self._finish_seal()
+        self._archive.reload()
         self._load()
+
+    # ── 导入 ──────────────────────────────────────────────
+    def import_records(self, sources: list[Iterable[dict]]) -> tuple[int, int]:
+        """导入若干记录来源（各自按时间先后排列，见 core/history_io.py），
+        返回 (新增条数, 跳过的重复条数)。
+
+        与现有历史按时间归并，按内容哈希去重后重建历史：记录按归并后的顺序重新编号，
+        超出热段范围的记录逐月写入新的归档段，超过保留期限的记录丢弃。
+        内存中只保留热段、当月待封存的记录与去重用的摘要。
+        新历史先写入临时位置，全部完成后再替换，中途失败不影响现有历史。
+        """
+        self._finish_seal()
+        app_dir = self._store.path.parent
+        staging_dir = app_dir / "history.import"
+        staging_log = HistoryStore(app_dir / "history.import.jsonl")
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        archive = HistoryArchive(staging_dir)
+
+        hot_days, hot_max, keep_from = self._hot_window()
+        hot_from = _days_ago(hot_days) if hot_days > 0 else ""
+        seen: set[bytes] = set()
+        hot: deque[dict] = deque()
+        month: list[dict] = []
+        added = duplicates = 0
+
+        def seal(record: dict):
+            if month and month_of(month[0]) != month_of(record):
+                archive.seal(month)
+                month.clear()
+            month.append(record)
+
+        try:
+            for record in merge_by_time(self.iter_records(), *sources):
+                # 现有记录带 id，导入的记录在读取时已去掉 id
+                imported = "id" not in record
+                digest = content_hash(record)
+                if digest in seen:
+                    duplicates += imported
+                    continue
+                if record.get("time", "") < keep_from:
+                    continue
+                seen.add(digest)
+                added += imported
+                hot.append({**record, "id": len(seen)})
+                if hot_max > 0 and len(hot) > hot_max:
+                    seal(hot.popleft())
+            while hot_from and hot and hot[0].get("time", "") < hot_from:
+                seal(hot.popleft())
+            if month:
+                archive.seal(month)
+            archive.close()
+            staging_log.rewrite(list(hot))
+            staging_log.flush()
+        except BaseException:
+            archive.close()
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            staging_log.path.unlink(missing_ok=True)
+            raise
+
+        # 替换：旧归档目录先改名备份（目录无法直接覆盖），换上新归档后再替换热段日志
+        self._archive.close()
+        archive_dir = app_dir / "history"
+        backup_dir = app_dir / "history.old"
+        shutil.rmtree(backup_dir, ignore_errors=True)
+        if archive_dir.exists():
+            os.replace(archive_dir, backup_dir)
+        if staging_dir.exists():
+            os.replace(staging_dir, archive_dir)
+        os.replace(staging_log.path, self._store.path)
+        shutil.rmtree(backup_dir, ignore_errors=True)
+        self.reload()
+
+        print(f"[MouthWrite] 已导入 {added} 条历史记录，跳过 {duplicates} 条重复记录")
+        return added, duplicates
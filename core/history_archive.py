@@ -0,0 +1,497 @@
+"""历史记录归档 —— 热段之外的旧记录按月封存为只读的压缩段文件。
+
+HistoryManager 只把最近的记录（热段，history.jsonl）常驻内存；更早的记录由
+seal() 写入 history/ 目录下的归档段，启动时只读取各段的尾部索引，不解压记录：
+
+    history/2026-09-00001234-00001890.seg      # 月份-首条记录 id-末条记录 id
+
+段文件格式（只写一次，之后只读）::
+
+    MAGIC | 块 0 | ... | 检索列 0 | ... | 过滤器 0 | ... | 索引 JSON | 索引长度(u32 LE) | MAGIC
+
+  · 每块为 _BLOCK_RECORDS 条记录的 JSONL 经 zlib 压缩，可单独解压
+  · 每块另有两份检索数据，在封存时随段写出、与段一起换入，不需要另外维护索引：
+      过滤器  块内文本（规范化后）全部单字与二元组的布隆过滤器，查询串的二元组
+              不全在其中的块直接跳过，不解压
+      检索列  块内各记录文本字段规范化后的结果（字段以 \t、记录以 \n 分隔，规范化
+              文本中不会出现这两个字符），经 zlib 压缩；通过过滤器的块只解压检索列
+              做子串查找，确有命中才解压、解析记录
+  · 索引记录段内 id / 时间范围、每块的（偏移, 长度, 条数）与两份检索数据的（偏移, 长度）
+  · 读取通过 mmap 进行，分页 / 搜索只解压用到的块
+  · 同一个月的记录再次封存时与该月已有的段合并为新段（id 范围不同，文件名也不同），
+    换入新段后再删除旧段，每月通常只有一个段
+  · 新增记录时的封存在后台线程中写出新段（prepare_seal），主线程只换入（commit_seal）
+  · 保留期限按段整体删除（段内最新记录也已过期时）
+
+归档段只读：记录封存后不再接受 update_record()。
+"""
+
+import json
+import mmap
+import operator
+import struct
+import zlib
+from collections.abc import Iterator
+from pathlib import Path
+
+from core.persistence import atomic_write
+from core.text_index import normalize_text
+
+_MAGIC = b"MWHSEG1\n"
+# 读取归档段可能遇到的错误（文件缺失 / 损坏 / 已被替换导致索引与内容不符）
+SEGMENT_ERRORS = (OSError, ValueError, KeyError, struct.error, zlib.error)
+_SUFFIX = ".seg"
+_BLOCK_RECORDS = 128
+_LEVEL = 6
+# 布隆过滤器：每个 gram 约 10 位、4 个哈希，单个 gram 的误判率约 1.2%
+_FILTER_BITS_PER_GRAM = 10
+_FILTER_HASHES = 4
+_FILTER_SEED = 0x9E3779B9
+
+
+def month_of(record: dict) -> str:
+    month = str(record.get("time", ""))[:7]
+    return month if len(month) == 7 else "0000-00"
+
+
+def text_fields(record: dict) -> list[str]:
+    """记录中参与检索的文本：原文、优化结果、译文与各语言译文。"""
+    parts = [
+        record.get("asr_text", ""),
+        record.get("optimized_text", ""),
+        record.get("translated_text", ""),
+        *(record.get("translations") or {}).values(),
+    ]
+    return [p for p in parts if p]
+
+
+# ── 检索数据 ──────────────────────────────────────────────
+def _search_text(record: dict) -> str:
+    """检索列中的一行：各文本字段规范化后以 \\t 连接。"""
+    return "\t".join(normalize_text(t) for t in text_fields(record))
+
+
+def _query_grams(needle: str) -> set[str]:
+    """规范化后的查询串必须命中的 gram：单字查询为该字，否则为全部二元组。"""
+    if len(needle) < 2:
+        return {needle} if needle else set()
+    return {needle[i:i + 2] for i in range(len(needle) - 1)}
+
+
+def _gram_hashes(gram: str) -> tuple[int, int]:
+    # 过滤器写入文件，需要跨进程稳定的哈希，不能用内置 hash()
+    data = gram.encode("utf-8")
+    return zlib.crc32(data), zlib.crc32(data, _FILTER_SEED) | 1
+
+
+def _build_filter(lines: list[str], hashes: dict[str, tuple[int, int]]) -> bytes:
+    """hashes 为同一段内各块共用的 gram → 哈希缓存（常用字词在各块中反复出现）。"""
+    grams: set[str] = set()
+    for line in lines:
+        for text in line.split("\t"):
+            grams.update(text)
+            grams.update(map(operator.add, text, text[1:]))
+    size = max(len(grams) * _FILTER_BITS_PER_GRAM // 8, 8)
+    bits = bytearray(size)
+    m = size * 8
+    for gram in grams:
+        h = hashes.get(gram)
+        if h is None:
+            h = hashes[gram] = _gram_hashes(gram)
+        h1, h2 = h
+        for k in range(_FILTER_HASHES):
+            p = (h1 + k * h2) % m
+            bits[p >> 3] |= 1 << (p & 7)
+    return bytes(bits)
+
+
+class ArchiveSegment:
+    """一个只读归档段：打开时只解析尾部索引，记录按块惰性解压。
+
+    keep_open 为 True 时保持文件映射，段文件之后被合并替换、删除也仍可读完
+    （交给后台线程的快照使用，用完后 close()）。
+    """
+
+    def __init__(self, path: Path, keep_open: bool = False):
+        self.path = Path(path)
+        self._file = None
+        self._mm: mmap.mmap | None = None
+        # 最近解压的一块：(块序号, 记录)，顺序翻页时避免重复解压
+        self._cached: tuple[int, list[dict]] | None = None
+        meta = self._read_footer()
+        self.month: str = meta["month"]
+        self.first_id: int = meta["first_id"]
+        self.last_id: int = meta["last_id"]
+        self.first_time: str = meta["first_time"]
+        self.last_time: str = meta["last_time"]
+        self.count: int = meta["count"]
+        # [(偏移, 长度, 条数), ...]
+        self._blocks: list[tuple[int, int, int]] = [tuple(b) for b in meta["blocks"]]
+        # 每块检索列 / 过滤器的 (偏移, 长度)；没有检索数据的段搜索时逐块解析记录
+        self._columns: list[tuple[int, int]] | None = None
+        self._filters: list[tuple[int, int]] | None = None
+        self._filter_hashes: int = meta.get("filter_hashes", _FILTER_HASHES)
+        if "columns" in meta and "filters" in meta:
+            self._columns = [tuple(c) for c in meta["columns"]]
+            self._filters = [tuple(f) for f in meta["filters"]]
+        # 启动时只需要索引，读取记录时再重新映射
+        if not keep_open:
+            self.close()
+
+    # ── 读取 ──────────────────────────────────────────────
+    def _buffer(self) -> mmap.mmap:
+        if self._mm is None:
+            self._file = open(self.path, "rb")
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mm
+
+    def _read_footer(self) -> dict:
+        mm = self._buffer()
+        tail = len(_MAGIC) + 4
+        if (
+            len(mm) < len(_MAGIC) + tail
+            or mm[:len(_MAGIC)] != _MAGIC
+            or mm[-len(_MAGIC):] != _MAGIC
+        ):
+            self.close()
+            raise ValueError(f"不是有效的归档段: {self.path.name}")
+        (size,) = struct.unpack("<I", mm[-tail:-len(_MAGIC)])
+        return json.loads(mm[-tail - size:-tail].decode("utf-8"))
+
+    def read_block(self, i: int) -> list[dict]:
+        if self._cached is not None and self._cached[0] == i:
+            return self._cached[1]
+        records = [json.loads(line) for line in self._block_lines(i)]
+        self._cached = (i, records)
+        return records
+
+    def _block_lines(self, i: int) -> list[bytes]:
+        # 按字节中的 \n 切分：JSON 字符串中的换行已转义，而 str.splitlines()
+        # 还会在 U+2028 等字符处切开
+        offset, length, _ = self._blocks[i]
+        data = zlib.decompress(self._buffer()[offset:offset + length])
+        return [line for line in data.split(b"\n") if line]
+
+    def records(self) -> list[dict]:
+        """段内全部记录（最旧在前）。"""
+        return list(self.iter_records())
+
+    def iter_records(self) -> Iterator[dict]:
+        """从最旧记录起逐块返回，同一时间只解压一块。"""
+        for i in range(len(self._blocks)):
+            yield from self.read_block(i)
+
+    def iter_newest_first(self, skip: int = 0) -> Iterator[dict]:
+        """从最新记录起逐条返回；skip 条以内的整块直接跳过，不解压。"""
+        for i in range(len(self._blocks) - 1, -1, -1):
+            n = self._blocks[i][2]
+            if skip >= n:
+                skip -= n
+                continue
+            block = self.read_block(i)
+            yield from reversed(block[:len(block) - skip])
+            skip = 0
+
+    def search(self, needle: str, hashes: list[tuple[int, int]]) -> Iterator[dict]:
+        """从最新记录起返回任一文本包含 needle（已规范化）的记录；
+        hashes 为 _query_grams(needle) 各 gram 的 _gram_hashes()。"""
+        if self._columns is None:
+            for record in self.iter_newest_first():
+                if needle in _search_text(record):
+                    yield record
+            return
+        pattern = needle.encode("utf-8")
+        for i in range(len(self._blocks) - 1, -1, -1):
+            if not self._may_contain(i, hashes):
+                continue
+            offset, length = self._columns[i]
+            # UTF-8 自同步，直接在字节串上查找，命中的块才解码
+            column = zlib.decompress(self._buffer()[offset:offset + length])
+            if pattern not in column:
+                continue
+            lines = column.split(b"\n")
+            # 只解析命中的记录
+            raw = self._block_lines(i)
+            for j in range(len(lines) - 1, -1, -1):
+                if pattern in lines[j]:
+                    yield json.loads(raw[j])
+
+    def _may_contain(self, i: int, hashes: list[tuple[int, int]]) -> bool:
+        offset, length = self._filters[i]
+        mm = self._buffer()
+        m = length * 8
+        for h1, h2 in hashes:
+            for k in range(self._filter_hashes):
+                p = (h1 + k * h2) % m
+                if not mm[offset + (p >> 3)] >> (p & 7) & 1:
+                    return False
+        return True
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._cached = None
+
+    # ── 写入 ──────────────────────────────────────────────
+    @staticmethod
+    def write(directory: Path, records: list[dict]) -> Path:
+        """把同一个月的记录（最旧在前）写成一个新段，返回段文件路径。"""
+        month = month_of(records[0])
+        parts = [_MAGIC]
+        offset = len(_MAGIC)
+        blocks = []
+        for start in range(0, len(records), _BLOCK_RECORDS):
+            chunk = records[start:start + _BLOCK_RECORDS]
+            raw = "".join(
+                json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n"
+                for r in chunk
+            ).encode("utf-8")
+            data = zlib.compress(raw, _LEVEL)
+            blocks.append((offset, len(data), len(chunk)))
+            parts.append(data)
+            offset += len(data)
+        lines = [_search_text(r) for r in records]
+        columns = []
+        for start in range(0, len(records), _BLOCK_RECORDS):
+            text = "\n".join(lines[start:start + _BLOCK_RECORDS])
+            data = zlib.compress(text.encode("utf-8"), _LEVEL)
+            columns.append((offset, len(data)))
+            parts.append(data)
+            offset += len(data)
+        filters = []
+        hashes: dict[str, tuple[int, int]] = {}
+        for start in range(0, len(records), _BLOCK_RECORDS):
+            data = _build_filter(lines[start:start + _BLOCK_RECORDS], hashes)
+            filters.append((offset, len(data)))
+            parts.append(data)
+            offset += len(data)
+        footer = json.dumps({
+            "month": month,
+            "first_id": records[0]["id"],
+            "last_id": records[-1]["id"],
+            "first_time": records[0].get("time", ""),
+            "last_time": records[-1].get("time", ""),
+            "count": len(records),
+            "blocks": blocks,
+            "columns": columns,
+            "filters": filters,
+            "filter_hashes": _FILTER_HASHES,
+        }).encode("utf-8")
+        parts += [footer, struct.pack("<I", len(footer)), _MAGIC]
+        path = directory / f"{month}-{records[0]['id']:08d}-{records[-1]['id']:08d}{_SUFFIX}"
+        atomic_write(path, b"".join(parts))
+        return path
+
+
+class SealPlan:
+    """prepare_seal() 已写出、尚未换入的新段。"""
+
+    __slots__ = ("paths", "replaces")
+
+    def __init__(self):
+        self.paths: list[Path] = []
+        # 被合并进新段、换入后删除的旧段
+        self.replaces: Path | None = None
+
+
+class HistoryArchive:
+    """归档目录：按 id 顺序管理全部归档段。"""
+
+    def __init__(self, directory: Path):
+        self._dir = Path(directory)
+        # 按首条 id 升序（最旧在前）
+        self._segments: list[ArchiveSegment] = []
+        self.reload()
+
+    def reload(self):
+        """重新扫描归档目录（只读取各段索引）。"""
+        self.close()
+        self._segments = []
+        if not self._dir.is_dir():
+            return
+        for path in self._dir.glob(f"*{_SUFFIX}"):
+            try:
+                self._segments.append(ArchiveSegment(path))
+            except SEGMENT_ERRORS as e:
+                print(f"[MouthWrite] 跳过损坏的归档段 {path.name}: {e}")
+        # 合并后、删除旧段前退出会留下被新段完全包含的旧段：保留范围最大的一个
+        self._segments.sort(key=lambda s: (s.first_id, -s.last_id))
+        kept: list[ArchiveSegment] = []
+        for segment in self._segments:
+            if kept and segment.last_id <= kept[-1].last_id:
+                segment.close()
+                try:
+                    segment.path.unlink()
+                except OSError:
+                    pass
+                continue
+            kept.append(segment)
+        self._segments = kept
+
+    @property
+    def count(self) -> int:
+        return sum(s.count for s in self._segments)
+
+    @property
+    def last_id(self) -> int:
+        return self._segments[-1].last_id if self._segments else 0
+
+    @property
+    def segments(self) -> list[ArchiveSegment]:
+        return list(self._segments)
+
+    def snapshot(self) -> list[ArchiveSegment]:
+        """当前各段的独立副本（保持打开，最旧在前），可交给后台线程读取；
+        之后的封存、合并不影响这些副本。用完后逐段 close()。"""
+        copies = []
+        for segment in self._segments:
+            try:
+                copies.append(ArchiveSegment(segment.path, keep_open=True))
+            except SEGMENT_ERRORS as e:
+                print(f"[MouthWrite] 读取归档段 {segment.path.name} 失败: {e}")
+        return copies
+
+    # ── 读取 ──────────────────────────────────────────────
+    def iter_newest_first(self, skip: int = 0) -> Iterator[dict]:
+        for segment in reversed(self._segments):
+            if skip >= segment.count:
+                skip -= segment.count
+                continue
+            yield from segment.iter_newest_first(skip)
+            skip = 0
+
+    def iter_oldest_first(self) -> Iterator[dict]:
+        for segment in list(self._segments):
+            yield from segment.iter_records()
+
+    def search(self, needle: str) -> Iterator[dict]:
+        """从最新记录起返回任一文本包含 needle（已规范化）的记录。"""
+        hashes = [_gram_hashes(g) for g in _query_grams(needle)]
+        for segment in reversed(self._segments):
+            yield from segment.search(needle, hashes)
+
+    def get_page(self, offset: int, limit: int) -> list[dict]:
+        """按时间倒序分页（offset 从归档中最新的一条算起）。"""
+        if limit <= 0:
+            return []
+        page = []
+        for record in self.iter_newest_first(max(offset, 0)):
+            page.append(record)
+            if len(page) >= limit:
+                break
+        return page
+
+    # ── 封存 / 保留 ───────────────────────────────────────
+    def seal(self, records: list[dict]):
+        """同步封存（启动 / 导入时使用）。新增记录时由 HistoryManager 在后台线程中
+        调用 prepare_seal()，完成后回到主线程 commit_seal()。"""
+        plan = self.prepare_seal(records)
+        if plan is not None:
+            self.commit_seal(plan)
+
+    def prepare_seal(self, records: list[dict]) -> "SealPlan | None":
+        """写出封存记录（最旧在前，id 均大于 last_id）所需的新段文件，不改动当前段列表。
+
+        按月分段；与最后一段同月时合并为一个新段（文件名含 id 范围，与旧段不同名，
+        写入时不会碰到仍被映射的旧段）。可在后台线程中调用：只读取段文件，不使用
+        主线程持有的段对象。失败时删除已写出的文件并抛出 SEGMENT_ERRORS。
+        """
+        previous = self._segments[-1] if self._segments else None
+        plan = SealPlan()
+        records = [r for r in records if r["id"] > self.last_id]
+        if not records:
+            return None
+        try:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            start = 0
+            while start < len(records):
+                month = month_of(records[start])
+                end = start
+                while end < len(records) and month_of(records[end]) == month:
+                    end += 1
+                chunk = records[start:end]
+                if start == 0 and previous is not None and previous.month == month:
+                    chunk = self._merge_previous(previous, chunk, plan)
+                if chunk:
+                    plan.paths.append(ArchiveSegment.write(self._dir, chunk))
+                start = end
+        except BaseException:
+            self.discard_seal(plan)
+            raise
+        return plan
+
+    def _merge_previous(
+        self, previous: "ArchiveSegment", records: list[dict], plan: "SealPlan"
+    ) -> list[dict]:
+        # 按当前文件重新读取旧段（独立的映射，不与主线程共用缓存；
+        # 文件也可能已在别处被替换，缓存的块偏移不再可靠）
+        try:
+            fresh = ArchiveSegment(previous.path)
+            try:
+                merged = fresh.records()
+            finally:
+                fresh.close()
+        except SEGMENT_ERRORS as e:
+            # 旧段无法读取：新记录单独成段，不覆盖旧段
+            print(f"[MouthWrite] 读取归档段 {previous.path.name} 失败，新记录单独封存: {e}")
+            return records
+        records = [r for r in records if r["id"] > fresh.last_id]
+        if not records:
+            return []
+        plan.replaces = previous.path
+        return merged + records
+
+    def commit_seal(self, plan: "SealPlan"):
+        """（主线程）换入 prepare_seal() 写好的新段，删除被合并的旧段。"""
+        if plan.replaces is not None:
+            for i, segment in enumerate(self._segments):
+                if segment.path == plan.replaces:
+                    segment.close()
+                    del self._segments[i]
+                    break
+            try:
+                plan.replaces.unlink(missing_ok=True)
+            except OSError as e:
+                # 留下的旧段被新段完全包含，下次 reload() 时清理
+                print(f"[MouthWrite] 删除已合并的归档段 {plan.replaces.name} 失败: {e}")
+        self._segments += [ArchiveSegment(path) for path in plan.paths]
+        self._segments.sort(key=lambda s: s.first_id)
+
+    def discard_seal(self, plan: "SealPlan"):
+        """放弃 prepare_seal() 写好但不再需要的新段。"""
+        for path in plan.paths:
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                pass
+        plan.paths = []
+
+    def drop_before(self, cutoff_time: str) -> int:
+        """删除段内最新记录早于 cutoff_time 的整段，返回删除的记录数。"""
+        dropped = 0
+        while self._segments and self._segments[0].last_time < cutoff_time:
+            segment = self._segments.pop(0)
+            segment.close()
+            try:
+                segment.path.unlink()
+            except OSError as e:
+                print(f"[MouthWrite] 删除过期归档段 {segment.path.name} 失败: {e}")
+            dropped += segment.count
+        return dropped
+
+    def clear(self):
+        for segment in self._segments:
+            segment.close()
+            try:
+                segment.path.unlink()
+            except OSError:
+                pass
+        self._segments = []
+
+    def close(self):
+        for segment in self._segments:
+            segment.close()
@@ -0,0 +1,151 @@
+"""历史记录导入 / 导出 —— 在多台机器之间迁移历史，或导出到分析工具。
+
+  · 格式按扩展名区分：
+      .jsonl  每行一条记录，字段与 history.jsonl 中的记录相同
+      .csv    固定列（CSV_FIELDS）；嵌套的 translations / usage 存为 JSON 字符串，
+              以 UTF-8 BOM 写出，Excel 可直接打开
+  · 读写都是流式的：逐条读取 / 写出，内存占用与记录条数无关
+  · content_hash() 只看记录内容（时间与各段文本），不看 id 与用量：
+    同一条记录在不同机器上编号不同，也能识别为重复
+  · merge_by_time() 把若干各自按时间先后排列的来源归并为一个按时间排列的流，
+    由 HistoryManager.import_records() 与本机历史合并
+
+导出的文件都按时间先后排列，可以直接再导入；手工整理的文件需自行按时间排序，
+否则乱序的记录仍会导入，但不会被放到正确的时间位置。
+"""
+
+import csv
+import hashlib
+import heapq
+import json
+import os
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+FORMATS = ("jsonl", "csv")
+
+CSV_FIELDS = [
+    "id",
+    "time",
+    "asr_text",
+    "optimized_text",
+    "translated_text",
+    "target_language",
+    "translations",
+    "usage",
+    "audio",
+]
+# CSV 中以 JSON 字符串保存的列
+_JSON_FIELDS = ("translations", "usage")
+# 参与内容哈希的字段
+_CONTENT_FIELDS = (
+    "time",
+    "asr_text",
+    "optimized_text",
+    "translated_text",
+    "target_language",
+    "translations",
+)
+
+
+def format_of(path: Path) -> str:
+    """由扩展名判断格式；不支持的扩展名抛出 ValueError。"""
+    fmt = Path(path).suffix.lower().lstrip(".")
+    if fmt not in FORMATS:
+        raise ValueError(f"不支持的文件格式: {Path(path).name}（仅支持 .jsonl / .csv）")
+    return fmt
+
+
+def content_hash(record: dict) -> bytes:
+    """记录内容的 16 字节摘要，用于导入时去重。"""
+    content = {k: record[k] for k in _CONTENT_FIELDS if record.get(k)}
+    data = json.dumps(content, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).digest()
+
+
+def _normalize(record) -> dict | None:
+    """整理导入的记录：丢弃 id（导入时重新编号），补齐文本字段；无内容的记录返回 None。"""
+    if not isinstance(record, dict):
+        return None
+    record = {k: v for k, v in record.items() if k != "id"}
+    record["time"] = str(record.get("time") or "")
+    for key in ("asr_text", "optimized_text"):
+        record[key] = str(record.get(key) or "")
+    if not (record["asr_text"] or record["optimized_text"]):
+        return None
+    return record
+
+
+# ── 读取 ──────────────────────────────────────────────────
+def read_records(path: Path) -> Iterator[dict]:
+    """逐条读取导出文件中的记录（保持文件中的顺序）。无法解析的行 / 空记录跳过。"""
+    path = Path(path)
+    reader = _read_csv if format_of(path) == "csv" else _read_jsonl
+    for record in reader(path):
+        record = _normalize(record)
+        if record is not None:
+            yield record
+
+
+def _read_jsonl(path: Path) -> Iterator[dict]:
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def _read_csv(path: Path) -> Iterator[dict]:
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            record = {k: v for k, v in row.items() if k and v}
+            for key in _JSON_FIELDS:
+                if key in record:
+                    try:
+                        record[key] = json.loads(record[key])
+                    except json.JSONDecodeError:
+                        del record[key]
+            yield record
+
+
+def merge_by_time(*sources: Iterable[dict]) -> Iterator[dict]:
+    """把各自按时间先后排列的来源归并为一个按时间排列的流（时间相同时先来源靠前者）。"""
+    return heapq.merge(*sources, key=lambda r: r.get("time", ""))
+
+
+# ── 写出 ──────────────────────────────────────────────────
+def write_records(records: Iterable[dict], path: Path) -> int:
+    """把记录逐条写入导出文件，返回写出的条数。
+
+    先写入同目录的临时文件，完成后原子替换，中途失败不会留下半个文件。
+    """
+    path = Path(path)
+    fmt = format_of(path)
+    tmp = path.with_name(path.name + ".tmp")
+    count = 0
+    try:
+        if fmt == "csv":
+            with open(tmp, "w", encoding="utf-8-sig", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+                writer.writeheader()
+                for record in records:
+                    row = dict(record)
+                    for key in _JSON_FIELDS:
+                        if key in row:
+                            row[key] = json.dumps(row[key], ensure_ascii=False)
+                    writer.writerow(row)
+                    count += 1
+        else:
+            with open(tmp, "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    count += 1
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return count
@@ -0,0 +1,122 @@
+"""历史记录存储引擎 —— 追加写入的 JSONL 日志，替代每次整体重写的 history.json。
+
+文件中每行是一条操作（按发生顺序）::
+
+    {"op":"add","record":{...}}                      # 新增记录
+    {"op":"update","id":42,"fields":{...}}           # 就地更新字段（如补充译文 / 用量）
+
+  · 新增 / 更新只追加一行，耗时与已有记录数无关
+  · 加载时按顺序重放日志；崩溃导致的半行在重放时跳过
+  · 更新行与被淘汰的记录会让日志变长，超过存活记录数的若干倍时由调用方触发
+    rewrite() 压缩：写入临时文件后原子替换，中途崩溃不会损坏原日志
+  · 实际写入由后台写入线程完成（core/persistence.py），调用方不等待磁盘
+  · 首次启动时由 HistoryManager 从旧版 history.json 一次性迁移
+
+存储只负责持久化，记录的 id 分配、条数上限与检索由 HistoryManager 维护。
+"""
+
+import json
+from pathlib import Path
+
+from core.persistence import background_writer
+
+
+def _dumps(obj: dict) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+class HistoryStore:
+    """JSONL 追加日志。记录按写入顺序（最旧在前）返回。"""
+
+    # 日志行数超过 存活记录数 × _COMPACT_RATIO + _COMPACT_SLACK 时建议压缩
+    _COMPACT_RATIO = 3
+    _COMPACT_SLACK = 200
+
+    def __init__(self, path: Path):
+        self._path = Path(path)
+        self._lines = 0
+        # 上次崩溃留下了不以换行结尾的半行：下一次追加前先补换行，避免与其粘连
+        self._torn_tail = False
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def lines(self) -> int:
+        """自上次加载 / 压缩以来日志中的行数（含更新行）。"""
+        return self._lines
+
+    def exists(self) -> bool:
+        self.flush()
+        return self._path.exists()
+
+    def flush(self):
+        """等待本日志尚未落盘的写入完成。"""
+        background_writer().flush()
+
+    # ── 读取 ──────────────────────────────────────────────
+    def load(self) -> list[dict]:
+        """重放日志，返回存活记录（最旧在前）。"""
+        self.flush()
+        records: dict[int, dict] = {}
+        lines = 0
+        line = "\n"
+        try:
+            with open(self._path, "r", encoding="utf-8") as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 写入中途崩溃留下的半行
+                        continue
+                    self._apply(records, entry)
+        except OSError:
+            pass
+        self._lines = lines
+        self._torn_tail = not line.endswith("\n")
+        return list(records.values())
+
+    @staticmethod
+    def _apply(records: dict[int, dict], entry: dict):
+        op = entry.get("op")
+        if op == "add":
+            record = entry.get("record") or {}
+            if isinstance(record.get("id"), int):
+                records[record["id"]] = record
+        elif op == "update":
+            record = records.get(entry.get("id"))
+            if record is not None:
+                record.update(entry.get("fields") or {})
+
+    # ── 写入 ──────────────────────────────────────────────
+    def _append(self, entry: dict):
+        # 入队时即序列化：之后对记录对象的修改不会影响这一行
+        line = _dumps(entry) + "\n"
+        if self._torn_tail:
+            line = "\n" + line
+            self._torn_tail = False
+        background_writer().append(self._path, line)
+        self._lines += 1
+
+    def append(self, record: dict):
+        self._append({"op": "add", "record": record})
+
+    def update(self, record_id: int, fields: dict):
+        self._append({"op": "update", "id": record_id, "fields": fields})
+
+    def clear(self):
+        self.rewrite([])
+
+    def rewrite(self, records: list[dict]):
+        """以给定记录（最旧在前）重写整个日志：后台先写临时文件，再原子替换。"""
+        background_writer().replace(
+            self._path,
+            "".join(_dumps({"op": "add", "record": r}) + "\n" for r in records),
+        )
+        self._lines = len(records)
+        self._torn_tail = False
+
+    def needs_compaction(self, live: int) -> bool:
+        return self._lines > live * self._COMPACT_RATIO + self._COMPACT_SLACK
@@ -0,0 +1,44 @@
+"""共享 HTTP 连接池 —— 所有 ASR / LLM 请求复用同一个 httpx.Client。
+
+每次请求新建 Client 都要重新建立 TCP / TLS 连接；共享 Client 后，
+同一主机的后续请求与并发请求（多语言翻译、分句翻译）可以复用 keep-alive 连接。
+httpx.Client 本身是线程安全的，可在多个 QThread 中同时使用。
+"""
+
+import threading
+
+import httpx
+
+_lock = threading.Lock()
+_client: httpx.Client | None = None
+
+# 每个主机最多保持的连接数；需覆盖多语言翻译 + 分句翻译的并发度
+_MAX_CONNECTIONS = 16
+_MAX_KEEPALIVE = 8
+
+
+def shared_client() -> httpx.Client:
+    """返回进程内共享的 httpx.Client（首次调用时创建）。
+
+    超时由各请求自行通过 ``timeout=`` 指定。
+    """
+    global _client
+    with _lock:
+        if _client is None or _client.is_closed:
+            _client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=_MAX_CONNECTIONS,
+                    max_keepalive_connections=_MAX_KEEPALIVE,
+                    keepalive_expiry=60.0,
+                ),
+            )
+        return _client
+
+
+def close_shared_client():
+    """关闭共享连接池（应用退出时调用）。"""
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
@@ -0,0 +1,109 @@
+"""文本注入 —— 流式输入模式下把已完成的句子逐句写入目标窗口。
+
+TextInjector 是注入接口：
+  · WindowsTextInjector：通过 SendInput 的 KEYEVENTF_UNICODE 逐字符发送，
+    不占用剪贴板，支持任意 Unicode 文本
+  · RecordingInjector：只记录注入内容，不产生任何按键，供调试 / 测试使用
+
+注入前会确认前台窗口仍是按热键时的目标窗口；用户切换了窗口时注入失败，
+调用方应停止流式输入并回退到“复制 + 点击粘贴”。
+"""
+
+import ctypes
+from abc import ABC, abstractmethod
+from ctypes import wintypes
+
+
+class TextInjector(ABC):
+    """注入接口：inject() 成功写入返回 True，目标窗口已失去焦点等情况返回 False。"""
+
+    @abstractmethod
+    def inject(self, text: str) -> bool:
+        ...
+
+
+class RecordingInjector(TextInjector):
+    """记录注入内容的桩实现。"""
+
+    def __init__(self):
+        self.injected: list[str] = []
+
+    def inject(self, text: str) -> bool:
+        self.injected.append(text)
+        return True
+
+    @property
+    def text(self) -> str:
+        return "".join(self.injected)
+
+
+# ── Windows SendInput ───────────────────────────────────────
+_INPUT_KEYBOARD = 1
+_KEYEVENTF_KEYUP = 0x0002
+_KEYEVENTF_UNICODE = 0x0004
+_VK_RETURN = 0x0D
+
+
+class _KEYBDINPUT(ctypes.Structure):
+    _fields_ = [
+        ("wVk", wintypes.WORD),
+        ("wScan", wintypes.WORD),
+        ("dwFlags", wintypes.DWORD),
+        ("time", wintypes.DWORD),
+        ("dwExtraInfo", ctypes.POINTER(ctypes.c_ulong)),
+    ]
+
+
+class _MOUSEINPUT(ctypes.Structure):
+    # 仅用于让 INPUT 联合体的大小与系统定义一致
+    _fields_ = [
+        ("dx", wintypes.LONG),
+        ("dy", wintypes.LONG),
+        ("mouseData", wintypes.DWORD),
+        ("dwFlags", wintypes.DWORD),
+        ("time", wintypes.DWORD),
+        ("dwExtraInfo", ctypes.POINTER(ctypes.c_ulong)),
+    ]
+
+
+class _INPUTUNION(ctypes.Union):
+    _fields_ = [("ki", _KEYBDINPUT), ("mi", _MOUSEINPUT)]
+
+
+class _INPUT(ctypes.Structure):
+    _fields_ = [("type", wintypes.DWORD), ("u", _INPUTUNION)]
+
+
+def _key_inputs(vk: int, scan: int, flags: int) -> list[_INPUT]:
+    down = _INPUT(type=_INPUT_KEYBOARD)
+    down.u.ki = _KEYBDINPUT(vk, scan, flags, 0, None)
+    up = _INPUT(type=_INPUT_KEYBOARD)
+    up.u.ki = _KEYBDINPUT(vk, scan, flags | _KEYEVENTF_KEYUP, 0, None)
+    return [down, up]
+
+
+class WindowsTextInjector(TextInjector):
+    """通过 SendInput 发送 Unicode 字符；换行发送回车键。"""
+
+    def __init__(self, target_hwnd=None):
+        self._user32 = ctypes.windll.user32
+        self._target_hwnd = target_hwnd
+
+    def inject(self, text: str) -> bool:
+        if not text:
+            return True
+        if self._target_hwnd and self._user32.GetForegroundWindow() != self._target_hwnd:
+            return False
+        inputs: list[_INPUT] = []
+        for ch in text.replace("\r\n", "\n"):
+            if ch == "\n":
+                inputs += _key_inputs(_VK_RETURN, 0, 0)
+                continue
+            # 超出 BMP 的字符按 UTF-16 代理对逐个发送
+            data = ch.encode("utf-16-le")
+            for i in range(0, len(data), 2):
+                unit = int.from_bytes(data[i:i + 2], "little")
+                inputs += _key_inputs(0, unit, _KEYEVENTF_UNICODE)
+        array = (_INPUT * len(inputs))(*inputs)
+        sent = self._user32.SendInput(len(inputs), array, ctypes.sizeof(_INPUT))
+        return sent == len(inputs)
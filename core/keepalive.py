@@ -0,0 +1,198 @@
+"""本地模型保活 —— 空闲时定期向本地 vLLM 端点发送极小请求，避免首次口述变慢。
+
+长时间空闲后，本地（如 WSL 中的）vLLM 会出现 CUDA graph / 显存页换出、
+连接被回收等现象，早上第一次口述明显偏慢。开启保活后：
+
+  · 只对本地端点（localhost / 回环 / 内网地址）发请求，不会消耗云端 API 额度
+  · 距上一次真实请求或保活请求超过 interval_s 才发送，正常使用时不额外请求
+  · LLM 端点发送 max_tokens=1 的文本请求；ASR 端点发送 0.2 秒静音音频
+
+ColdStartStats 按“距上次请求的空闲时长”把首 token 延迟分为冷启动 / 热启动两组，
+用来确认保活是否有效；退出时把两组的中位延迟打印到日志。
+"""
+
+import base64
+import io
+import ipaddress
+import threading
+import time
+import wave
+from collections import deque
+from urllib.parse import urlparse
+
+import httpx
+from PySide6.QtCore import QObject, QTimer
+
+from core.http_pool import shared_client
+
+
+def is_local_url(url: str) -> bool:
+    """判断端点是否为本机 / 内网地址（localhost、回环、私有网段、.local）。"""
+    host = (urlparse(url).hostname or "").lower()
+    if not host:
+        return False
+    if host == "localhost" or host.endswith(".local"):
+        return True
+    try:
+        ip = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return ip.is_loopback or ip.is_private or ip.is_link_local
+
+
+def _silent_wav_base64(seconds: float = 0.2, sample_rate: int = 16000) -> str:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(b"\x00\x00" * int(seconds * sample_rate))
+    return base64.b64encode(buf.getvalue()).decode("utf-8")
+
+
+class ColdStartStats:
+    """首 token 延迟按冷 / 热启动分组统计（各保留最近若干次）。"""
+
+    _WINDOW = 50
+
+    def __init__(self):
+        self._samples: dict[tuple[str, bool], deque[float]] = {}
+
+    def record(self, kind: str, latency_ms: float, cold: bool):
+        self._samples.setdefault(
+            (kind, cold), deque(maxlen=self._WINDOW)
+        ).append(latency_ms)
+
+    def summary(self) -> dict[str, dict]:
+        """{"asr": {"cold_p50_ms": ..., "warm_p50_ms": ..., ...}, "llm": {...}}"""
+        result: dict[str, dict] = {}
+        for (kind, cold), samples in self._samples.items():
+            ordered = sorted(samples)
+            label = "cold" if cold else "warm"
+            entry = result.setdefault(kind, {})
+            entry[f"{label}_count"] = len(ordered)
+            entry[f"{label}_p50_ms"] = round(ordered[len(ordered) // 2], 1)
+        return result
+
+
+class KeepAlivePinger(QObject):
+    """托盘常驻期间按计划为本地端点保活，并记录冷 / 热启动首 token 延迟。"""
+
+    # 定时器检查间隔；实际是否发请求取决于空闲时长
+    _CHECK_INTERVAL_MS = 30_000
+
+    def __init__(self, config, parent=None):
+        super().__init__(parent)
+        self._config = config
+        self._last_activity = time.monotonic()
+        self._pinging = False
+        self.stats = ColdStartStats()
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self._CHECK_INTERVAL_MS)
+        self._timer.timeout.connect(self._on_tick)
+
+    def start(self):
+        self._timer.start()
+
+    def stop(self):
+        """停止保活（程序退出时调用），并打印本次运行的冷 / 热启动延迟摘要。"""
+        self._timer.stop()
+        for kind, entry in self.stats.summary().items():
+            parts = [
+                f"{name} {entry[f'{label}_p50_ms']:.0f} ms（{entry[f'{label}_count']} 次）"
+                for label, name in (("cold", "冷启动"), ("warm", "热启动"))
+                if f"{label}_count" in entry
+            ]
+            print(f"[MouthWrite] {kind} 首 token 中位延迟：{'，'.join(parts)}")
+
+    # ── 活动 / 延迟记录 ───────────────────────────────────
+    def mark_activity(self) -> float:
+        """记录一次真实请求，返回距上一次请求（含保活请求）的空闲秒数。"""
+        now = time.monotonic()
+        idle = now - self._last_activity
+        self._last_activity = now
+        return idle
+
+    def endpoints_changed(self):
+        """端点或保活配置变化：下一次检查时即为（新的）本地端点保活，不必等满 interval_s。"""
+        self._last_activity = time.monotonic() - self._config.get("keepalive.interval_s", 240)
+
+    def record_first_token(self, kind: str, latency_ms: float, idle_s: float):
+        """记录一次真实请求的首 token 延迟；空闲超过 cold_after_s 视为冷启动。"""
+        cold = idle_s >= self._config.get("keepalive.cold_after_s", 600)
+        self.stats.record(kind, latency_ms, cold)
+        print(
+            f"[MouthWrite] {kind} 首 token {latency_ms:.0f} ms"
+            f"（{'冷' if cold else '热'}启动，空闲 {idle_s:.0f} s）"
+        )
+
+    # ── 保活 ──────────────────────────────────────────────
+    def _targets(self) -> list[tuple[str, dict]]:
+        """需要保活的本地端点：[(kind, endpoint), ...]。"""
+        targets = []
+        asr_url = self._config.get("asr.base_url", "")
+        if is_local_url(asr_url):
+            targets.append(("asr", {
+                "base_url": asr_url,
+                "model": self._config.get("asr.model", ""),
+                "api_key": self._config.get("asr.api_key", ""),
+            }))
+        llm_endpoints = [{
+            "base_url": self._config.get("llm.base_url", ""),
+            "model": self._config.get("llm.model", ""),
+            "api_key": self._config.get("llm.api_key", ""),
+        }, *(self._config.get("llm.fallback_endpoints", []) or [])]
+        for ep in llm_endpoints:
+            if is_local_url(ep.get("base_url", "")):
+                targets.append(("llm", ep))
+        return targets
+
+    def _on_tick(self):
+        if not self._config.get("keepalive.enabled", False) or self._pinging:
+            return
+        interval = self._config.get("keepalive.interval_s", 240)
+        if time.monotonic() - self._last_activity < interval:
+            return
+        targets = self._targets()
+        if not targets:
+            return
+        self._last_activity = time.monotonic()
+        self._pinging = True
+        threading.Thread(target=self._ping_all, args=(targets,), daemon=True).start()
+
+    def _ping_all(self, targets: list[tuple[str, dict]]):
+        try:
+            for kind, ep in targets:
+                self._ping(kind, ep)
+        finally:
+            self._pinging = False
+
+    @staticmethod
+    def _ping(kind: str, ep: dict):
+        if kind == "asr":
+            content = [{
+                "type": "audio_url",
+                "audio_url": {"url": f"data:audio/wav;base64,{_silent_wav_base64()}"},
+            }]
+        else:
+            content = "hi"
+        payload = {
+            "model": ep.get("model", ""),
+            "max_tokens": 1,
+            "messages": [{"role": "user", "content": content}],
+        }
+        headers = {"Authorization": f"Bearer {ep.get('api_key', '')}"}
+        url = f"{ep.get('base_url', '').rstrip('/')}/chat/completions"
+        start = time.monotonic()
+        try:
+            resp = shared_client().post(
+                url, json=payload, headers=headers, timeout=httpx.Timeout(30.0)
+            )
+            resp.raise_for_status()
+            print(
+                f"[MouthWrite] 保活 {kind} {url} "
+                f"{(time.monotonic() - start) * 1000:.0f} ms"
+            )
+        except Exception as e:
+            print(f"[MouthWrite] 保活 {kind} {url} 失败: {e}")
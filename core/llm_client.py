@@ -5,6 +5,8 @@ import json
 import httpx
 from PySide6.QtCore import QThread, Signal
 
+from core.http_pool import shared_client
+
 # ── Prompt 模板 ──────────────────────────────────────────────────────
 _OPTIMIZE_RULES = """\
 你是一个语音转录文本的清洁工具。你的唯一任务是把口语化的语音转录文字润色为清晰的书面文字。
@@ -65,33 +67,77 @@ TRANSLATE_PROMPT = """\
 
 {text}"""
 
+TRANSLATE_PROMPT_WITH_REFERENCE = """\
+请将以下文本翻译成{target_language}，直接输出翻译结果，不需要任何解释。
+
+下面是一条相近原文的历史译文，仅供参考术语和表达风格。两者内容不完全相同，\
+请以待翻译文本为准，不要照抄参考译文：
+参考原文：{reference_source}
+参考译文：{reference_translation}
+
+待翻译文本：
+{text}"""
+
+
+# “优化 + 翻译”合并模式的输出分隔行
+OPTIMIZE_TRANSLATE_DELIMITER = "<<<TRANSLATION>>>"
+
+_COMBINED_INSTRUCTION = """\
+请按以下格式输出，不需要任何其他解释、标记或前缀：
+第一部分直接输出优化后的文字；
+然后单独一行输出 {delimiter}；
+最后输出优化后文字的{target_language}翻译。"""
+
+
+_HISTORY_SECTION = """\
+以下是用户过去的对话记录，仅供参考。它们可以帮助你理解用户常用的专有名词、人名、\
+术语和表达习惯，但不要直接复制历史内容到输出中：
+{history}"""
+
+_VOCABULARY_SECTION = """\
+以下是从用户历史记录中整理出的常用术语，以及语音识别的常见误识别（误识别 → 正确写法），\
+仅供参考。原文中出现相同或读音相近的内容时优先采用正确写法，不要强行套用：
+{vocabulary}"""
+
 
 def build_optimize_prompt(
     text: str,
     history: str | None = None,
     rules_override: str | None = None,
+    translate_to: str | None = None,
+    vocabulary: str | None = None,
 ) -> str:
     """根据可选规则自定义优化提示词。
 
     rules_override 为空时回退到内置 _OPTIMIZE_RULES。
-    history 为空时不注入历史上下文结构。
+    history / vocabulary 为空时不注入对应的上下文结构。
+    translate_to 非空时为“优化 + 翻译”合并模式：要求模型先输出优化结果，
+    再输出 OPTIMIZE_TRANSLATE_DELIMITER 分隔行，最后输出译文。
     """
     rules = (rules_override or "").strip() or _OPTIMIZE_RULES
+    if translate_to:
+        instruction = _COMBINED_INSTRUCTION.format(
+            delimiter=OPTIMIZE_TRANSLATE_DELIMITER, target_language=translate_to
+        )
+    else:
+        instruction = "请直接输出优化后的文字，不需要任何解释、标记或前缀。"
+
+    sections = []
+    if vocabulary:
+        sections.append(_VOCABULARY_SECTION.format(vocabulary=vocabulary))
     if history:
+        sections.append(_HISTORY_SECTION.format(history=history))
+    if sections:
         return (
             rules
+            + "\n\n"
+            + "\n\n".join(sections)
             + """
 
-以下是用户过去的对话记录，仅供参考。它们可以帮助你理解用户常用的专有名词、人名、\
-术语和表达习惯，但不要直接复制历史内容到输出中：
-{history}
-
 当前需要优化的语音转录原文：
 {text}
 
-请直接输出优化后的文字，不需要任何解释、标记或前缀。""".format(
-                history=history, text=text
-            )
+{instruction}""".format(text=text, instruction=instruction)
         )
     return (
         rules
@@ -99,15 +145,116 @@ def build_optimize_prompt(
 
 原文：{text}
 
-请直接输出优化后的文字，不需要任何解释、标记或前缀。""".format(text=text)
+{instruction}""".format(text=text, instruction=instruction)
     )
 
 
+def build_translate_prompt(
+    text: str,
+    target_language: str,
+    reference: tuple[str, str] | None = None,
+) -> str:
+    """构建翻译提示词。
+
+    reference 为翻译记忆中相近条目的 (原文, 译文)，为空时使用普通翻译模板。
+    """
+    if reference:
+        return TRANSLATE_PROMPT_WITH_REFERENCE.format(
+            target_language=target_language,
+            reference_source=reference[0],
+            reference_translation=reference[1],
+            text=text,
+        )
+    return TRANSLATE_PROMPT.format(target_language=target_language, text=text)
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算文本 token 数，用于控制 prompt 预算。
+
+    按常见 BPE 分词器的经验值：ASCII 约 4 字符 / token，
+    中文等非 ASCII 字符按 1 字符 / token 计（偏保守，宁多勿少）。
+    """
+    ascii_chars = sum(1 for ch in text if ch < "\x80")
+    return (len(text) - ascii_chars) + (ascii_chars + 3) // 4
+
+
+def split_combined_output(text: str) -> tuple[str, str]:
+    """把合并模式的完整输出拆成 (优化文字, 译文)。
+
+    模型未按格式输出分隔行时，译文为空字符串，由调用方回退到独立翻译。
+    """
+    head, sep, tail = text.partition(OPTIMIZE_TRANSLATE_DELIMITER)
+    if not sep:
+        return text.strip(), ""
+    return head.strip(), tail.strip()
+
+
+class CombinedStreamSplitter:
+    """把合并模式的流式输出按分隔行路由到 optimize / translate 两个块。
+
+    分隔符可能被拆在多个增量块之间，因此缓冲区末尾与分隔符前缀重合的
+    部分会暂存，直到能确定它是否属于分隔符。
+    """
+
+    def __init__(self, delimiter: str = OPTIMIZE_TRANSLATE_DELIMITER):
+        self._delimiter = delimiter
+        self._pending = ""
+        self._block = "optimize"
+        self._translate_started = False
+
+    @property
+    def block(self) -> str:
+        """当前正在接收的块名。"""
+        return self._block
+
+    def feed(self, chunk: str) -> list[tuple[str, str]]:
+        """输入一个增量块，返回 [(块名, 文本), ...]。"""
+        if self._block == "translate":
+            return self._emit_translate(chunk)
+
+        buf = self._pending + chunk
+        self._pending = ""
+        idx = buf.find(self._delimiter)
+        if idx >= 0:
+            out = []
+            head = buf[:idx]
+            if head:
+                out.append(("optimize", head))
+            self._block = "translate"
+            out.extend(self._emit_translate(buf[idx + len(self._delimiter):]))
+            return out
+
+        keep = 0
+        for k in range(min(len(buf), len(self._delimiter) - 1), 0, -1):
+            if buf.endswith(self._delimiter[:k]):
+                keep = k
+                break
+        if keep:
+            self._pending = buf[-keep:]
+            buf = buf[:-keep]
+        return [("optimize", buf)] if buf else []
+
+    def flush(self) -> list[tuple[str, str]]:
+        """流结束时输出暂存内容。"""
+        pending, self._pending = self._pending, ""
+        return [(self._block, pending)] if pending else []
+
+    def _emit_translate(self, text: str) -> list[tuple[str, str]]:
+        # 去掉分隔行之后的前导换行 / 空白
+        if not self._translate_started:
+            text = text.lstrip()
+            if not text:
+                return []
+            self._translate_started = True
+        return [("translate", text)]
+
+
 class LLMWorker(QThread):
     """后台线程：向大模型发送请求并流式接收回复。"""
 
     chunk_received = Signal(str)   # 每个增量文本块
     finished_text = Signal(str)    # 完整回复文本
+    usage_received = Signal(dict)  # 用量（在 finished_text 之前发出，接口未返回时不发）
     error = Signal(str)
 
     def __init__(
@@ -117,12 +264,28 @@ class LLMWorker(QThread):
         api_key: str,
         prompt: str,
         parent=None,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 60.0,
     ):
         super().__init__(parent)
         self._base_url = base_url.rstrip("/")
         self._model = model
         self._api_key = api_key
         self._prompt = prompt
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+
+    @property
+    def model(self) -> str:
+        return self._model
+
+    @property
+    def base_url(self) -> str:
+        return self._base_url
+
+    def cancel(self):
+        """请求中止流式接收。中止后的请求不再发出任何信号。"""
+        self.requestInterruption()
 
     def run(self):
         url = f"{self._base_url}/chat/completions"
@@ -133,31 +296,49 @@ class LLMWorker(QThread):
         payload = {
             "model": self._model,
             "stream": True,
+            # 要求在流末尾附带用量统计（最后一个 chunk 的 choices 为空）
+            "stream_options": {"include_usage": True},
             "messages": [{"role": "user", "content": self._prompt}],
         }
 
         full_text = ""
+        usage = None
         try:
-            timeout = httpx.Timeout(connect=10.0, read=60.0, write=10.0, pool=10.0)
-            with httpx.Client(timeout=timeout) as client:
-                with client.stream("POST", url, json=payload, headers=headers) as resp:
-                    resp.raise_for_status()
-                    for line in resp.iter_lines():
-                        if not line.startswith("data: "):
-                            continue
-                        data_str = line[6:]
-                        if data_str.strip() == "[DONE]":
-                            break
-                        try:
-                            chunk = json.loads(data_str)
-                            delta = chunk["choices"][0].get("delta", {})
-                            content = delta.get("content", "")
-                            if content:
-                                full_text += content
-                                self.chunk_received.emit(content)
-                        except (json.JSONDecodeError, KeyError, IndexError):
-                            continue
-
+            timeout = httpx.Timeout(
+                connect=self._connect_timeout,
+                read=self._read_timeout,
+                write=10.0,
+                pool=10.0,
+            )
+            with shared_client().stream(
+                "POST", url, json=payload, headers=headers, timeout=timeout
+            ) as resp:
+                resp.raise_for_status()
+                for line in resp.iter_lines():
+                    if self.isInterruptionRequested():
+                        return
+                    if not line.startswith("data: "):
+                        continue
+                    data_str = line[6:]
+                    if data_str.strip() == "[DONE]":
+                        break
+                    try:
+                        chunk = json.loads(data_str)
+                        if chunk.get("usage"):
+                            usage = chunk["usage"]
+                        delta = chunk["choices"][0].get("delta", {})
+                        content = delta.get("content", "")
+                        if content:
+                            full_text += content
+                            self.chunk_received.emit(content)
+                    except (json.JSONDecodeError, KeyError, IndexError):
+                        continue
+
+            if self.isInterruptionRequested():
+                return
+            if usage:
+                self.usage_received.emit(usage)
             self.finished_text.emit(full_text)
         except Exception as e:
-            self.error.emit(str(e))
+            if not self.isInterruptionRequested():
+                self.error.emit(str(e))
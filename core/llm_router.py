@@ -0,0 +1,227 @@
+"""多端点 LLM 路由 —— 主端点首 token 超时时对冲请求备用端点，出错时自动回退。
+
+  · 端点按配置顺序排列（主端点在前），先只请求第一个
+  · 在 first_token_deadline_ms 内没有收到首个 token：再向下一个端点发出同样的请求
+    （对冲），谁先出首 token 就用谁，其余请求立即取消
+  · 某个端点出错且尚未选定结果：立即启动下一个未启动的端点；全部失败才报错
+  · 每个端点的首 token 延迟与错误次数记录在 endpoint_stats() 中，显示在设置的「大模型」页
+
+对外信号与 LLMWorker 一致，控制器、推测执行、分句翻译都可以直接使用。
+"""
+
+import time
+from collections import deque
+
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+
+from core.llm_client import LLMWorker
+
+
+class EndpointStats:
+    """单个端点的首 token 延迟（最近若干次）与出错 / 被取消次数。"""
+
+    _WINDOW = 50
+
+    def __init__(self):
+        self.first_token_ms: deque[float] = deque(maxlen=self._WINDOW)
+        self.errors = 0
+        self.hedged_out = 0   # 对冲中落败被取消的次数
+
+    def summary(self) -> dict:
+        samples = sorted(self.first_token_ms)
+        if not samples:
+            return {"count": 0, "errors": self.errors, "hedged_out": self.hedged_out}
+        return {
+            "count": len(samples),
+            "p50_ms": round(samples[len(samples) // 2], 1),
+            "max_ms": round(samples[-1], 1),
+            "errors": self.errors,
+            "hedged_out": self.hedged_out,
+        }
+
+
+_stats: dict[str, EndpointStats] = {}
+
+
+def endpoint_stats() -> dict[str, dict]:
+    """各端点（base_url + model）的延迟统计摘要。"""
+    return {key: s.summary() for key, s in _stats.items()}
+
+
+def record_first_token(key: str, latency_ms: float):
+    _stats.setdefault(key, EndpointStats()).first_token_ms.append(latency_ms)
+
+
+def endpoint_key(base_url: str, model: str) -> str:
+    return f"{base_url} {model}"
+
+
+def prune_endpoint_stats(endpoints: list[dict]):
+    """端点配置变化后调用：丢弃已不在配置中的端点的统计。"""
+    keep = {endpoint_key(ep.get("base_url", ""), ep.get("model", "")) for ep in endpoints}
+    for key in list(_stats):
+        if key not in keep:
+            del _stats[key]
+
+
+class LLMRouter(QObject):
+    """按端点列表依次 / 对冲地发出同一个流式请求，只转发最先出首 token 的结果。
+
+    endpoints 为 [{"base_url", "model", "api_key"}, ...]，至少一个。
+    """
+
+    chunk_received = Signal(str)
+    finished_text = Signal(str)
+    usage_received = Signal(dict)
+    error = Signal(str)
+
+    def __init__(
+        self,
+        endpoints: list[dict],
+        prompt: str,
+        first_token_deadline_ms: int = 0,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 60.0,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self._endpoints = endpoints
+        self._prompt = prompt
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+
+        self._workers: list[LLMWorker] = []
+        self._started_at: dict[LLMWorker, float] = {}
+        self._failed: set[LLMWorker] = set()
+        self._winner: LLMWorker | None = None
+        self._cancelled = False
+        self._last_error = ""
+
+        self._hedge_timer = QTimer(self)
+        self._hedge_timer.setSingleShot(True)
+        self._hedge_timer.timeout.connect(self._on_hedge_deadline)
+        self._deadline_ms = first_token_deadline_ms
+
+    # ── 与 LLMWorker 相同的控制接口 ───────────────────────
+    @property
+    def model(self) -> str:
+        worker = self._winner or (self._workers[0] if self._workers else None)
+        return worker.model if worker is not None else self._endpoints[0]["model"]
+
+    def start(self):
+        self._launch_next()
+
+    def cancel(self):
+        self._cancelled = True
+        self._hedge_timer.stop()
+        for worker in self._workers:
+            worker.cancel()
+
+    def isRunning(self) -> bool:
+        return any(w.isRunning() for w in self._workers)
+
+    def quit(self):
+        for worker in self._workers:
+            worker.quit()
+
+    def wait(self, msecs: int = 2000) -> bool:
+        return all(w.wait(msecs) for w in self._workers)
+
+    # ── 调度 ──────────────────────────────────────────────
+    @staticmethod
+    def _key(worker: LLMWorker) -> str:
+        return endpoint_key(worker.base_url, worker.model)
+
+    def _launch_next(self) -> bool:
+        """启动下一个尚未请求的端点；没有剩余端点时返回 False。"""
+        index = len(self._workers)
+        if self._cancelled or index >= len(self._endpoints):
+            return False
+        ep = self._endpoints[index]
+        worker = LLMWorker(
+            base_url=ep.get("base_url", ""),
+            model=ep.get("model", ""),
+            api_key=ep.get("api_key", ""),
+            prompt=self._prompt,
+            parent=self,
+            connect_timeout=self._connect_timeout,
+            read_timeout=self._read_timeout,
+        )
+        worker.chunk_received.connect(self._on_chunk)
+        worker.finished_text.connect(self._on_done)
+        worker.usage_received.connect(self._on_usage)
+        worker.error.connect(self._on_error)
+        self._workers.append(worker)
+        self._started_at[worker] = time.monotonic()
+        worker.start()
+        if self._deadline_ms > 0 and index + 1 < len(self._endpoints):
+            self._hedge_timer.start(self._deadline_ms)
+        return True
+
+    @Slot()
+    def _on_hedge_deadline(self):
+        if self._winner is None and not self._cancelled:
+            print(
+                f"[MouthWrite] {self._deadline_ms} ms 内未收到首个 token，"
+                f"对冲请求备用端点"
+            )
+            self._launch_next()
+
+    def _choose(self, worker: LLMWorker):
+        """选定结果来源，取消其余请求。"""
+        self._winner = worker
+        self._hedge_timer.stop()
+        latency_ms = (time.monotonic() - self._started_at[worker]) * 1000
+        record_first_token(self._key(worker), latency_ms)
+        for other in self._workers:
+            if other is not worker and other not in self._failed:
+                other.cancel()
+                _stats.setdefault(self._key(other), EndpointStats()).hedged_out += 1
+
+    # ── 转发 ──────────────────────────────────────────────
+    @Slot(str)
+    def _on_chunk(self, text: str):
+        worker = self.sender()
+        if self._cancelled:
+            return
+        if self._winner is None:
+            self._choose(worker)
+        if worker is self._winner:
+            self.chunk_received.emit(text)
+
+    @Slot(dict)
+    def _on_usage(self, usage: dict):
+        if not self._cancelled and self.sender() is self._winner:
+            self.usage_received.emit(usage)
+
+    @Slot(str)
+    def _on_done(self, full_text: str):
+        worker = self.sender()
+        if self._cancelled:
+            return
+        if self._winner is None:
+            # 没有任何 token 的空回复
+            self._choose(worker)
+        if worker is self._winner:
+            self.finished_text.emit(full_text)
+
+    @Slot(str)
+    def _on_error(self, err: str):
+        worker = self.sender()
+        if self._cancelled:
+            return
+        self._failed.add(worker)
+        self._last_error = err
+        _stats.setdefault(self._key(worker), EndpointStats()).errors += 1
+        if worker is self._winner:
+            self._hedge_timer.stop()
+            self.error.emit(err)
+            return
+        if self._winner is not None:
+            return
+        if self._launch_next():
+            print(f"[MouthWrite] 端点 {worker.base_url} 出错，回退到下一个端点: {err}")
+            return
+        if all(w in self._failed for w in self._workers):
+            self._hedge_timer.stop()
+            self.error.emit(self._last_error)
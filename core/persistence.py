@@ -0,0 +1,144 @@
+"""后台持久化 —— 所有配置 / 历史 / 用量文件写入都交给同一个后台线程。
+
+调用方在 Qt 主线程中只做序列化并入队，立即返回，不等待磁盘：
+  · replace(path, text)：整体替换文件内容。同一文件在写入前多次替换只写最后一次，
+    并丢弃此前尚未写入的追加内容（已包含在新内容中）
+  · append(path, text)：追加内容，按入队顺序合并后一次写入
+  · 整体替换先写同目录临时文件并 fsync，再 os.replace 原子替换，
+    写到一半崩溃只会留下旧文件或新文件，不会出现半个文件
+  · 收到第一个请求后等待 _COALESCE_S 再写，把一轮会话中的连续写入合并为一次
+
+读取文件前调用 flush() 等待队列写完；退出时由 close_background_writer()（或 atexit）写完剩余内容。
+"""
+
+import atexit
+import os
+import threading
+from pathlib import Path
+
+# 突发写入的合并窗口
+_COALESCE_S = 0.05
+
+
+class _Pending:
+    """单个文件待写入的内容：可选的整体替换 + 之后的追加。"""
+
+    __slots__ = ("content", "appended")
+
+    def __init__(self):
+        self.content: str | None = None
+        self.appended: list[str] = []
+
+
+class BackgroundWriter:
+    """单线程、按文件合并的写入队列。"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._pending: dict[Path, _Pending] = {}
+        self._busy = False
+        self._closed = False
+        self._flushing = 0
+        self._thread = threading.Thread(
+            target=self._run, name="MouthWrite-writer", daemon=True
+        )
+        self._thread.start()
+
+    # ── 入队 ──────────────────────────────────────────────
+    def replace(self, path: Path, text: str):
+        with self._cond:
+            pending = self._pending.setdefault(Path(path), _Pending())
+            pending.content = text
+            pending.appended.clear()
+            self._cond.notify_all()
+
+    def append(self, path: Path, text: str):
+        with self._cond:
+            self._pending.setdefault(Path(path), _Pending()).appended.append(text)
+            self._cond.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """等待当前所有待写内容落盘，返回是否在超时前完成。"""
+        with self._cond:
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                return self._cond.wait_for(
+                    lambda: not self._pending and not self._busy, timeout
+                )
+            finally:
+                self._flushing -= 1
+
+    def close(self, timeout: float = 5.0):
+        """写完剩余内容后停止线程（应用退出时调用）。"""
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    # ── 写入线程 ──────────────────────────────────────────
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                # 合并窗口：让同一轮的后续写入一起落盘（flush / close 时立即写）
+                self._cond.wait_for(
+                    lambda: self._closed or self._flushing, _COALESCE_S
+                )
+                batch, self._pending = self._pending, {}
+                self._busy = True
+            for path, pending in batch.items():
+                self._write(path, pending)
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    @staticmethod
+    def _write(path: Path, pending: _Pending):
+        try:
+            if pending.content is not None:
+                atomic_write(path, pending.content + "".join(pending.appended))
+            elif pending.appended:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("".join(pending.appended))
+        except OSError as e:
+            print(f"[MouthWrite] 写入 {path.name} 失败: {e}")
+
+
+def atomic_write(path: Path, data: str | bytes):
+    """先写同目录临时文件并 fsync，再原子替换目标文件（同步执行）。"""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+_lock = threading.Lock()
+_writer: BackgroundWriter | None = None
+
+
+def background_writer() -> BackgroundWriter:
+    """返回进程内共享的后台写入线程（首次调用时创建）。"""
+    global _writer
+    with _lock:
+        if _writer is None:
+            _writer = BackgroundWriter()
+            atexit.register(close_background_writer)
+        return _writer
+
+
+def close_background_writer():
+    """写完剩余内容并停止后台写入线程（应用退出时调用）。"""
+    global _writer
+    with _lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close()
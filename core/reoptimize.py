@@ -0,0 +1,285 @@
+"""批量重新优化 —— 修改优化规则或更换模型后，用当前配置重新优化历史记录。
+
+旧记录仍是按旧规则优化的结果，又会作为历史上下文注入之后的 prompt。
+ReoptimizeJob 在后台对选中记录的 asr_text 重新构建 prompt 并请求大模型，
+完成一条就用新结果更新该记录的 optimized_text：
+
+  · 最多同时进行 concurrency 个请求，其余排队
+  · 限速：每分钟最多发起 per_minute 个请求（0 为不限），按最小间隔均匀发出
+  · 进度写入检查点文件（后台写入）；暂停、退出或崩溃后可从剩余记录继续，
+    已完成的记录不会重复请求
+  · 请求失败的记录保留原结果并计入失败数，不重试
+
+只处理热段中的记录（归档记录只读，也不会作为历史上下文注入）。
+"""
+
+import json
+import time
+from collections import deque
+from collections.abc import Callable
+from pathlib import Path
+
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+
+from core.history import HistoryManager
+from core.llm_client import LLMWorker
+from core.llm_router import LLMRouter
+from core.persistence import background_writer
+from core.usage import SessionUsage
+
+
+class ReoptimizeJob(QObject):
+    """可暂停 / 续跑的批量重新优化任务。
+
+    make_worker(prompt)  → 未启动的 LLM 请求（LLMWorker / LLMRouter，不接入前台用量统计）
+    build_prompt(text)   → 由识别原文构建优化 prompt
+    """
+
+    progress = Signal(int, int, int)   # 已完成, 总数, 失败
+    state_changed = Signal(str)        # idle / running / paused
+    usage_added = Signal()             # usage 中有新增用量，由控制器记账
+
+    IDLE = "idle"
+    RUNNING = "running"
+    PAUSED = "paused"
+
+    def __init__(
+        self,
+        history: HistoryManager,
+        make_worker: Callable,
+        build_prompt: Callable[[str], str],
+        checkpoint_path: Path,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self._history = history
+        self._make_worker = make_worker
+        self._build_prompt = build_prompt
+        self._checkpoint_path = Path(checkpoint_path)
+        self.usage = SessionUsage()
+
+        self._state = self.IDLE
+        self._pending: deque[int] = deque()
+        self._total = 0
+        self._done = 0
+        self._failed: list[int] = []
+        self._concurrency = 1
+        self._min_interval = 0.0
+        self._next_start = 0.0
+
+        self._active: dict[QObject, int] = {}
+        self._retired: list[QObject] = []
+        self._pump_timer = QTimer(self)
+        self._pump_timer.setSingleShot(True)
+        self._pump_timer.timeout.connect(self._pump)
+
+        self._load_checkpoint()
+
+    # ── 状态 ──────────────────────────────────────────────
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    @property
+    def done(self) -> int:
+        return self._done
+
+    @property
+    def failed(self) -> int:
+        return len(self._failed)
+
+    @property
+    def remaining(self) -> int:
+        return len(self._pending) + len(self._active)
+
+    def _set_state(self, state: str):
+        if state != self._state:
+            self._state = state
+            self.state_changed.emit(state)
+
+    # ── 控制 ──────────────────────────────────────────────
+    def start(self, record_ids: list[int], concurrency: int = 2, per_minute: int = 0):
+        """开始新任务（替换尚未完成的旧任务）。record_ids 按处理顺序排列。"""
+        self._abort_workers()
+        ids = [
+            rid for rid in dict.fromkeys(record_ids)
+            if (self._history.get_record(rid) or {}).get("asr_text")
+        ]
+        self._pending = deque(ids)
+        self._total = len(ids)
+        self._done = 0
+        self._failed = []
+        self._configure(concurrency, per_minute)
+        if not ids:
+            self._finish()
+            return
+        print(f"[MouthWrite] 开始重新优化 {len(ids)} 条历史记录")
+        self._set_state(self.RUNNING)
+        self._save_checkpoint()
+        self.progress.emit(self._done, self._total, len(self._failed))
+        self._pump()
+
+    def resume(self, concurrency: int = 2, per_minute: int = 0):
+        """从暂停处（或上次退出时的检查点）继续。"""
+        if self._state != self.PAUSED:
+            return
+        self._configure(concurrency, per_minute)
+        self._set_state(self.RUNNING)
+        self._pump()
+
+    def pause(self):
+        """暂停：取消进行中的请求，这些记录放回队首，续跑时重新请求。"""
+        if self._state != self.RUNNING:
+            return
+        for record_id in reversed(list(self._active.values())):
+            self._pending.appendleft(record_id)
+        self._abort_workers()
+        self._pump_timer.stop()
+        self._save_checkpoint()
+        self._set_state(self.PAUSED)
+
+    def cancel(self):
+        """放弃任务：已更新的记录保留，删除检查点。"""
+        self._abort_workers()
+        self._pending.clear()
+        self._finish()
+
+    def _configure(self, concurrency: int, per_minute: int):
+        self._concurrency = max(1, concurrency)
+        self._min_interval = 60.0 / per_minute if per_minute > 0 else 0.0
+
+    # ── 调度 ──────────────────────────────────────────────
+    def _pump(self):
+        self._reap()
+        if self._state != self.RUNNING:
+            return
+        while self._pending and len(self._active) < self._concurrency:
+            now = time.monotonic()
+            if now < self._next_start:
+                self._pump_timer.start(int((self._next_start - now) * 1000) + 1)
+                return
+            record_id = self._pending.popleft()
+            record = self._history.get_record(record_id)
+            if record is None or not record.get("asr_text"):
+                # 记录已被封存 / 清空：跳过，不算失败
+                self._done += 1
+                continue
+            worker = self._make_worker(self._build_prompt(record["asr_text"]))
+            worker.finished_text.connect(self._on_done)
+            worker.error.connect(self._on_error)
+            worker.usage_received.connect(self._on_usage)
+            self._active[worker] = record_id
+            self._next_start = now + self._min_interval
+            worker.start()
+        if not self._pending and not self._active:
+            self._finish()
+
+    def _complete(self, worker: QObject, failed: bool):
+        record_id = self._active.pop(worker, None)
+        if record_id is None:
+            return
+        self._retired.append(worker)
+        self._done += 1
+        if failed:
+            self._failed.append(record_id)
+        self.progress.emit(self._done, self._total, len(self._failed))
+        self._save_checkpoint()
+        self._pump()
+
+    def _finish(self):
+        self._pump_timer.stop()
+        if self._total:
+            print(
+                f"[MouthWrite] 重新优化结束：{self._done}/{self._total} 条，"
+                f"失败 {len(self._failed)} 条"
+            )
+        self._delete_checkpoint()
+        self.progress.emit(self._done, self._total, len(self._failed))
+        self._set_state(self.IDLE)
+
+    def _abort_workers(self):
+        for worker in self._active:
+            worker.cancel()
+            self._retired.append(worker)
+        self._active.clear()
+        self._reap(wait_ms=2000)
+
+    def _reap(self, wait_ms: int = 0):
+        """释放已结束的请求对象（对冲请求中落败的线程可能稍晚才结束）。"""
+        alive = []
+        for worker in self._retired:
+            if worker.wait(wait_ms):
+                worker.deleteLater()
+            else:
+                alive.append(worker)
+        self._retired = alive
+
+    # ── 信号处理 ──────────────────────────────────────────
+    @Slot(str)
+    def _on_done(self, text: str):
+        worker = self.sender()
+        record_id = self._active.get(worker)
+        if record_id is None:
+            return
+        text = text.strip()
+        if text:
+            self._history.update_record(record_id, optimized_text=text)
+        self._complete(worker, failed=not text)
+
+    @Slot(str)
+    def _on_error(self, err: str):
+        worker = self.sender()
+        record_id = self._active.get(worker)
+        if record_id is None:
+            return
+        print(f"[MouthWrite] 重新优化记录 #{record_id} 失败: {err}")
+        self._complete(worker, failed=True)
+
+    @Slot(dict)
+    def _on_usage(self, usage: dict):
+        worker = self.sender()
+        if worker not in self._active:
+            return
+        model = worker.model if isinstance(worker, (LLMWorker, LLMRouter)) else ""
+        self.usage.add_llm(model, usage)
+        self.usage_added.emit()
+
+    # ── 检查点 ────────────────────────────────────────────
+    def _save_checkpoint(self):
+        background_writer().replace(self._checkpoint_path, json.dumps({
+            "pending": [*self._active.values(), *self._pending],
+            "total": self._total,
+            "done": self._done,
+            "failed": self._failed,
+        }))
+
+    def _load_checkpoint(self):
+        try:
+            with open(self._checkpoint_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            pending = [int(rid) for rid in data.get("pending", [])]
+            total = int(data.get("total", 0))
+            done = int(data.get("done", 0))
+            failed = [int(rid) for rid in data.get("failed", [])]
+        except (OSError, ValueError, TypeError, AttributeError):
+            return
+        if not pending:
+            self._delete_checkpoint()
+            return
+        self._pending = deque(pending)
+        self._total = total
+        self._done = done
+        self._failed = failed
+        self._state = self.PAUSED
+        print(f"[MouthWrite] 发现未完成的重新优化任务，剩余 {len(pending)} 条")
+
+    def _delete_checkpoint(self):
+        background_writer().flush()
+        try:
+            self._checkpoint_path.unlink(missing_ok=True)
+        except OSError:
+            pass
@@ -0,0 +1,66 @@
+"""句子切分 —— 在流式文本中找出已经完整的句子，供推测执行 / 分句流水线使用。"""
+
+# 无歧义的句末标点（中文与全角标点、换行）
+_TERMINATORS = frozenset("。！？；!?;\n…")
+# 英文句点仅在其后跟空白时视为句末，避免把 12.1、Node.js 之类切断
+_AMBIGUOUS = frozenset(".")
+# 句末标点之后可能紧跟的右引号 / 括号，应归入同一句
+_CLOSERS = frozenset("”’\"')）】」』")
+
+
+def _sentence_end(text: str, i: int) -> int:
+    """若 text[i] 是句末标点，返回句子结束位置（不含），否则返回 -1。"""
+    ch = text[i]
+    if ch in _AMBIGUOUS:
+        if i + 1 >= len(text) or not text[i + 1].isspace():
+            return -1
+    elif ch not in _TERMINATORS:
+        return -1
+    end = i + 1
+    while end < len(text) and (text[end] in _CLOSERS or text[end] in _TERMINATORS):
+        end += 1
+    # 句末标点位于文本末尾时，后面可能还有右引号 / 连续标点没到，暂不确认
+    if end >= len(text):
+        return -1
+    return end
+
+
+def complete_prefix(text: str) -> str:
+    """返回 text 中最后一个完整句子为止的前缀；没有完整句子时返回空串。"""
+    for i in range(len(text) - 1, -1, -1):
+        end = _sentence_end(text, i)
+        if end >= 0:
+            return text[:end]
+    return ""
+
+
+class SentenceSplitter:
+    """增量分句器：不断 feed 流式增量，取回已完整的句子。"""
+
+    def __init__(self):
+        self._buffer = ""
+
+    @property
+    def pending(self) -> str:
+        """尚未构成完整句子的尾部文本。"""
+        return self._buffer
+
+    def feed(self, chunk: str) -> list[str]:
+        self._buffer += chunk
+        sentences = []
+        start = 0
+        i = 0
+        while i < len(self._buffer):
+            end = _sentence_end(self._buffer, i)
+            if end >= 0:
+                sentences.append(self._buffer[start:end])
+                start = i = end
+            else:
+                i += 1
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> str:
+        """流结束时取出剩余文本（可能为空串）。"""
+        rest, self._buffer = self._buffer, ""
+        return rest
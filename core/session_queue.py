@@ -0,0 +1,247 @@
+"""会话队列 —— 上一轮仍在识别 / 优化时即可开始下一轮录音。
+
+处理中再次按下热键时，控制器把当前会话转入后台（BackgroundSession），悬浮窗立即
+用于新一轮录音：
+  · 已在进行的 ASR / LLM 请求由后台会话接管继续，不重新请求
+  · 后台会话不再占用悬浮窗，按 识别 → 优化 →（翻译）依次推进
+  · SessionQueue 按开始顺序交付结果：前面的会话未完成时，后面的结果先缓存
+
+前台会话的结果同样要等队列清空后再交付（见 Controller._hold_until_queue_drained），
+因此剪贴板与历史记录的顺序始终与口述顺序一致。
+多语言翻译会话转入后台后只翻译第一种目标语言。
+"""
+
+from collections.abc import Callable
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+from core.llm_client import LLMWorker, split_combined_output
+from core.llm_router import LLMRouter
+from core.speculation import SpeculativeOptimization
+from core.usage import SessionUsage
+
+
+def _detach(signal):
+    """断开信号上的全部连接（控制器接入的槽），没有连接时忽略。"""
+    try:
+        signal.disconnect()
+    except (RuntimeError, TypeError):
+        pass
+
+
+class BackgroundSession(QObject):
+    """转入后台的一轮会话：拥有自己的请求、文本与用量，完成后发出 finished。"""
+
+    finished = Signal()
+
+    def __init__(
+        self,
+        seq: int,
+        queue: "SessionQueue",
+        raw_text: str = "",
+        optimized_text: str = "",
+        translated_text: str = "",
+        translate_to: str = "",
+        record_id: int | None = None,
+        usage: SessionUsage | None = None,
+        audio_seconds: float = 0.0,
+        audio: str = "",
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.seq = seq
+        self.raw_text = raw_text
+        self.optimized_text = optimized_text
+        self.translated_text = translated_text
+        self.translate_to = translate_to
+        self.record_id = record_id
+        self.usage = usage or SessionUsage()
+        # 仅当识别在后台完成时非零，交付时计入 ASR 用量
+        self.audio_seconds = audio_seconds
+        # 录音归档中的键，写入历史记录
+        self.audio = audio
+        self.error = ""
+        self.done = False
+
+        self._queue = queue
+        self._source: QObject | None = None
+        self._stage = ""
+        self._cancelled = False
+
+    @property
+    def result(self) -> str:
+        """交付到剪贴板的文本：译文优先，其次优化结果，最后为识别原文。"""
+        return self.translated_text or self.optimized_text or self.raw_text
+
+    # ── 启动 / 接管 ───────────────────────────────────────
+    def start(self, audio_base64: str = ""):
+        """从当前已有的文本推进到下一阶段（识别尚未开始时需要音频）。"""
+        if not self.raw_text:
+            if not audio_base64:
+                self.error = "没有可识别的音频"
+                self._finish()
+                return
+            self._run(self._queue.make_asr_worker(audio_base64), "asr")
+            return
+        self._advance()
+
+    def adopt(self, source: QObject, stage: str, llm_workers: list | None = None):
+        """接管控制器正在进行的请求（ASRWorker / LLM 请求 / 推测优化）。
+
+        stage 为 "asr" 或 "optimize"；llm_workers 为需要改由本会话统计用量的底层请求。
+        """
+        for signal in (source.chunk_received, source.finished_text, source.error):
+            _detach(signal)
+        for worker in llm_workers or []:
+            _detach(worker.usage_received)
+            worker.usage_received.connect(self._on_usage)
+        self._source = source
+        self._stage = stage
+        source.finished_text.connect(self._on_done)
+        source.error.connect(self._on_error)
+
+    def cancel(self):
+        self._cancelled = True
+        source, self._source = self._source, None
+        if isinstance(source, SpeculativeOptimization):
+            source.discard()
+        elif isinstance(source, (LLMWorker, LLMRouter)):
+            source.cancel()
+
+    # ── 阶段推进 ──────────────────────────────────────────
+    def _run(self, source: QObject, stage: str):
+        self._source = source
+        self._stage = stage
+        source.finished_text.connect(self._on_done)
+        source.error.connect(self._on_error)
+        if isinstance(source, (LLMWorker, LLMRouter)):
+            source.usage_received.connect(self._on_usage)
+        source.start()
+
+    def _advance(self):
+        if self._cancelled:
+            return
+        queue = self._queue
+        if not self.optimized_text:
+            if not queue.llm_enabled():
+                self.optimized_text = queue.rescore(self.raw_text)
+                self._finish()
+                return
+            prompt = queue.optimize_prompt(self.raw_text, self.translate_to)
+            self._run(queue.make_llm_worker(prompt), "optimize")
+            return
+        if self.translate_to and not self.translated_text and queue.llm_enabled():
+            prompt = queue.translate_prompt(self.optimized_text, self.translate_to)
+            self._run(queue.make_llm_worker(prompt), "translate")
+            return
+        self._finish()
+
+    def _finish(self):
+        self._source = None
+        self.done = True
+        self.finished.emit()
+
+    # ── 信号处理 ──────────────────────────────────────────
+    @Slot(str)
+    def _on_done(self, text: str):
+        if self._cancelled:
+            return
+        if self._stage == "asr":
+            self.raw_text = text
+            if not text:
+                self.error = "识别结果为空"
+                self._finish()
+                return
+        elif self._stage == "optimize":
+            # 合并模式的输出含分隔行时同时得到译文；普通优化结果原样保留
+            optimized, translated = split_combined_output(text)
+            self.optimized_text = optimized or self.raw_text
+            self.translated_text = translated
+        else:
+            self.translated_text = text
+        self._advance()
+
+    @Slot(str)
+    def _on_error(self, err: str):
+        if self._cancelled:
+            return
+        self.error = err
+        print(f"[MouthWrite] 后台会话 #{self.seq} {self._stage} 失败: {err}")
+        if self._stage == "optimize":
+            # 与前台一致：优化失败时使用原文，翻译会话仍尝试翻译原文
+            self.optimized_text = self.raw_text
+            self._advance()
+            return
+        self._finish()
+
+    @Slot(dict)
+    def _on_usage(self, usage: dict):
+        worker = self.sender()
+        model = worker.model if isinstance(worker, (LLMWorker, LLMRouter)) else ""
+        self.usage.add_llm(model, usage)
+
+
+class SessionQueue(QObject):
+    """后台会话队列：按开始顺序逐个交付已完成的会话。
+
+    请求的创建与 prompt 构建由控制器以回调提供，与前台会话使用同一套配置：
+      make_asr_worker(audio_base64)        → 未启动的 ASRWorker
+      make_llm_worker(prompt)              → 未启动的 LLM 请求（不接入前台用量统计）
+      optimize_prompt(text, translate_to)  → 优化 prompt（translate_to 非空时可为合并模式）
+      translate_prompt(text, target)       → 翻译 prompt
+      rescore(text)                        → 未配置大模型时的本地纠错
+      llm_enabled()                        → 是否配置了大模型
+    """
+
+    delivered = Signal(object)   # BackgroundSession，严格按开始顺序
+    drained = Signal()           # 队列已清空
+
+    def __init__(
+        self,
+        make_asr_worker: Callable,
+        make_llm_worker: Callable,
+        optimize_prompt: Callable[[str, str], str],
+        translate_prompt: Callable[[str, str], str],
+        rescore: Callable[[str], str],
+        llm_enabled: Callable[[], bool],
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.make_asr_worker = make_asr_worker
+        self.make_llm_worker = make_llm_worker
+        self.optimize_prompt = optimize_prompt
+        self.translate_prompt = translate_prompt
+        self.rescore = rescore
+        self.llm_enabled = llm_enabled
+
+        self._sessions: list[BackgroundSession] = []
+        self._seq = 0
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._sessions)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def enqueue(self, **fields) -> BackgroundSession:
+        """新建一个后台会话并排到队尾；调用方随后 adopt() / start()。"""
+        self._seq += 1
+        session = BackgroundSession(self._seq, self, parent=self, **fields)
+        session.finished.connect(self._on_session_finished)
+        self._sessions.append(session)
+        return session
+
+    def cancel_all(self):
+        for session in self._sessions:
+            session.cancel()
+        self._sessions.clear()
+
+    @Slot()
+    def _on_session_finished(self):
+        while self._sessions and self._sessions[0].done:
+            session = self._sessions.pop(0)
+            self.delivered.emit(session)
+            session.deleteLater()
+        if not self._sessions:
+            self.drained.emit()
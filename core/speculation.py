@@ -0,0 +1,155 @@
+"""推测执行 —— ASR 仍在流式输出时，提前对已完整的句子发起 LLM 优化。
+
+ASR 结束后：
+  · 最终文本仍以推测前缀开头 → 保留推测结果，只对剩余部分再发一次请求，
+    两段输出按顺序拼接（剩余部分的 token 在推测段完成前先缓存）
+  · 前缀不再匹配 → 丢弃推测请求，回退到完整优化
+
+对外信号与 LLMWorker 一致，控制器可以像对待普通优化请求一样接入。
+"""
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+from core.llm_client import LLMWorker
+
+
+def join_segments(head: str, tail: str) -> str:
+    """拼接两段优化结果；英文 / 数字相邻时补一个半角空格。"""
+    if head and tail and _is_word_char(head[-1]) and _is_word_char(tail[0]):
+        return head + " " + tail
+    return head + tail
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isascii() and ch.isalnum()
+
+
+class SpeculativeOptimization(QObject):
+    """一次推测优化：前缀请求 +（确认后）剩余部分请求。"""
+
+    chunk_received = Signal(str)
+    finished_text = Signal(str)
+    error = Signal(str)
+
+    def __init__(self, prefix: str, worker: LLMWorker, parent=None):
+        super().__init__(parent)
+        self._prefix = prefix
+        self._worker = worker
+        self._rest_worker: LLMWorker | None = None
+
+        self._confirmed = False
+        self._failed = False
+        self._spec_text = ""
+        self._spec_done = False
+        self._rest_text = ""
+        self._rest_emitted = False
+        self._rest_done = False
+
+        worker.chunk_received.connect(self._on_spec_chunk)
+        worker.finished_text.connect(self._on_spec_done)
+        worker.error.connect(self._on_error)
+
+    @property
+    def prefix(self) -> str:
+        return self._prefix
+
+    def start(self):
+        self._worker.start()
+
+    # ── 确认 / 丢弃 ──────────────────────────────────────
+    def confirm(self, final_text: str) -> str | None:
+        """用最终 ASR 文本校验推测前缀。
+
+        匹配时返回剩余待优化文本（可能为空串），之后需调用 resume()；
+        不匹配或推测请求已失败时返回 None，调用方应 discard()。
+        """
+        if self._failed or not final_text.startswith(self._prefix):
+            return None
+        self._confirmed = True
+        return final_text[len(self._prefix):].strip()
+
+    def resume(self, rest_worker: LLMWorker | None):
+        """确认后接管输出：先发出已缓存的推测 token，再启动剩余部分请求。"""
+        if self._spec_text:
+            self.chunk_received.emit(self._spec_text)
+        self._rest_worker = rest_worker
+        if rest_worker is not None:
+            rest_worker.chunk_received.connect(self._on_rest_chunk)
+            rest_worker.finished_text.connect(self._on_rest_done)
+            rest_worker.error.connect(self._on_error)
+            rest_worker.start()
+        self._maybe_finish()
+
+    def discard(self):
+        """中止所有请求，之后不再发出任何信号。"""
+        self._failed = True
+        self._confirmed = False
+        for worker in (self._worker, self._rest_worker):
+            if worker is not None:
+                worker.cancel()
+
+    def workers(self) -> list[LLMWorker]:
+        return [w for w in (self._worker, self._rest_worker) if w is not None]
+
+    # ── 推测段 ────────────────────────────────────────────
+    @Slot(str)
+    def _on_spec_chunk(self, text: str):
+        if self._failed:
+            return
+        self._spec_text += text
+        if self._confirmed:
+            self.chunk_received.emit(text)
+
+    @Slot(str)
+    def _on_spec_done(self, full_text: str):
+        if self._failed:
+            return
+        self._spec_text = full_text
+        self._spec_done = True
+        if self._confirmed:
+            # 推测段结束，放行缓存的剩余部分
+            self._emit_rest(self._rest_text)
+            self._maybe_finish()
+
+    # ── 剩余段 ────────────────────────────────────────────
+    @Slot(str)
+    def _on_rest_chunk(self, text: str):
+        if self._failed:
+            return
+        self._rest_text += text
+        if self._spec_done:
+            self._emit_rest(text)
+
+    @Slot(str)
+    def _on_rest_done(self, full_text: str):
+        if self._failed:
+            return
+        self._rest_text = full_text
+        self._rest_done = True
+        self._maybe_finish()
+
+    def _emit_rest(self, text: str):
+        if not text:
+            return
+        if not self._rest_emitted:
+            self._rest_emitted = True
+            text = join_segments(self._spec_text, text)[len(self._spec_text):]
+        self.chunk_received.emit(text)
+
+    # ── 结束 / 出错 ──────────────────────────────────────
+    def _maybe_finish(self):
+        if not self._confirmed or not self._spec_done:
+            return
+        if self._rest_worker is not None and not self._rest_done:
+            return
+        self._confirmed = False  # 只结束一次
+        self.finished_text.emit(join_segments(self._spec_text, self._rest_text))
+
+    @Slot(str)
+    def _on_error(self, err: str):
+        if self._failed:
+            return
+        confirmed = self._confirmed
+        self.discard()
+        if confirmed:
+            self.error.emit(err)
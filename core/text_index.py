@@ -0,0 +1,203 @@
+"""字符 n-gram 倒排索引 —— 翻译记忆、历史检索共用的轻量全文索引。
+
+中文没有天然的词边界，这里直接按字符 n-gram（默认二元）切分，
+不依赖分词库。索引完全在内存中，支持增量增删。
+"""
+
+import heapq
+import re
+from collections import Counter
+from collections.abc import Iterator
+from math import ceil, log
+
+# 规范化时丢弃的字符：空白与常见中英文标点
+_STRIP_RE = re.compile(
+    r"[\s,.!?;:'\"()\[\]{}<>/\\|@#$%^&*_+=~`\-，。！？；：、“”‘’（）【】《》〈〉…—·]+"
+)
+
+
+def normalize_text(text: str) -> str:
+    """规范化文本：小写、去掉空白与标点，用于 n-gram 切分和精确匹配。"""
+    return _STRIP_RE.sub("", text.lower())
+
+
+def char_ngrams(text: str, n: int = 2) -> set[str]:
+    """将文本切分为去重后的字符 n-gram 集合。
+
+    规范化后长度不足 n 的文本整体作为一个 gram，保证短句也能被检索到。
+    """
+    norm = normalize_text(text)
+    if not norm:
+        return set()
+    if len(norm) <= n:
+        return {norm}
+    return {norm[i:i + n] for i in range(len(norm) - n + 1)}
+
+
+class NGramIndex:
+    """字符 n-gram 倒排索引。
+
+    doc_id 可以是任意可哈希对象。每个 gram 对应一个 ``{doc_id: None}`` 的
+    posting 字典（利用 dict 的插入有序与 O(1) 删除），同时记录每篇文档的
+    gram 集合，用于删除和相似度校验。
+    """
+
+    _SCAN_BUDGET = 2048     # 单次查询最多扫描的 posting 条目数
+    _VERIFY_LIMIT = 32      # 精确打分的候选上限
+
+    def __init__(self, n: int = 2):
+        self._n = n
+        self._postings: dict[str, dict] = {}
+        self._doc_grams: dict[object, frozenset[str]] = {}
+        self._total_grams = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_grams)
+
+    def __contains__(self, doc_id) -> bool:
+        return doc_id in self._doc_grams
+
+    # ── 增删 ──────────────────────────────────────────────
+    def add(self, doc_id, text: str):
+        """索引一篇文档；doc_id 已存在时先删除旧内容再重建。"""
+        if doc_id in self._doc_grams:
+            self.remove(doc_id)
+        grams = frozenset(char_ngrams(text, self._n))
+        self._doc_grams[doc_id] = grams
+        self._total_grams += len(grams)
+        for g in grams:
+            posting = self._postings.get(g)
+            if posting is None:
+                posting = self._postings[g] = {}
+            posting[doc_id] = None
+
+    def remove(self, doc_id):
+        grams = self._doc_grams.pop(doc_id, None)
+        if not grams:
+            return
+        self._total_grams -= len(grams)
+        for g in grams:
+            posting = self._postings.get(g)
+            if posting is None:
+                continue
+            posting.pop(doc_id, None)
+            if not posting:
+                del self._postings[g]
+
+    def clear(self):
+        self._postings.clear()
+        self._doc_grams.clear()
+        self._total_grams = 0
+
+    # ── 查询 ──────────────────────────────────────────────
+    def similar(
+        self,
+        text: str,
+        limit: int = 1,
+        min_score: float = 0.5,
+    ) -> list[tuple[object, float]]:
+        """按 Dice 系数查找与 text 相近的文档，返回 [(doc_id, score), ...]。
+
+        候选召回采用前缀过滤：Dice ≥ t 要求共有 gram 数 o ≥ t·|Q| / (2 - t)，
+        因此只需扫描 df 最小的 |Q| - o + 1 个 gram。为了让耗时与索引规模
+        脱钩，扫描的 posting 总长度受 _SCAN_BUDGET 限制（高频 gram 对相近句
+        几乎没有区分度），再按命中次数取前 _VERIFY_LIMIT 个候选做长度过滤
+        与集合求交精确打分。这是近似召回：只由高频 gram 组成的句子可能漏召。
+        """
+        query = char_ngrams(text, self._n)
+        if not query or not self._doc_grams:
+            return []
+        min_score = min(max(min_score, 0.01), 1.0)
+
+        q_len = len(query)
+        min_overlap = max(1, ceil(min_score * q_len / (2 - min_score)))
+        prefix_len = q_len - min_overlap + 1
+        # 文档 gram 数必须落在 [t/(2-t)·|Q|, (2-t)/t·|Q|] 区间
+        min_len = min_score * q_len / (2 - min_score)
+        max_len = (2 - min_score) * q_len / min_score
+
+        postings = self._postings
+        # 索引中不存在的 gram（df = 0）同样占用前缀名额
+        ordered = sorted((postings.get(g, {}) for g in query), key=len)
+        hits: Counter = Counter()
+        scanned = 0
+        for posting in ordered[:prefix_len]:
+            if scanned and scanned + len(posting) > self._SCAN_BUDGET:
+                break
+            scanned += len(posting)
+            hits.update(posting.keys())
+
+        doc_grams = self._doc_grams
+        scored: list[tuple[object, float]] = []
+        for doc_id, _ in hits.most_common(self._VERIFY_LIMIT):
+            grams = doc_grams[doc_id]
+            d_len = len(grams)
+            if d_len < min_len or d_len > max_len:
+                continue
+            score = 2 * len(query & grams) / (q_len + d_len)
+            if score >= min_score:
+                scored.append((doc_id, score))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:limit]
+
+    def search(
+        self,
+        text: str,
+        limit: int = 5,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ) -> list[tuple[object, float]]:
+        """BM25 相关性检索，返回按得分降序的 [(doc_id, score), ...]。
+
+        gram 在文档内按二值 tf 计（索引只保存 gram 集合），文档长度为 gram 数。
+        按 df 升序累加得分，扫描量同样受 _SCAN_BUDGET 限制：被跳过的
+        高频 gram idf 很低，对排序影响可以忽略。
+        """
+        query = char_ngrams(text, self._n)
+        n_docs = len(self._doc_grams)
+        if not query or not n_docs:
+            return []
+
+        avg_len = self._total_grams / n_docs or 1.0
+        postings = self._postings
+        doc_grams = self._doc_grams
+        ordered = sorted(
+            (p for p in (postings.get(g) for g in query) if p), key=len
+        )
+        scores: dict = {}
+        scanned = 0
+        for posting in ordered:
+            df = len(posting)
+            if scanned and scanned + df > self._SCAN_BUDGET:
+                break
+            scanned += df
+            idf = log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_id in posting:
+                norm = 1 - b + b * len(doc_grams[doc_id]) / avg_len
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * (k1 + 1) / (
+                    1 + k1 * norm
+                )
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def match(self, text: str) -> Iterator:
+        """布尔检索：逐个产出包含 text 全部 gram 的文档 id，最近加入索引的在前。
+
+        用于关键词过滤，结果是“可能包含 text”的候选，调用方需再做子串校验。
+        遍历 df 最小的 posting 并在其余 posting 中确认；按需惰性产出，
+        调用方取够条数即可停止，常见词的耗时不随命中总数增长。
+        规范化后短于 n 的 text 无法检索（索引中没有这种 gram），不产出任何结果。
+        """
+        query = char_ngrams(text, self._n)
+        postings = []
+        for g in query:
+            posting = self._postings.get(g)
+            if not posting:
+                return
+            postings.append(posting)
+        if not postings:
+            return
+        postings.sort(key=len)
+        first, rest = postings[0], postings[1:]
+        for doc_id in reversed(first):
+            if all(doc_id in p for p in rest):
+                yield doc_id
@@ -0,0 +1,108 @@
+"""翻译记忆 —— 复用历史翻译结果，精确命中本地直出，相近命中作为参考交给大模型。"""
+
+from collections.abc import Iterable
+from typing import NamedTuple
+
+from core.text_index import NGramIndex
+
+
+def _exact_key(text: str) -> str:
+    """精确匹配键：仅忽略空白差异（如中英文间空格），保留标点与大小写。
+
+    标点会改变语气（问句 / 陈述句），不能像 n-gram 那样一并丢弃。
+    """
+    return "".join(text.split())
+
+
+class TMMatch(NamedTuple):
+    """一次翻译记忆命中。exact 为 True 表示忽略空白后原文完全一致。"""
+
+    source: str
+    translation: str
+    score: float
+    exact: bool
+
+
+class TranslationMemory:
+    """按目标语言分桶的翻译记忆。
+
+    · 精确匹配：忽略空白后的原文 → 条目，dict 查找 O(1)
+    · 模糊匹配：每种语言一个字符二元组倒排索引，按 Dice 系数取最相近条目
+
+    同一原文重复写入时以最新的翻译为准。
+    """
+
+    def __init__(self):
+        self._entries: dict[int, tuple[str, str]] = {}   # id → (原文, 译文)
+        self._exact: dict[tuple[str, str], int] = {}     # (语言, 精确匹配键) → id
+        self._indexes: dict[str, NGramIndex] = {}        # 语言 → n-gram 索引
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @classmethod
+    def from_history(
+        cls, records: Iterable[dict], default_language: str
+    ) -> "TranslationMemory":
+        """从历史记录（最旧在前，可为 HistoryManager.iter_snapshot()）构建翻译记忆。
+
+        旧版本记录没有 target_language 字段；此前应用同一时间只支持一种
+        目标语言，因此按当前配置的目标语言归档。
+        """
+        tm = cls()
+        for rec in records:
+            translated = rec.get("translated_text", "")
+            source = rec.get("optimized_text", "") or rec.get("asr_text", "")
+            if translated and source:
+                tm.add(
+                    source,
+                    translated,
+                    rec.get("target_language") or default_language,
+                )
+            # 多语言翻译的其余语言
+            if source:
+                for language, text in rec.get("translations", {}).items():
+                    tm.add(source, text, language)
+        return tm
+
+    # ── 写入 ──────────────────────────────────────────────
+    def add(self, source: str, translation: str, language: str):
+        key = (language, _exact_key(source))
+        if not key[1] or not translation:
+            return
+        entry_id = self._exact.get(key)
+        if entry_id is None:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._exact[key] = entry_id
+            index = self._indexes.get(language)
+            if index is None:
+                index = self._indexes[language] = NGramIndex()
+            index.add(entry_id, source)
+        self._entries[entry_id] = (source, translation)
+
+    def clear(self):
+        self._entries.clear()
+        self._exact.clear()
+        self._indexes.clear()
+
+    # ── 查询 ──────────────────────────────────────────────
+    def lookup(
+        self, source: str, language: str, min_score: float = 0.6
+    ) -> TMMatch | None:
+        """先精确匹配，再模糊匹配；均未命中返回 None。"""
+        entry_id = self._exact.get((language, _exact_key(source)))
+        if entry_id is not None:
+            src, translation = self._entries[entry_id]
+            return TMMatch(src, translation, 1.0, True)
+
+        index = self._indexes.get(language)
+        if index is None:
+            return None
+        hits = index.similar(source, limit=1, min_score=min_score)
+        if not hits:
+            return None
+        entry_id, score = hits[0]
+        src, translation = self._entries[entry_id]
+        return TMMatch(src, translation, score, False)
@@ -0,0 +1,203 @@
+"""分句流水线翻译 —— 优化结果每出现一个完整句子，就立即发起该句的翻译。
+
+  · 句子按到达顺序编号，最多同时翻译 max_concurrency 句，其余排队
+  · 译文严格按句子顺序输出：队首句子的 token 实时发出，
+    后面句子的 token 先缓存，轮到它时再一次性放出
+  · 长段口述的首个译文 token 只需等待约一个句子的优化 + 翻译时间
+
+对外信号与 LLMWorker 一致，控制器可以像对待普通翻译请求一样接入。
+"""
+
+from collections import deque
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+from core.llm_client import LLMWorker
+from core.sentences import SentenceSplitter
+
+
+class _Segment:
+    """一个句子的翻译状态。"""
+
+    __slots__ = ("source", "buffer", "done", "started", "held", "worker")
+
+    def __init__(self, source: str):
+        self.source = source
+        self.buffer = ""          # 尚未轮到输出时缓存的译文
+        self.done = False
+        self.started = False      # 是否已输出过非空白内容
+        self.held = ""            # 暂扣的尾部空白，后面有内容时再补上
+        self.worker: LLMWorker | None = None
+
+
+class SentenceTranslationPipeline(QObject):
+    """把流式文本切成句子，逐句并发翻译并按顺序拼接输出。
+
+    make_worker(sentence) 返回一个尚未启动的翻译 LLMWorker；
+    lookup(sentence) 可选，返回可直接复用的译文（如翻译记忆精确命中）或 None。
+    """
+
+    chunk_received = Signal(str)
+    finished_text = Signal(str)
+    error = Signal(str)
+
+    def __init__(self, make_worker, max_concurrency: int = 2, lookup=None, parent=None):
+        super().__init__(parent)
+        self._make_worker = make_worker
+        self._lookup = lookup
+        self._max_concurrency = max(1, max_concurrency)
+        self._splitter = SentenceSplitter()
+
+        self._segments: list[_Segment] = []
+        self._queue: deque[int] = deque()
+        self._worker_index: dict[LLMWorker, int] = {}
+        self._active = 0
+        self._head = 0            # 当前正在输出的句子编号
+        self._closed = False
+        self._failed = False
+        self._output = ""
+        self._newline_pending = False
+
+    @property
+    def source_text(self) -> str:
+        """已送入流水线的全部原文。"""
+        return "".join(s.source for s in self._segments) + self._splitter.pending
+
+    # ── 输入 ──────────────────────────────────────────────
+    def feed(self, text: str):
+        """送入一段流式文本，其中已完整的句子立即开始翻译。"""
+        if self._closed or self._failed:
+            return
+        for sentence in self._splitter.feed(text):
+            self._submit(sentence)
+
+    def close(self):
+        """输入结束：剩余不完整的尾句也送去翻译，全部完成后发出 finished_text。"""
+        if self._closed or self._failed:
+            return
+        rest = self._splitter.flush()
+        if rest:
+            self._submit(rest)
+        self._closed = True
+        self._maybe_finish()
+
+    def cancel(self):
+        """中止所有翻译请求，之后不再发出任何信号。"""
+        self._failed = True
+        self._queue.clear()
+        for seg in self._segments:
+            if seg.worker is not None:
+                seg.worker.cancel()
+
+    def workers(self) -> list[LLMWorker]:
+        return [s.worker for s in self._segments if s.worker is not None]
+
+    # ── 调度 ──────────────────────────────────────────────
+    def _submit(self, sentence: str):
+        index = len(self._segments)
+        seg = _Segment(sentence)
+        self._segments.append(seg)
+
+        cached = None
+        if sentence.strip() and self._lookup is not None:
+            cached = self._lookup(sentence.strip())
+        if not sentence.strip() or cached is not None:
+            seg.buffer = cached or ""
+            self._on_segment_done(index)
+            return
+        self._queue.append(index)
+        self._start_queued()
+
+    def _start_queued(self):
+        while self._queue and self._active < self._max_concurrency:
+            index = self._queue.popleft()
+            seg = self._segments[index]
+            seg.worker = self._make_worker(seg.source.strip())
+            # 连接到本对象的槽（而非 lambda），保证回调在 GUI 线程执行
+            self._worker_index[seg.worker] = index
+            seg.worker.chunk_received.connect(self._on_chunk)
+            seg.worker.finished_text.connect(self._on_done)
+            seg.worker.error.connect(self._on_error)
+            self._active += 1
+            seg.worker.start()
+
+    # ── 译文 ──────────────────────────────────────────────
+    @Slot(str)
+    def _on_chunk(self, text: str):
+        index = self._worker_index.get(self.sender())
+        if self._failed or index is None:
+            return
+        if index == self._head:
+            self._emit(self._segments[index], text)
+        else:
+            self._segments[index].buffer += text
+
+    @Slot(str)
+    def _on_done(self, full_text: str):
+        index = self._worker_index.get(self.sender())
+        if self._failed or index is None:
+            return
+        self._active -= 1
+        seg = self._segments[index]
+        if index != self._head:
+            # 以完整结果为准（流式增量偶有丢失时仍能拼出正确译文）
+            seg.buffer = full_text
+        self._on_segment_done(index)
+        self._start_queued()
+
+    def _on_segment_done(self, index: int):
+        self._segments[index].done = True
+        while self._head < len(self._segments):
+            head = self._segments[self._head]
+            # 轮到输出的句子先放出缓存的译文（包括直接命中翻译记忆、
+            # 提交时就已完成的句子），完成后再轮到下一句
+            if head.buffer:
+                self._emit(head, head.buffer)
+                head.buffer = ""
+            if not head.done:
+                break
+            if head.source.rstrip(" \t").endswith("\n"):
+                self._newline_pending = True
+            self._head += 1
+        self._maybe_finish()
+
+    def _emit(self, seg: _Segment, text: str):
+        if not seg.started:
+            text = text.lstrip()
+            if not text:
+                return
+            seg.started = True
+            text = self._separator(text[0]) + text
+            self._newline_pending = False
+        body = text.rstrip()
+        if not body:
+            seg.held += text
+            return
+        out = seg.held + body
+        seg.held = text[len(body):]
+        self._output += out
+        self.chunk_received.emit(out)
+
+    def _separator(self, first_char: str) -> str:
+        """句子之间的分隔：原文换行保留换行，西文之间补一个空格。"""
+        if not self._output:
+            return ""
+        if self._newline_pending:
+            return "\n"
+        last_char = self._output[-1]
+        if last_char.isascii() and first_char.isascii():
+            return " "
+        return ""
+
+    # ── 结束 / 出错 ──────────────────────────────────────
+    def _maybe_finish(self):
+        if self._closed and not self._failed and self._head >= len(self._segments):
+            self._failed = True  # 只结束一次
+            self.finished_text.emit(self._output)
+
+    @Slot(str)
+    def _on_error(self, err: str):
+        if self._failed:
+            return
+        self.cancel()
+        self.error.emit(err)
@@ -0,0 +1,191 @@
+"""用量统计 —— 记录每次会话的 token / 音频时长消耗，按天、按模型汇总并折算费用。
+
+  · SessionUsage：一次会话（一次按键）内所有 ASR / LLM 请求的用量，
+    结束后随历史记录一起保存（record["usage"]）
+  · UsageLedger：按天累计的用量账本，存储在 %APPDATA%/MouthWrite/usage.json，
+    不受历史记录条数上限影响，用于预算告警
+
+用量字典格式::
+
+    {
+        "llm": {"deepseek-chat": {"requests": 2, "prompt_tokens": 900,
+                                  "cached_tokens": 640, "completion_tokens": 120}},
+        "asr": {"qwen3-asr-flash": {"requests": 1, "audio_seconds": 6.4}},
+        "cost": 0.0021
+    }
+
+价格（usage.prices）按模型配置，单位为每百万 token / 每分钟音频::
+
+    {"deepseek-chat": {"prompt": 2.0, "cached": 0.5, "completion": 8.0},
+     "qwen3-asr-flash": {"audio_minute": 0.0132}}
+"""
+
+import json
+import os
+from datetime import date, timedelta
+from pathlib import Path
+
+from core.persistence import background_writer
+
+_LLM_FIELDS = ("requests", "prompt_tokens", "cached_tokens", "completion_tokens")
+_ASR_FIELDS = ("requests", "audio_seconds")
+
+
+def parse_usage(usage: dict) -> dict:
+    """把 OpenAI 兼容接口返回的 usage 统一为 prompt / cached / completion 三项。
+
+    缓存命中数：OpenAI / vLLM 放在 prompt_tokens_details.cached_tokens，
+    DeepSeek 使用 prompt_cache_hit_tokens。
+    """
+    details = usage.get("prompt_tokens_details") or {}
+    cached = details.get("cached_tokens")
+    if cached is None:
+        cached = usage.get("prompt_cache_hit_tokens", 0)
+    return {
+        "prompt_tokens": int(usage.get("prompt_tokens") or 0),
+        "cached_tokens": int(cached or 0),
+        "completion_tokens": int(usage.get("completion_tokens") or 0),
+    }
+
+
+def usage_cost(usage: dict, prices: dict) -> float:
+    """按价格表折算费用；未配置价格的模型不计费。"""
+    cost = 0.0
+    for model, u in usage.get("llm", {}).items():
+        p = prices.get(model) or {}
+        cached = u.get("cached_tokens", 0)
+        uncached = max(u.get("prompt_tokens", 0) - cached, 0)
+        cost += (
+            uncached * p.get("prompt", 0.0)
+            + cached * p.get("cached", p.get("prompt", 0.0))
+            + u.get("completion_tokens", 0) * p.get("completion", 0.0)
+        ) / 1_000_000
+    for model, u in usage.get("asr", {}).items():
+        p = prices.get(model) or {}
+        cost += u.get("audio_seconds", 0.0) / 60 * p.get("audio_minute", 0.0)
+    return cost
+
+
+def total_tokens(usage: dict) -> int:
+    return sum(
+        u.get("prompt_tokens", 0) + u.get("completion_tokens", 0)
+        for u in usage.get("llm", {}).values()
+    )
+
+
+def _merge(into: dict, usage: dict):
+    """把 usage 累加到 into（同为用量字典格式）。"""
+    for kind, fields in (("llm", _LLM_FIELDS), ("asr", _ASR_FIELDS)):
+        for model, u in usage.get(kind, {}).items():
+            slot = into.setdefault(kind, {}).setdefault(model, {})
+            for f in fields:
+                if f in u:
+                    slot[f] = slot.get(f, 0) + u[f]
+    into["cost"] = into.get("cost", 0.0) + usage.get("cost", 0.0)
+
+
+class SessionUsage:
+    """一次会话的用量累计。
+
+    会话可能分多次结束（如优化完成后再点击翻译），commit() 每次只取出
+    上次提交以来新增的部分记入账本，to_dict() 返回整个会话的累计。
+    """
+
+    def __init__(self):
+        self._pending: dict = {}
+        self._total: dict = {}
+
+    def add_llm(self, model: str, usage: dict):
+        u = parse_usage(usage)
+        u["requests"] = 1
+        _merge(self._pending, {"llm": {model: u}})
+
+    def add_asr(self, model: str, audio_seconds: float):
+        _merge(
+            self._pending,
+            {"asr": {model: {"requests": 1, "audio_seconds": round(audio_seconds, 2)}}},
+        )
+
+    def commit(self, prices: dict) -> dict | None:
+        """取出新增用量（含按 prices 折算的 cost）并计入会话累计；无新增时返回 None。"""
+        pending, self._pending = self._pending, {}
+        if not pending.get("llm") and not pending.get("asr"):
+            return None
+        pending["cost"] = round(usage_cost(pending, prices), 6)
+        _merge(self._total, pending)
+        return pending
+
+    def to_dict(self) -> dict:
+        """整个会话已提交的累计用量。"""
+        return json.loads(json.dumps(self._total))
+
+
+class UsageLedger:
+    """按天累计的用量账本。"""
+
+    def __init__(self):
+        self._path = self._get_path()
+        self._days: dict[str, dict] = {}
+        self._load()
+
+    @staticmethod
+    def _get_path() -> Path:
+        app_dir = Path(os.environ.get("APPDATA", ".")) / "MouthWrite"
+        app_dir.mkdir(parents=True, exist_ok=True)
+        return app_dir / "usage.json"
+
+    def _load(self):
+        background_writer().flush()
+        if self._path.exists():
+            try:
+                with open(self._path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    self._days = data
+            except (json.JSONDecodeError, OSError):
+                self._days = {}
+
+    def _save(self):
+        background_writer().replace(
+            self._path, json.dumps(self._days, ensure_ascii=False, indent=2)
+        )
+
+    # ── 公共接口 ──────────────────────────────────────────
+    def add(self, usage: dict, day: str | None = None):
+        """累加一次会话的新增用量（usage 为 SessionUsage.commit() 的结果）。"""
+        day = day or date.today().isoformat()
+        _merge(self._days.setdefault(day, {}), usage)
+        self._save()
+
+    def day(self, day: str | None = None) -> dict:
+        """某一天（默认今天）的汇总用量。"""
+        return self._days.get(day or date.today().isoformat(), {})
+
+    def days(self) -> dict[str, dict]:
+        """全部按天汇总（日期升序）。"""
+        return dict(sorted(self._days.items()))
+
+    def since(self, days: int) -> dict[str, dict]:
+        """最近若干天（含今天）的按天汇总（日期升序）。"""
+        cutoff = (date.today() - timedelta(days=days - 1)).isoformat()
+        return {day: u for day, u in self.days().items() if day >= cutoff}
+
+    def by_model(self) -> dict[str, dict]:
+        """按模型汇总全部日期的用量。"""
+        totals: dict[str, dict] = {}
+        for usage in self._days.values():
+            for kind in ("llm", "asr"):
+                for model, u in usage.get(kind, {}).items():
+                    slot = totals.setdefault(model, {})
+                    for f, v in u.items():
+                        slot[f] = slot.get(f, 0) + v
+        return totals
+
+    def average_prompt_tokens(self, model: str, days: int = 7) -> float:
+        """最近若干天（含今天）每次请求的平均 prompt token 数，用于收紧历史上下文预算。"""
+        requests = prompt = 0
+        for usage in self.since(days).values():
+            u = usage.get("llm", {}).get(model, {})
+            requests += u.get("requests", 0)
+            prompt += u.get("prompt_tokens", 0)
+        return prompt / requests if requests else 0.0
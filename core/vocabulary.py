@@ -0,0 +1,173 @@
+"""个人词表 —— 从历史记录中挖掘常用术语与 ASR 纠错对，作为紧凑的 prompt 上下文。
+
+相比直接粘贴整句历史记录，词表只保留真正影响识别质量的信息：
+  · 术语：优化结果中反复出现的英文 / 数字混排词（vLLM、WSL2、GPT-4 ...）
+    以及纠错对的正确写法（多为中文专有名词）
+  · 纠错对：ASR 原文 → 优化结果之间的短片段替换（威廉 → vLLM）
+"""
+
+import difflib
+import re
+import threading
+from collections import Counter
+from collections.abc import Iterable
+
+from core.llm_client import estimate_tokens
+from core.text_index import normalize_text
+
+# 英文术语：字母开头，可含数字与 . + # - _，如 vLLM、WSL2、GPT-4、C++、Node.js
+_TERM_RE = re.compile(r"[A-Za-z][A-Za-z0-9.+#_\-]*[A-Za-z0-9+#]|[A-Z]")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be but by do for from has have i if in is it me my no not "
+    "of on or so that the this to was we what with you your ok yes".split()
+)
+
+# 纠错片段的长度上限：过长的替换通常是整句改写而不是误识别
+_MAX_FRAGMENT = 12
+
+# 口头禅 / 语气词：优化时被删除或替换，不构成纠错
+_FILLERS = frozenset("嗯 啊 呃 额 哦 那个 就是 就是说 然后 对吧 其实 这个".split())
+
+
+def extract_terms(text: str) -> set[str]:
+    """提取文本中的英文 / 数字混排术语（去重）。"""
+    return {
+        t for t in _TERM_RE.findall(text)
+        if t.lower() not in _STOPWORDS and (len(t) > 1 or t.isupper())
+    }
+
+
+def extract_corrections(asr_text: str, optimized_text: str) -> list[tuple[str, str]]:
+    """对比 ASR 原文与优化结果，提取短片段替换 (误识别, 正确写法)。
+
+    忽略仅有空白 / 标点 / 大小写差异的替换，以及口头禅的删改。
+    """
+    if not asr_text or not optimized_text or asr_text == optimized_text:
+        return []
+    matcher = difflib.SequenceMatcher(None, asr_text, optimized_text, autojunk=False)
+    pairs = []
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op != "replace":
+            continue
+        wrong = asr_text[i1:i2].strip()
+        right = optimized_text[j1:j2].strip()
+        if not wrong or not right:
+            continue
+        if len(wrong) > _MAX_FRAGMENT or len(right) > _MAX_FRAGMENT:
+            continue
+        if wrong in _FILLERS:
+            continue
+        norm_wrong, norm_right = normalize_text(wrong), normalize_text(right)
+        if not norm_wrong or not norm_right or norm_wrong == norm_right:
+            continue
+        pairs.append((wrong, right))
+    return pairs
+
+
+def build_hotword_context(
+    glossary: list[str], terms: list[str], token_budget: int = 0
+) -> str:
+    """生成 ASR 热词上下文：用户词表优先，其次是历史高频术语，按预算截断。"""
+    picked: list[str] = []
+    used = 0
+    for term in dict.fromkeys(t.strip() for t in [*glossary, *terms]):
+        if not term:
+            continue
+        cost = estimate_tokens(term) + 1
+        if token_budget and used + cost > token_budget:
+            break
+        picked.append(term)
+        used += cost
+    return "、".join(picked)
+
+
+class PersonalVocabulary:
+    """按出现次数排序的个人词表，支持批量挖掘与逐条增量更新。
+
+    线程安全：批量挖掘可在后台线程进行，同时 GUI 线程继续增量写入。
+    version 在每次内容变化时递增，调用方可据此缓存派生结果。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._terms: Counter = Counter()
+        self._corrections: Counter = Counter()
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    # ── 构建 ──────────────────────────────────────────────
+    def add_record(self, record: dict):
+        """从一条历史记录中挖掘术语与纠错对。"""
+        asr = record.get("asr_text", "")
+        optimized = record.get("optimized_text", "")
+        terms = extract_terms(optimized)
+        corrections = extract_corrections(asr, optimized)
+        if not terms and not corrections:
+            return
+        with self._lock:
+            self._terms.update(terms)
+            for wrong, right in corrections:
+                self._corrections[(wrong, right)] += 1
+                # 纠错后的正确写法本身就是值得记住的专有名词
+                if right not in terms:
+                    self._terms[right] += 1
+            self._version += 1
+
+    def add_records(self, records: Iterable[dict]):
+        """批量挖掘（顺序无关）。先在局部统计，完成后一次性合并，
+        期间 GUI 线程的增量写入不受影响、也不会丢失。"""
+        batch = PersonalVocabulary()
+        for rec in records:
+            batch.add_record(rec)
+        with self._lock:
+            self._terms.update(batch._terms)
+            self._corrections.update(batch._corrections)
+            self._version += 1
+
+    def add_records_async(self, records: Iterable[dict]) -> threading.Thread:
+        """在后台线程中批量挖掘（records 可为惰性迭代器，在该线程中遍历），返回线程对象。"""
+        thread = threading.Thread(
+            target=self.add_records, args=(records,), daemon=True
+        )
+        thread.start()
+        return thread
+
+    # ── 查询 ──────────────────────────────────────────────
+    def top_terms(self, n: int) -> list[str]:
+        with self._lock:
+            return [t for t, _ in self._terms.most_common(n)]
+
+    def top_corrections(self, n: int) -> list[tuple[str, str]]:
+        with self._lock:
+            return [pair for pair, _ in self._corrections.most_common(n)]
+
+    def prompt_text(self, token_budget: int = 0) -> str:
+        """生成注入 prompt 的紧凑文本；token_budget 为 0 表示不限。
+
+        纠错对比术语更能直接减少误识别，因此优先占用预算。
+        """
+        corrections = [f"{w} → {r}" for w, r in self.top_corrections(50)]
+        terms = self.top_terms(80)
+
+        lines: list[str] = []
+        used = 0
+        for label, items, sep in (
+            ("纠错：", corrections, "；"),
+            ("术语：", terms, "、"),
+        ):
+            picked: list[str] = []
+            cost = estimate_tokens(label)
+            for item in items:
+                item_cost = estimate_tokens(item) + 1
+                if token_budget and used + cost + item_cost > token_budget:
+                    break
+                picked.append(item)
+                cost += item_cost
+            if picked:
+                lines.append(label + sep.join(picked))
+                used += cost
+        return "\n".join(lines)
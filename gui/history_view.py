@@ -0,0 +1,296 @@
+"""历史记录列表 —— 设置对话框“历史记录”Tab 使用的模型 / 视图实现。
+
+旧实现为每条记录创建一张 QWidget 卡片（若干 QLabel + 按钮），打开对话框时同步
+全部创建，记录一多对话框就要数秒才能出现。现在改为：
+  · HistoryListModel：QAbstractListModel，按页（_PAGE_SIZE 条）向 HistoryManager
+    取记录，滚动到底部时由视图通过 canFetchMore / fetchMore 再取下一页
+  · HistoryItemDelegate：直接绘制卡片（时间、复制按钮、优化结果、译文），
+    只有可见行会被绘制，不创建任何子控件
+  · 行高按（记录 id, 可用宽度）缓存，宽度不变时滚动与重绘不再重新排版文本
+"""
+
+from collections.abc import Callable
+
+from PySide6.QtCore import (
+    QAbstractListModel,
+    QEvent,
+    QModelIndex,
+    QRect,
+    QSize,
+    Qt,
+    QTimer,
+    Signal,
+)
+from PySide6.QtGui import QColor, QCursor, QFont, QFontMetrics, QPainter
+from PySide6.QtWidgets import QListView, QStyle, QStyledItemDelegate
+
+# 每次向 HistoryManager 取的记录数
+_PAGE_SIZE = 100
+
+# 卡片布局（与旧版卡片一致）
+_CARD_SPACING = 4            # 卡片之间的间距
+_PAD_X = 10
+_PAD_Y = 8
+_LINE_GAP = 4                # 卡片内各行之间的间距
+_BTN_PAD_X = 10
+_BTN_PAD_Y = 4
+
+_COLOR_CARD = QColor("#313244")
+_COLOR_TIME = QColor("#6c7086")
+_COLOR_TEXT = QColor("#cdd6f4")
+_COLOR_TRANS = QColor("#a6e3a1")
+_COLOR_SEP = QColor("#45475a")
+_COLOR_BTN = QColor("#45475a")
+_COLOR_BTN_HOVER = QColor("#585b70")
+
+# 复制后按钮显示“已复制”的时长
+_COPIED_MS = 1500
+
+
+def copy_text_of(record: dict) -> str:
+    """复制按钮对应的文本：有翻译时优先译文，否则为优化结果。"""
+    return record.get("translated_text") or record.get("optimized_text", "")
+
+
+def _pixel_font(base: QFont, px: int) -> QFont:
+    font = QFont(base)
+    font.setPixelSize(px)
+    return font
+
+
+# ═══════════════════════════════════════════════════════════════
+#  HistoryListModel — 分页懒加载的记录列表
+# ═══════════════════════════════════════════════════════════════
+class HistoryListModel(QAbstractListModel):
+    """记录来源由 set_source(total, fetch_page) 指定：
+
+      total                      → 记录总数（最新在前）
+      fetch_page(offset, limit)  → 第 offset 条起最多 limit 条记录
+
+    完整历史与搜索结果共用同一个模型，切换时整体重置。
+    """
+
+    RecordRole = Qt.ItemDataRole.UserRole + 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: list[dict] = []
+        self._total = 0
+        self._fetch_page: Callable[[int, int], list[dict]] = lambda offset, limit: []
+
+    def set_source(self, total: int, fetch_page: Callable[[int, int], list[dict]]):
+        self.beginResetModel()
+        self._rows = []
+        self._total = total
+        self._fetch_page = fetch_page
+        self.endResetModel()
+        # 先取第一页，视图随后按需调用 fetchMore
+        if self.canFetchMore(QModelIndex()):
+            self.fetchMore(QModelIndex())
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    # ── QAbstractListModel ───────────────────────────────────
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and len(self._rows) < self._total
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        offset = len(self._rows)
+        page = self._fetch_page(offset, min(_PAGE_SIZE, self._total - offset))
+        if not page:
+            # 来源比预期的少（例如记录在打开期间被清空），不再继续取
+            self._total = offset
+            return
+        self.beginInsertRows(QModelIndex(), offset, offset + len(page) - 1)
+        self._rows.extend(page)
+        self.endInsertRows()
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._rows):
+            return None
+        record = self._rows[index.row()]
+        if role == self.RecordRole:
+            return record
+        if role == Qt.ItemDataRole.DisplayRole:
+            return copy_text_of(record)
+        return None
+
+    def flags(self, index: QModelIndex):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled
+
+
+# ═══════════════════════════════════════════════════════════════
+#  HistoryItemDelegate — 绘制单张记录卡片
+# ═══════════════════════════════════════════════════════════════
+class HistoryItemDelegate(QStyledItemDelegate):
+    copy_requested = Signal(str)   # 点击卡片右上角“复制”，参数为要复制的文本
+
+    def __init__(self, view: QListView):
+        super().__init__(view)
+        self._view = view
+        base = view.font()
+        self._time_font = _pixel_font(base, 11)
+        self._btn_font = _pixel_font(base, 11)
+        self._text_font = _pixel_font(base, 13)
+        self._time_fm = QFontMetrics(self._time_font)
+        self._btn_fm = QFontMetrics(self._btn_font)
+        self._text_fm = QFontMetrics(self._text_font)
+        # (记录 id, 文本宽度) → 行高
+        self._heights: dict[tuple[int, int], int] = {}
+        # 正在显示“已复制”的记录 id
+        self._copied: set[int] = set()
+
+    def clear_cache(self):
+        """模型重置后调用，丢弃已缓存的行高。"""
+        self._heights.clear()
+
+    # ── 布局 ─────────────────────────────────────────────────
+    def _text_width(self) -> int:
+        return max(self._view.viewport().width() - 2 * _PAD_X - 4, 40)
+
+    def _wrapped_height(self, text: str, width: int) -> int:
+        rect = self._text_fm.boundingRect(
+            QRect(0, 0, width, 1 << 20), Qt.TextFlag.TextWordWrap, text
+        )
+        return rect.height()
+
+    def _header_height(self) -> int:
+        return max(self._time_fm.height(), self._btn_fm.height() + 2 * _BTN_PAD_Y)
+
+    def _button_rect(self, card: QRect, record: dict) -> QRect:
+        label = "已复制" if record.get("id") in self._copied else "复制"
+        w = self._btn_fm.horizontalAdvance(label) + 2 * _BTN_PAD_X
+        h = self._btn_fm.height() + 2 * _BTN_PAD_Y
+        return QRect(card.right() - _PAD_X - w + 1, card.top() + _PAD_Y, w, h)
+
+    def sizeHint(self, option, index: QModelIndex) -> QSize:
+        record = index.data(HistoryListModel.RecordRole) or {}
+        width = self._text_width()
+        key = (record.get("id"), width)
+        height = self._heights.get(key)
+        if height is None:
+            height = 2 * _PAD_Y + self._header_height()
+            opt = record.get("optimized_text", "")
+            if opt:
+                height += _LINE_GAP + self._wrapped_height(opt, width)
+            trans = record.get("translated_text", "")
+            if trans:
+                height += 2 * _LINE_GAP + 1 + self._wrapped_height(trans, width)
+            height += _CARD_SPACING
+            self._heights[key] = height
+        return QSize(self._view.viewport().width(), height)
+
+    # ── 绘制 ─────────────────────────────────────────────────
+    def paint(self, painter: QPainter, option, index: QModelIndex):
+        record = index.data(HistoryListModel.RecordRole)
+        if record is None:
+            return
+        card = option.rect.adjusted(0, 0, -4, -_CARD_SPACING)
+        # 与 sizeHint 使用同一宽度排版，保证绘制高度与缓存的行高一致
+        width = self._text_width()
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(_COLOR_CARD)
+        painter.drawRoundedRect(card, 6, 6)
+
+        # 第一行：时间 ... 复制按钮
+        header_h = self._header_height()
+        painter.setFont(self._time_font)
+        painter.setPen(_COLOR_TIME)
+        painter.drawText(
+            QRect(card.left() + _PAD_X, card.top() + _PAD_Y, width, header_h),
+            Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+            record.get("time", ""),
+        )
+
+        btn = self._button_rect(card, record)
+        copied = record.get("id") in self._copied
+        hovered = (
+            not copied
+            and bool(option.state & QStyle.StateFlag.State_MouseOver)
+            and btn.contains(self._view.viewport().mapFromGlobal(QCursor.pos()))
+        )
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(_COLOR_BTN_HOVER if hovered else _COLOR_BTN)
+        painter.drawRoundedRect(btn, 4, 4)
+        painter.setFont(self._btn_font)
+        painter.setPen(_COLOR_TIME if copied else _COLOR_TEXT)
+        painter.drawText(btn, Qt.AlignmentFlag.AlignCenter, "已复制" if copied else "复制")
+
+        y = card.top() + _PAD_Y + header_h
+        painter.setFont(self._text_font)
+
+        # 优化后文本
+        opt = record.get("optimized_text", "")
+        if opt:
+            y += _LINE_GAP
+            h = self._wrapped_height(opt, width)
+            painter.setPen(_COLOR_TEXT)
+            painter.drawText(
+                QRect(card.left() + _PAD_X, y, width, h),
+                Qt.TextFlag.TextWordWrap, opt,
+            )
+            y += h
+
+        # 翻译文本
+        trans = record.get("translated_text", "")
+        if trans:
+            y += _LINE_GAP
+            painter.fillRect(QRect(card.left() + _PAD_X, y, width, 1), _COLOR_SEP)
+            y += 1 + _LINE_GAP
+            h = self._wrapped_height(trans, width)
+            painter.setPen(_COLOR_TRANS)
+            painter.drawText(
+                QRect(card.left() + _PAD_X, y, width, h),
+                Qt.TextFlag.TextWordWrap, trans,
+            )
+        painter.restore()
+
+    # ── 复制按钮 ─────────────────────────────────────────────
+    def editorEvent(self, event, model, option, index: QModelIndex) -> bool:
+        record = index.data(HistoryListModel.RecordRole)
+        if record is None:
+            return False
+        card = option.rect.adjusted(0, 0, -4, -_CARD_SPACING)
+        btn = self._button_rect(card, record)
+        etype = event.type()
+        if etype == QEvent.Type.MouseMove:
+            viewport = self._view.viewport()
+            if btn.contains(event.position().toPoint()):
+                viewport.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
+            else:
+                viewport.unsetCursor()
+            viewport.update(option.rect)
+            return False
+        if (
+            etype == QEvent.Type.MouseButtonRelease
+            and event.button() == Qt.MouseButton.LeftButton
+            and btn.contains(event.position().toPoint())
+        ):
+            self._mark_copied(record.get("id"))
+            self.copy_requested.emit(copy_text_of(record))
+            return True
+        return False
+
+    def _mark_copied(self, record_id):
+        if record_id in self._copied:
+            return
+        self._copied.add(record_id)
+        self._view.viewport().update()
+
+        def _restore():
+            self._copied.discard(record_id)
+            self._view.viewport().update()
+
+        QTimer.singleShot(_COPIED_MS, _restore)
@@ -32,6 +32,8 @@ _LINE_HEIGHT = 160
 #  TextBlock — 单段文本（标题 + 内容 + 可选"已复制"）
 # ═══════════════════════════════════════════════════════════════
 class TextBlock(QWidget):
+    copy_clicked = Signal()
+
     STYLES = {
         "asr":       {"color": "#7f849c", "title": "原始转录"},
         "optimize":  {"color": "#89b4fa", "title": "优化结果"},
@@ -42,9 +44,16 @@ class TextBlock(QWidget):
     _PADDING_V = 6       # 上下内边距
     _TITLE_SPACING = 4   # 标题与正文间距
 
-    def __init__(self, block_type: str, parent=None):
+    def __init__(
+        self,
+        block_type: str,
+        parent=None,
+        title: str | None = None,
+        copyable: bool = False,
+    ):
         super().__init__(parent)
-        s = self.STYLES.get(block_type, self.STYLES["asr"])
+        # 多语言翻译块的键形如 "translate:Japanese"，样式取冒号前的类型
+        s = self.STYLES.get(block_type.split(":", 1)[0], self.STYLES["asr"])
         self.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Minimum)
 
         lay = QVBoxLayout(self)
@@ -54,7 +63,7 @@ class TextBlock(QWidget):
         # 标题行：标题 ... 已复制
         title_row = QHBoxLayout()
         title_row.setSpacing(8)
-        title = QLabel(s["title"])
+        title = QLabel(title or s["title"])
         title.setStyleSheet(
             f"color: {s['color']}; font-size: 11px; font-weight: bold;"
             " background: transparent;"
@@ -71,6 +80,18 @@ class TextBlock(QWidget):
         self._copied_label.setFixedHeight(self._TITLE_H)
         self._copied_label.hide()
         title_row.addWidget(self._copied_label)
+
+        if copyable:
+            copy_btn = QPushButton("复制")
+            copy_btn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
+            copy_btn.setFixedHeight(self._TITLE_H)
+            copy_btn.setStyleSheet(
+                "QPushButton { color: #a6adc8; font-size: 11px; border: none;"
+                " background: transparent; padding: 0 2px; }"
+                " QPushButton:hover { color: #cdd6f4; }"
+            )
+            copy_btn.clicked.connect(self.copy_clicked.emit)
+            title_row.addWidget(copy_btn)
         lay.addLayout(title_row)
 
         # 正文 — 使用 RichText 以支持自定义 line-height
@@ -149,6 +170,7 @@ class TextBlock(QWidget):
 class FloatingWindow(QWidget):
     translate_clicked = Signal()
     window_closed = Signal()
+    block_copy_requested = Signal(str)   # 块内"复制"按钮，参数为块名
 
     STATE_LISTENING = "listening"
     STATE_RECOGNIZING = "recognizing"
@@ -305,7 +327,13 @@ class FloatingWindow(QWidget):
     # ═══════════════════════════════════════════════════════
     #  Block 管理
     # ═══════════════════════════════════════════════════════
-    def add_block(self, block_type: str) -> TextBlock:
+    def add_block(
+        self,
+        block_type: str,
+        title: str | None = None,
+        copyable: bool = False,
+    ) -> TextBlock:
+        """添加一个文本块；title 覆盖默认标题，copyable 时标题行带"复制"按钮。"""
         if self._blocks:
             div = QFrame(self)
             div.setFixedHeight(1)
@@ -313,12 +341,19 @@ class FloatingWindow(QWidget):
             self._blocks_layout.addWidget(div)
             self._dividers.append(div)
 
-        block = TextBlock(block_type, self)
+        block = TextBlock(block_type, self, title=title, copyable=copyable)
+        if copyable:
+            block.copy_clicked.connect(
+                lambda: self.block_copy_requested.emit(block_type)
+            )
         self._blocks[block_type] = block
         self._blocks_layout.addWidget(block)
         self._defer_reflow()
         return block
 
+    def has_block(self, block_type: str) -> bool:
+        return block_type in self._blocks
+
     def append_to_block(self, block_type: str, text: str):
         block = self._blocks.get(block_type)
         if block:
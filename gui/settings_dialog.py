@@ -1,7 +1,9 @@
 """设置对话框 —— 通用 / 语音识别 / 大模型 / 翻译 / 历史记录 五个 Tab。"""
 
+import re
 import sys
 import winreg
+from datetime import datetime
 from pathlib import Path
 
 from PySide6.QtWidgets import (
@@ -17,16 +19,22 @@ from PySide6.QtWidgets import (
     QPushButton,
     QTabWidget,
     QWidget,
-    QScrollArea,
-    QFrame,
+    QListView,
     QSpinBox,
     QMessageBox,
+    QProgressBar,
+    QFileDialog,
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer, Signal
 from PySide6.QtGui import QCursor, QGuiApplication
 
 from config import Config
 from core.history import HistoryManager
+from core.history_io import read_records, write_records
+from core.llm_router import endpoint_stats
+from core.reoptimize import ReoptimizeJob
+from core.usage import UsageLedger, total_tokens
+from gui.history_view import HistoryItemDelegate, HistoryListModel
 
 
 # ── 样式常量 ─────────────────────────────────────────────────────────
@@ -85,10 +93,23 @@ QTabBar::tab:selected {
     background: #45475a;
     color: #cdd6f4;
 }
-QScrollArea {
+QListView {
     background: transparent;
     border: none;
 }
+QProgressBar {
+    background-color: #313244;
+    color: #cdd6f4;
+    border: none;
+    border-radius: 4px;
+    text-align: center;
+    font-size: 11px;
+    max-height: 14px;
+}
+QProgressBar::chunk {
+    background-color: #89b4fa;
+    border-radius: 4px;
+}
 QScrollBar:vertical {
     background: transparent; width: 6px;
 }
@@ -117,10 +138,10 @@ QPushButton {
 QPushButton:hover { background-color: #74c7ec; }
 """
 
-_BTN_COPY_STYLE = """
+_BTN_SMALL_STYLE = """
 QPushButton {
     background-color: #45475a; color: #cdd6f4; border: none;
-    border-radius: 4px; padding: 4px 10px; font-size: 11px;
+    border-radius: 6px; padding: 6px 16px; font-size: 12px;
 }
 QPushButton:hover { background-color: #585b70; }
 """
@@ -133,6 +154,13 @@ QPushButton {
 QPushButton:hover { background-color: #585b70; }
 """
 
+# 历史上下文注入方式：(显示文本, 配置值)
+_CONTEXT_MODES = [
+    ("相关历史记录", "relevant"),
+    ("最近历史记录", "recent"),
+    ("个人词表（术语 + 纠错）", "vocabulary"),
+]
+
 _STARTUP_RUN_KEY = r"Software\\Microsoft\\Windows\\CurrentVersion\\Run"
 _STARTUP_APP_NAME = "MouthWrite"
 
@@ -140,10 +168,29 @@ _STARTUP_APP_NAME = "MouthWrite"
 class SettingsDialog(QDialog):
     """可配置项设置对话框。"""
 
-    def __init__(self, config: Config | None = None, parent=None):
+    # 历史记录被导入 / 清空（记录可能已重新编号），由历史派生的数据需要重建
+    history_replaced = Signal()
+
+    # 搜索结果最多显示的条数
+    _SEARCH_LIMIT = 200
+    # 导入 / 导出文件类型
+    _HISTORY_FILE_FILTER = "JSON Lines (*.jsonl);;CSV (*.csv)"
+
+    def __init__(
+        self,
+        config: Config | None = None,
+        reoptimizer: ReoptimizeJob | None = None,
+        history: HistoryManager | None = None,
+        usage_ledger: UsageLedger | None = None,
+        parent=None,
+    ):
         super().__init__(parent)
         self._config = config or Config()
-        self._history = HistoryManager()
+        # 与控制器共用同一份历史记录（单独运行对话框时才自行加载）
+        self._history = history or HistoryManager.from_config(self._config)
+        self._usage_ledger = usage_ledger or UsageLedger()
+        # 批量重新优化任务由控制器持有
+        self._reoptimizer = reoptimizer
         self.setWindowTitle("MouthWrite 设置")
         self.setMinimumSize(560, 440)
         self.setStyleSheet(_DIALOG_STYLE)
@@ -183,6 +230,12 @@ class SettingsDialog(QDialog):
 
         self._startup_chk = QCheckBox("开机自启")
         form_general.addRow("启动选项:", self._startup_chk)
+
+        self._stream_paste_chk = QCheckBox("优化结果逐句直接输入到目标窗口（无需点击粘贴）")
+        form_general.addRow("流式输入:", self._stream_paste_chk)
+
+        self._pipelined_chk = QCheckBox("处理中可直接开始下一段录音（上一段转入后台）")
+        form_general.addRow("连续口述:", self._pipelined_chk)
         tabs.addTab(tab_general, "通用")
 
         # ────────── 语音识别 ──────────
@@ -203,6 +256,25 @@ class SettingsDialog(QDialog):
         self._asr_key.setPlaceholderText("EMPTY")
         form_asr.addRow("API Key:", self._asr_key)
 
+        self._asr_glossary = QLineEdit()
+        self._asr_glossary.setPlaceholderText("产品名、人名等，用逗号分隔")
+        form_asr.addRow("热词:", self._asr_glossary)
+
+        self._audio_archive_chk = QCheckBox("保存每段录音（压缩存储，相同录音只存一份）")
+        form_asr.addRow("录音归档:", self._audio_archive_chk)
+
+        self._audio_archive_mb = QSpinBox()
+        self._audio_archive_mb.setRange(0, 1024 * 1024)
+        self._audio_archive_mb.setSingleStep(256)
+        self._audio_archive_mb.setSuffix(" MB")
+        self._audio_archive_mb.setSpecialValueText("不限")
+        form_asr.addRow("录音归档上限:", self._audio_archive_mb)
+
+        asr_tip = QLabel("热词与历史记录中的常用术语会一并发送给 ASR，减少专有名词误识别。")
+        asr_tip.setStyleSheet("color: #6c7086; font-size: 12px; padding-top: 4px;")
+        asr_tip.setWordWrap(True)
+        form_asr.addRow("", asr_tip)
+
         tabs.addTab(tab_asr, "语音识别")
 
         # ────────── 大模型 ──────────
@@ -229,11 +301,45 @@ class SettingsDialog(QDialog):
         self._ctx_count.setSuffix(" 条")
         form_llm.addRow("历史上下文条数:", self._ctx_count)
 
-        tip = QLabel("留空 API Key 则跳过文字优化；上下文条数为 0 则不注入历史。")
+        self._ctx_budget = QSpinBox()
+        self._ctx_budget.setRange(0, 8000)
+        self._ctx_budget.setSingleStep(100)
+        self._ctx_budget.setSuffix(" tokens")
+        form_llm.addRow("历史上下文预算:", self._ctx_budget)
+
+        self._ctx_mode_combo = QComboBox()
+        for label, mode in _CONTEXT_MODES:
+            self._ctx_mode_combo.addItem(label, mode)
+        form_llm.addRow("历史上下文方式:", self._ctx_mode_combo)
+
+        self._keepalive_chk = QCheckBox("空闲时为本地模型保活（仅 localhost / 内网地址）")
+        form_llm.addRow("本地模型:", self._keepalive_chk)
+
+        tip = QLabel(
+            "留空 API Key 则跳过文字优化；上下文条数为 0 则不注入历史，"
+            "预算为 0 则不限制长度。"
+        )
         tip.setStyleSheet("color: #6c7086; font-size: 12px; padding-top: 4px;")
         tip.setWordWrap(True)
         form_llm.addRow("", tip)
 
+        # 配置了备用端点时，本次运行中各端点的首 token 延迟，便于调整端点顺序与对冲时限
+        self._endpoint_stats_label = QLabel("")
+        self._endpoint_stats_label.setStyleSheet("color: #6c7086; font-size: 12px;")
+        self._endpoint_stats_label.setWordWrap(True)
+        self._endpoint_stats_label.setTextInteractionFlags(
+            Qt.TextInteractionFlag.TextSelectableByMouse
+        )
+        form_llm.addRow("端点统计:", self._endpoint_stats_label)
+
+        self._usage_label = QLabel("")
+        self._usage_label.setStyleSheet("color: #6c7086; font-size: 12px;")
+        self._usage_label.setWordWrap(True)
+        self._usage_label.setTextInteractionFlags(
+            Qt.TextInteractionFlag.TextSelectableByMouse
+        )
+        form_llm.addRow("用量统计:", self._usage_label)
+
         tabs.addTab(tab_llm, "大模型")
 
         # ────────── 提示词 ──────────
@@ -276,6 +382,12 @@ class SettingsDialog(QDialog):
         ])
         form_trans.addRow("翻译目标语言:", self._trans_lang)
 
+        self._trans_langs = QLineEdit()
+        self._trans_langs.setPlaceholderText(
+            "如 English, Japanese；留空则只翻译为上面的目标语言"
+        )
+        form_trans.addRow("同时翻译为:", self._trans_langs)
+
         tip2 = QLabel("翻译功能复用大模型配置，点击转录窗口的翻译按钮触发。")
         tip2.setStyleSheet("color: #6c7086; font-size: 12px; padding-top: 4px;")
         form_trans.addRow("", tip2)
@@ -294,7 +406,29 @@ class SettingsDialog(QDialog):
         count_label.setStyleSheet("color: #6c7086; font-size: 12px;")
         self._hist_count_label = count_label
         top_row.addWidget(count_label)
-        top_row.addStretch()
+
+        self._hist_search = QLineEdit()
+        self._hist_search.setPlaceholderText("搜索原文 / 优化结果 / 译文")
+        self._hist_search.setClearButtonEnabled(True)
+        top_row.addWidget(self._hist_search, stretch=1)
+        # 输入停顿后再检索，连续输入时不重复刷新列表
+        self._hist_search_timer = QTimer(self)
+        self._hist_search_timer.setSingleShot(True)
+        self._hist_search_timer.setInterval(150)
+        self._hist_search_timer.timeout.connect(self._populate_history)
+        self._hist_search.textChanged.connect(self._hist_search_timer.start)
+
+        btn_export = QPushButton("导出")
+        btn_export.setStyleSheet(_BTN_SMALL_STYLE)
+        btn_export.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
+        btn_export.clicked.connect(self._on_export_history)
+        top_row.addWidget(btn_export)
+
+        btn_import = QPushButton("导入")
+        btn_import.setStyleSheet(_BTN_SMALL_STYLE)
+        btn_import.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
+        btn_import.clicked.connect(self._on_import_history)
+        top_row.addWidget(btn_import)
 
         btn_clear = QPushButton("清空历史")
         btn_clear.setStyleSheet(_BTN_DANGER_STYLE)
@@ -303,21 +437,29 @@ class SettingsDialog(QDialog):
         top_row.addWidget(btn_clear)
         hist_lay.addLayout(top_row)
 
-        # 滚动列表
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        scroll.setHorizontalScrollBarPolicy(
+        # 批量重新优化：修改规则 / 更换模型后用当前配置重新优化
+        if self._reoptimizer is not None:
+            hist_lay.addLayout(self._build_reoptimize_row())
+
+        # 记录列表：模型 / 委托绘制，只渲染可见行，滚动到底部时再分页取记录
+        self._hist_view = QListView()
+        self._hist_view.setHorizontalScrollBarPolicy(
             Qt.ScrollBarPolicy.ScrollBarAlwaysOff
         )
-
-        self._hist_inner = QWidget()
-        self._hist_inner.setStyleSheet("background: transparent;")
-        self._hist_layout = QVBoxLayout(self._hist_inner)
-        self._hist_layout.setContentsMargins(0, 0, 4, 0)
-        self._hist_layout.setSpacing(4)
-        self._hist_layout.addStretch()
-        scroll.setWidget(self._hist_inner)
-        hist_lay.addWidget(scroll, stretch=1)
+        self._hist_view.setVerticalScrollMode(
+            QListView.ScrollMode.ScrollPerPixel
+        )
+        self._hist_view.setResizeMode(QListView.ResizeMode.Adjust)
+        self._hist_view.setSelectionMode(QListView.SelectionMode.NoSelection)
+        self._hist_view.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self._hist_view.setMouseTracking(True)
+        self._hist_model = HistoryListModel(self._hist_view)
+        self._hist_delegate = HistoryItemDelegate(self._hist_view)
+        self._hist_delegate.copy_requested.connect(self._copy_text)
+        self._hist_model.modelAboutToBeReset.connect(self._hist_delegate.clear_cache)
+        self._hist_view.setModel(self._hist_model)
+        self._hist_view.setItemDelegate(self._hist_delegate)
+        hist_lay.addWidget(self._hist_view, stretch=1)
 
         tabs.addTab(tab_history, "历史记录")
 
@@ -349,126 +491,250 @@ class SettingsDialog(QDialog):
             c.get("hotkey_translate_modifier", "ctrl_r")
         )
         self._startup_chk.setChecked(bool(c.get("startup.enabled", False)))
+        self._stream_paste_chk.setChecked(bool(c.get("paste.streaming", False)))
+        self._pipelined_chk.setChecked(bool(c.get("session.pipelined", True)))
+        self._keepalive_chk.setChecked(bool(c.get("keepalive.enabled", False)))
         self._asr_url.setText(c.get("asr.base_url", ""))
         self._asr_model.setText(c.get("asr.model", ""))
         self._asr_key.setText(c.get("asr.api_key", ""))
+        self._asr_glossary.setText(", ".join(c.get("asr.glossary", []) or []))
+        self._audio_archive_chk.setChecked(bool(c.get("audio_archive.enabled", False)))
+        self._audio_archive_mb.setValue(c.get("audio_archive.max_mb", 1024))
         self._llm_url.setText(c.get("llm.base_url", ""))
         self._llm_model.setText(c.get("llm.model", ""))
         self._llm_key.setText(c.get("llm.api_key", ""))
         self._optimize_rules.setPlainText(c.get("optimize.rules", ""))
         self._ctx_count.setValue(c.get("history.context_count", 5))
+        self._ctx_budget.setValue(c.get("history.context_token_budget", 600))
+        idx = self._ctx_mode_combo.findData(c.get("history.context_mode", "relevant"))
+        self._ctx_mode_combo.setCurrentIndex(max(idx, 0))
         self._trans_lang.setCurrentText(
             c.get("translation.target_language", "English")
         )
+        self._trans_langs.setText(
+            ", ".join(c.get("translation.target_languages", []) or [])
+        )
+        self._endpoint_stats_label.setText(self._format_endpoint_stats())
+        self._usage_label.setText(self._format_usage())
         self._populate_history()
 
+    @staticmethod
+    def _format_endpoint_stats() -> str:
+        lines = []
+        for key, stats in endpoint_stats().items():
+            line = f"{key}：{stats['count']} 次"
+            if stats["count"]:
+                line += (
+                    f"，首 token 中位 {stats['p50_ms']:.0f} ms"
+                    f" / 最慢 {stats['max_ms']:.0f} ms"
+                )
+            if stats["errors"]:
+                line += f"，出错 {stats['errors']} 次"
+            if stats["hedged_out"]:
+                line += f"，对冲落败 {stats['hedged_out']} 次"
+            lines.append(line)
+        return "\n".join(lines) or "本次运行尚无多端点请求（仅在配置了备用端点时统计）"
+
+    def _format_usage(self) -> str:
+        """今日 / 近 7 天的合计，与各模型的累计用量（来自用量账本）。"""
+        ledger = self._usage_ledger
+        if not ledger.days():
+            return "尚无用量记录"
+        today = ledger.day()
+        week = list(ledger.since(7).values())
+        lines = [
+            f"今日 {total_tokens(today):,} tokens，费用 {today.get('cost', 0.0):.4f}",
+            f"近 7 天 {sum(total_tokens(u) for u in week):,} tokens，"
+            f"费用 {sum(u.get('cost', 0.0) for u in week):.4f}",
+        ]
+        for model, u in ledger.by_model().items():
+            if "audio_seconds" in u:
+                lines.append(
+                    f"{model}：{u.get('requests', 0)} 次，"
+                    f"音频 {u['audio_seconds'] / 60:.1f} 分钟"
+                )
+                continue
+            line = (
+                f"{model}：{u.get('requests', 0)} 次，"
+                f"prompt {u.get('prompt_tokens', 0):,}"
+                f"（缓存 {u.get('cached_tokens', 0):,}）"
+                f" / 输出 {u.get('completion_tokens', 0):,} tokens"
+            )
+            average = ledger.average_prompt_tokens(model)
+            if average:
+                line += f"，近 7 天平均 prompt {average:.0f}"
+            lines.append(line)
+        return "\n".join(lines)
+
     def _on_save(self):
-        c = self._config
-        c.set("hotkey", self._hotkey_combo.currentText())
-        c.set(
-            "hotkey_translate_modifier",
-            self._translate_modifier_combo.currentText(),
-        )
-        c.set("startup.enabled", self._startup_chk.isChecked())
+        # 一次写入配置文件；各组件按变化的键自行更新。任一项校验不通过时
+        # 整个事务回滚，对话框保持打开
+        try:
+            self._save_to_config()
+        except ValueError as e:
+            QMessageBox.warning(self, "保存设置", f"设置未保存：{e}")
+            return
+        # 注册表等外部副作用只在配置提交成功后执行
         self._apply_startup_setting(self._startup_chk.isChecked())
-        c.set("asr.base_url", self._asr_url.text().strip())
-        c.set("asr.model", self._asr_model.text().strip())
-        c.set("asr.api_key", self._asr_key.text().strip())
-        c.set("llm.base_url", self._llm_url.text().strip())
-        c.set("llm.model", self._llm_model.text().strip())
-        c.set("llm.api_key", self._llm_key.text())
-        c.set("optimize.rules", self._optimize_rules.toPlainText().strip())
-        c.set("history.context_count", self._ctx_count.value())
-        c.set("translation.target_language",
-              self._trans_lang.currentText().strip())
         self.accept()
 
+    def _save_to_config(self):
+        c = self._config
+        with c.transaction():
+            c.set("hotkey", self._hotkey_combo.currentText())
+            c.set(
+                "hotkey_translate_modifier",
+                self._translate_modifier_combo.currentText(),
+            )
+            c.set("startup.enabled", self._startup_chk.isChecked())
+            c.set("paste.streaming", self._stream_paste_chk.isChecked())
+            c.set("session.pipelined", self._pipelined_chk.isChecked())
+            c.set("keepalive.enabled", self._keepalive_chk.isChecked())
+            c.set("asr.base_url", self._asr_url.text().strip())
+            c.set("asr.model", self._asr_model.text().strip())
+            c.set("asr.api_key", self._asr_key.text().strip())
+            c.set("asr.glossary", [
+                term.strip()
+                for term in re.split(r"[,，、]", self._asr_glossary.text())
+                if term.strip()
+            ])
+            c.set("audio_archive.enabled", self._audio_archive_chk.isChecked())
+            c.set("audio_archive.max_mb", self._audio_archive_mb.value())
+            c.set("llm.base_url", self._llm_url.text().strip())
+            c.set("llm.model", self._llm_model.text().strip())
+            c.set("llm.api_key", self._llm_key.text())
+            c.set("optimize.rules", self._optimize_rules.toPlainText().strip())
+            c.set("history.context_count", self._ctx_count.value())
+            c.set("history.context_token_budget", self._ctx_budget.value())
+            c.set("history.context_mode", self._ctx_mode_combo.currentData())
+            c.set("translation.target_language",
+                  self._trans_lang.currentText().strip())
+            c.set("translation.target_languages", [
+                lang.strip()
+                for lang in re.split(r"[,，、]", self._trans_langs.text())
+                if lang.strip()
+            ])
+
     # ── 历史记录 Tab ─────────────────────────────────────────────────
     def _populate_history(self):
-        """填充历史记录列表。"""
-        # 清除旧条目（保留末尾的 stretch）
-        while self._hist_layout.count() > 1:
-            item = self._hist_layout.takeAt(0)
-            w = item.widget()
-            if w:
-                w.deleteLater()
-
-        records = self._history.get_all()
-        self._hist_count_label.setText(f"共 {len(records)} 条记录")
-
-        for rec in records:
-            card = self._make_history_card(rec)
-            idx = self._hist_layout.count() - 1  # 插到 stretch 之前
-            self._hist_layout.insertWidget(idx, card)
-
-    def _make_history_card(self, rec: dict) -> QWidget:
-        """创建一条历史记录卡片。"""
-        card = QWidget()
-        card.setStyleSheet(
-            "background-color: #313244; border-radius: 6px;"
-        )
-        lay = QVBoxLayout(card)
-        lay.setContentsMargins(10, 8, 10, 8)
-        lay.setSpacing(4)
-
-        # 第一行：时间 ... 复制按钮
-        top = QHBoxLayout()
-        time_lbl = QLabel(rec.get("time", ""))
-        time_lbl.setStyleSheet("color: #6c7086; font-size: 11px;")
-        top.addWidget(time_lbl)
-        top.addStretch()
-
-        btn_copy = QPushButton("复制")
-        btn_copy.setStyleSheet(_BTN_COPY_STYLE)
-        btn_copy.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
-        # 复制优化后文本（如有翻译则优先翻译）
-        text_to_copy = rec.get("translated_text") or rec.get(
-            "optimized_text", ""
-        )
-        btn_copy.clicked.connect(
-            lambda checked=False, t=text_to_copy: self._copy_text(t, btn_copy)
-        )
-        top.addWidget(btn_copy)
-        lay.addLayout(top)
-
-        # 优化后文本
-        opt = rec.get("optimized_text", "")
-        if opt:
-            opt_lbl = QLabel(opt)
-            opt_lbl.setWordWrap(True)
-            opt_lbl.setStyleSheet(
-                "color: #cdd6f4; font-size: 13px; background: transparent;"
-            )
-            lay.addWidget(opt_lbl)
-
-        # 翻译文本
-        trans = rec.get("translated_text", "")
-        if trans:
-            sep = QFrame()
-            sep.setFixedHeight(1)
-            sep.setStyleSheet("background-color: #45475a;")
-            lay.addWidget(sep)
-
-            trans_lbl = QLabel(trans)
-            trans_lbl.setWordWrap(True)
-            trans_lbl.setStyleSheet(
-                "color: #a6e3a1; font-size: 13px; background: transparent;"
+        """刷新历史记录列表（完整历史按页懒加载，搜索结果一次取回）。"""
+        query = self._hist_search.text().strip()
+        if query:
+            records = self._history.search(query, self._SEARCH_LIMIT)
+            more = "+" if len(records) >= self._SEARCH_LIMIT else ""
+            self._hist_count_label.setText(f"找到 {len(records)}{more} 条")
+            self._hist_model.set_source(
+                len(records),
+                lambda offset, limit: records[offset:offset + limit],
             )
-            lay.addWidget(trans_lbl)
-
-        return card
+        else:
+            total = self._history.count()
+            self._hist_count_label.setText(f"共 {total} 条记录")
+            self._hist_model.set_source(total, self._history.get_page)
+        self._hist_view.scrollToTop()
 
     @staticmethod
-    def _copy_text(text: str, btn: QPushButton):
-        """复制文本到剪贴板，按钮短暂显示"已复制"。"""
+    def _copy_text(text: str):
+        """复制文本到剪贴板（卡片上的"已复制"提示由委托绘制）。"""
         clipboard = QGuiApplication.clipboard()
         if clipboard:
             clipboard.setText(text)
-        old = btn.text()
-        btn.setText("已复制")
-        btn.setEnabled(False)
-        from PySide6.QtCore import QTimer
-        QTimer.singleShot(1500, lambda: (btn.setText(old), btn.setEnabled(True)))
+
+    # ── 批量重新优化 ─────────────────────────────────────────────────
+    def _build_reoptimize_row(self) -> QHBoxLayout:
+        row = QHBoxLayout()
+        row.addWidget(QLabel("重新优化:"))
+
+        self._reopt_count = QSpinBox()
+        self._reopt_count.setRange(1, 100000)
+        self._reopt_count.setValue(50)
+        self._reopt_count.setPrefix("最近 ")
+        self._reopt_count.setSuffix(" 条")
+        self._reopt_count.setToolTip("有搜索词时改为处理搜索结果")
+        row.addWidget(self._reopt_count)
+
+        self._reopt_btn = QPushButton("开始")
+        self._reopt_btn.setStyleSheet(_BTN_SMALL_STYLE)
+        self._reopt_btn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
+        self._reopt_btn.clicked.connect(self._on_reoptimize_clicked)
+        row.addWidget(self._reopt_btn)
+
+        self._reopt_cancel_btn = QPushButton("放弃")
+        self._reopt_cancel_btn.setStyleSheet(_BTN_DANGER_STYLE)
+        self._reopt_cancel_btn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
+        self._reopt_cancel_btn.clicked.connect(self._reoptimizer.cancel)
+        row.addWidget(self._reopt_cancel_btn)
+
+        self._reopt_progress = QProgressBar()
+        self._reopt_progress.setFormat("%v / %m")
+        row.addWidget(self._reopt_progress, stretch=1)
+
+        self._reopt_status = QLabel("")
+        self._reopt_status.setStyleSheet("color: #6c7086; font-size: 12px;")
+        row.addWidget(self._reopt_status)
+
+        self._reoptimizer.progress.connect(self._refresh_reoptimize)
+        self._reoptimizer.state_changed.connect(self._on_reoptimize_state)
+        self._refresh_reoptimize()
+        return row
+
+    def _on_reoptimize_clicked(self):
+        job = self._reoptimizer
+        c = self._config
+        concurrency = c.get("reoptimize.concurrency", 2)
+        per_minute = c.get("reoptimize.requests_per_minute", 30)
+        if job.state == ReoptimizeJob.RUNNING:
+            job.pause()
+            return
+        if job.state == ReoptimizeJob.PAUSED:
+            job.resume(concurrency, per_minute)
+            return
+        if not c.get("llm.api_key", ""):
+            QMessageBox.information(self, "重新优化", "请先在“大模型”页配置 API Key。")
+            return
+        query = self._hist_search.text().strip()
+        if query:
+            records = self._history.search(query, self._SEARCH_LIMIT)
+        else:
+            records = self._history.get_page(0, self._reopt_count.value())
+        if not records:
+            return
+        reply = QMessageBox.question(
+            self,
+            "重新优化",
+            f"用当前规则与模型重新优化{'搜索到的' if query else '最近的'} "
+            f"{len(records)} 条记录？原优化结果将被替换。",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No,
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            job.start([r["id"] for r in records], concurrency, per_minute)
+
+    def _refresh_reoptimize(self, *_):
+        job = self._reoptimizer
+        self._reopt_btn.setText(
+            {ReoptimizeJob.RUNNING: "暂停", ReoptimizeJob.PAUSED: "继续"}.get(job.state, "开始")
+        )
+        self._reopt_cancel_btn.setVisible(job.state != ReoptimizeJob.IDLE)
+        self._reopt_count.setEnabled(job.state == ReoptimizeJob.IDLE)
+        self._reopt_progress.setVisible(job.total > 0)
+        self._reopt_progress.setMaximum(max(job.total, 1))
+        self._reopt_progress.setValue(job.done)
+        failed = f"，失败 {job.failed} 条" if job.failed else ""
+        if job.state == ReoptimizeJob.RUNNING:
+            self._reopt_status.setText(f"进行中{failed}")
+        elif job.state == ReoptimizeJob.PAUSED:
+            self._reopt_status.setText(f"已暂停，剩余 {job.remaining} 条{failed}")
+        elif job.total:
+            self._reopt_status.setText(f"已完成{failed}")
+        else:
+            self._reopt_status.setText("")
+
+    def _on_reoptimize_state(self, state: str):
+        self._refresh_reoptimize()
+        if state == ReoptimizeJob.IDLE:
+            # 结果已写入共用的历史记录，刷新列表即可
+            self._populate_history()
 
     def _on_clear_history(self):
         reply = QMessageBox.question(
@@ -481,6 +747,51 @@ class SettingsDialog(QDialog):
         if reply == QMessageBox.StandardButton.Yes:
             self._history.clear()
             self._populate_history()
+            self.history_replaced.emit()
+
+    def _on_export_history(self):
+        default = Path.home() / f"MouthWrite-history-{datetime.now():%Y%m%d}.jsonl"
+        path, _ = QFileDialog.getSaveFileName(
+            self, "导出历史记录", str(default), self._HISTORY_FILE_FILTER
+        )
+        if not path:
+            return
+        QGuiApplication.setOverrideCursor(QCursor(Qt.CursorShape.WaitCursor))
+        try:
+            count = write_records(self._history.iter_records(), Path(path))
+        except (OSError, ValueError) as e:
+            QGuiApplication.restoreOverrideCursor()
+            QMessageBox.warning(self, "导出历史记录", f"导出失败：{e}")
+            return
+        QGuiApplication.restoreOverrideCursor()
+        QMessageBox.information(self, "导出历史记录", f"已导出 {count} 条记录。")
+
+    def _on_import_history(self):
+        if self._reoptimizer is not None and self._reoptimizer.state != ReoptimizeJob.IDLE:
+            # 导入会重新编号记录，检查点中的记录 id 将失效
+            QMessageBox.warning(
+                self, "导入历史记录", "请先完成或放弃正在进行的重新优化任务。"
+            )
+            return
+        paths, _ = QFileDialog.getOpenFileNames(
+            self, "导入历史记录", str(Path.home()), self._HISTORY_FILE_FILTER
+        )
+        if not paths:
+            return
+        QGuiApplication.setOverrideCursor(QCursor(Qt.CursorShape.WaitCursor))
+        try:
+            added, duplicates = self._history.import_records(
+                [read_records(Path(p)) for p in paths]
+            )
+        except (OSError, ValueError) as e:
+            QGuiApplication.restoreOverrideCursor()
+            QMessageBox.warning(self, "导入历史记录", f"导入失败：{e}")
+            return
+        QGuiApplication.restoreOverrideCursor()
+        self._populate_history()
+        self.history_replaced.emit()
+        skipped = f"，跳过 {duplicates} 条重复记录" if duplicates else ""
+        QMessageBox.information(self, "导入历史记录", f"已导入 {added} 条记录{skipped}。")
 
     # ── 开机自启 ─────────────────────────────────────────────────────
     def _startup_command(self) -> str:
@@ -9,7 +9,9 @@ from PySide6.QtWidgets import QApplication
 from PySide6.QtCore import Qt
 
 from config import Config
+from core.config_watcher import ConfigWatcher
 from core.controller import Controller
+from core.persistence import close_background_writer
 from gui.main_window import FloatingWindow
 from gui.settings_dialog import SettingsDialog
 from gui.tray_icon import TrayIcon
@@ -29,6 +31,8 @@ class MouthWriteApp:
         self._app.setQuitOnLastWindowClosed(False)
 
         self._config = Config()
+        # 外部修改 config.json 后自动重新加载（各组件经配置监听更新）
+        self._config_watcher = ConfigWatcher(self._config)
 
         # 核心组件
         self._window = FloatingWindow()
@@ -48,16 +52,25 @@ class MouthWriteApp:
             2000,
         )
         self._controller.start()
+        self._config_watcher.start()
 
     # ── 托盘操作 ─────────────────────────────────────────────────────
     def _show_settings(self):
-        dialog = SettingsDialog(self._config)
-        if dialog.exec():
-            # 设置保存成功，通知控制器更新热键
-            self._controller.update_hotkey()
+        # 保存后由各组件的配置监听自行更新（热键、端点、翻译记忆等）
+        dialog = SettingsDialog(
+            self._config,
+            self._controller.reoptimizer,
+            self._controller.history,
+            self._controller.usage_ledger,
+        )
+        dialog.history_replaced.connect(self._controller.on_history_replaced)
+        dialog.exec()
 
     def _quit(self):
+        self._config_watcher.stop()
         self._controller.stop()
+        # 写完尚在队列中的配置 / 历史 / 用量
+        close_background_writer()
         self._tray.hide()
         self._app.quit()
 
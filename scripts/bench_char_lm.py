@@ -0,0 +1,83 @@
+"""个人字符 n-gram 语言模型基准测试：训练 / 打分吞吐，以及同音替换纠正效果。
+
+用法：
+    python scripts/bench_char_lm.py [训练句子数 ...]
+
+默认依次测试 500 / 5k / 50k 句（500 约为历史记录上限）。语料构造方式与
+bench_text_index.py 相同；纠错测试把句子中的高频词替换成随机“误识别”写法，
+再用 (误识别 → 正确写法) 候选重打分，统计纠正率；同时把候选方向反过来作用于
+正确句子，统计误替换率。
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.char_lm import CharNGramLM  # noqa: E402
+from bench_text_index import _CHARS, build_vocab, make_sentence  # noqa: E402
+
+
+def bench(n: int, rng: random.Random, vocab: list[str], weights: list[float]):
+    corpus = [make_sentence(rng, vocab, weights) for _ in range(n)]
+    chars = sum(len(t) for t in corpus)
+
+    lm = CharNGramLM()
+    t0 = time.perf_counter()
+    lm.train_many(corpus)
+    train_s = time.perf_counter() - t0
+
+    tests = [make_sentence(rng, vocab, weights) for _ in range(500)]
+    t0 = time.perf_counter()
+    for t in tests:
+        lm.score(t)
+    score_s = time.perf_counter() - t0
+    score_chars = sum(len(t) for t in tests)
+
+    # 纠错对：高频多字词 → 同长度的随机误识别写法
+    frequent = [w for w in vocab[:400] if len(w) >= 2][:50]
+    pairs = [(("".join(rng.choices(_CHARS, k=len(w)))), w) for w in frequent]
+
+    fixed = total = 0
+    wrongly = clean_total = 0
+    samples = []
+    for wrong, right in pairs:
+        for t in tests:
+            if right not in t:
+                continue
+            noisy = t.replace(right, wrong)
+            begin = time.perf_counter()
+            out, _ = lm.rescore(noisy, pairs)
+            samples.append((time.perf_counter() - begin) * 1000)
+            total += 1
+            fixed += out == t
+            # 反向候选作用于正确句子：不应被替换成误识别写法
+            out, applied = lm.rescore(t, [(right, wrong)])
+            clean_total += 1
+            wrongly += bool(applied)
+    samples.sort() if samples else None
+
+    print(f"\n== {n:,} 句（{chars:,} 字） ==")
+    print(f"  训练      {chars / train_s / 1000:,.0f} k 字/s   共 {train_s * 1000:.0f} ms")
+    print(f"  打分      {score_chars / score_s / 1000:,.0f} k 字/s")
+    if samples:
+        avg = sum(samples) / len(samples)
+        p99 = samples[int(len(samples) * 0.99) - 1]
+        print(f"  重打分    avg {avg:.3f} ms   p99 {p99:.3f} ms（{len(pairs)} 个候选）")
+        print(f"  纠正率    {fixed / total:.1%}（{total} 例）")
+        print(f"  误替换率  {wrongly / clean_total:.1%}（{clean_total} 例）")
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [500, 5_000, 50_000]
+    rng = random.Random(42)
+    vocab = build_vocab(rng)
+    weights = [1.0 / (rank + 1) for rank in range(len(vocab))]
+    for n in sizes:
+        bench(n, rng, vocab, weights)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""历史记录存储基准测试：旧版整体重写 JSON 与 JSONL 追加日志对比。
+
+用法：
+    python scripts/bench_history.py [记录数 ...]
+
+默认依次测试 1k / 100k / 1M 条。每种规模测量：
+  · 旧版：在已有 n 条记录的基础上新增一条时，整体重写 history.json（indent=2）的耗时
+  · 追加日志：单次新增 / 单次更新的延迟（avg / p99，各 1000 次）、启动时重放日志、
+    压缩重写的耗时，以及文件大小
+写入由后台写线程落盘（见 core/persistence.py），新增 / 更新 / 重写的计时都包含
+等待写入完成的 flush()，否则只测到了入队的耗时。
+语料构造方式与 bench_text_index.py 相同。
+"""
+
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.history_store import HistoryStore  # noqa: E402
+from bench_text_index import build_vocab, make_sentence  # noqa: E402
+
+_OPS = 1000
+
+
+def make_records(n: int, rng: random.Random, vocab, weights) -> list[dict]:
+    sentences = [make_sentence(rng, vocab, weights) for _ in range(min(n, 5000))]
+    return [
+        {
+            "id": i + 1,
+            "time": "2026-02-07 14:30:00",
+            "asr_text": sentences[i % len(sentences)],
+            "optimized_text": sentences[(i * 7) % len(sentences)],
+        }
+        for i in range(n)
+    ]
+
+
+def _latency(samples: list[float]) -> str:
+    samples.sort()
+    avg = sum(samples) / len(samples)
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    return f"avg {avg:.3f} ms   p99 {p99:.3f} ms"
+
+
+def bench(n: int, rng: random.Random, vocab, weights, workdir: Path):
+    records = make_records(n, rng, vocab, weights)
+    print(f"\n== {n:,} 条 ==")
+
+    legacy = workdir / f"history_{n}.json"
+    t0 = time.perf_counter()
+    with open(legacy, "w", encoding="utf-8") as f:
+        json.dump(records[::-1], f, ensure_ascii=False, indent=2)
+    legacy_ms = (time.perf_counter() - t0) * 1000
+    print(f"  旧版整体重写    每次新增 {legacy_ms:,.1f} ms"
+          f"（{legacy.stat().st_size / 1e6:,.1f} MB）")
+    legacy.unlink()
+
+    store = HistoryStore(workdir / f"history_{n}.jsonl")
+    t0 = time.perf_counter()
+    store.rewrite(records)
+    store.flush()
+    rewrite_ms = (time.perf_counter() - t0) * 1000
+
+    samples = []
+    for i in range(_OPS):
+        rec = dict(records[i % n], id=n + i + 1)
+        t0 = time.perf_counter()
+        store.append(rec)
+        store.flush()
+        samples.append((time.perf_counter() - t0) * 1000)
+    print(f"  追加日志 新增   {_latency(samples)}")
+
+    samples = []
+    for i in range(_OPS):
+        target = rng.randrange(1, n + 1)
+        t0 = time.perf_counter()
+        store.update(target, {"translated_text": "translation", "target_language": "English"})
+        store.flush()
+        samples.append((time.perf_counter() - t0) * 1000)
+    print(f"  追加日志 更新   {_latency(samples)}")
+
+    t0 = time.perf_counter()
+    loaded = store.load()
+    load_ms = (time.perf_counter() - t0) * 1000
+    assert len(loaded) == n + _OPS
+    print(f"  启动重放        {load_ms:,.1f} ms（{store.lines:,} 行，"
+          f"{store.path.stat().st_size / 1e6:,.1f} MB）")
+    print(f"  压缩重写        {rewrite_ms:,.1f} ms")
+    store.path.unlink()
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [1_000, 100_000, 1_000_000]
+    rng = random.Random(42)
+    vocab = build_vocab(rng)
+    weights = [1.0 / (rank + 1) for rank in range(len(vocab))]
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            bench(n, rng, vocab, weights, Path(tmp))
+
+
+if __name__ == "__main__":
+    main()
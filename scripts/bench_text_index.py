@@ -0,0 +1,108 @@
+"""字符 n-gram 索引基准测试：构造类中文语料，测量建索引、相似检索与 BM25 耗时。
+
+用法：
+    python scripts/bench_text_index.py [记录数 ...]
+
+默认依次测试 1k / 10k / 100k 条（含搜索框使用的关键词布尔检索）。语料由 Zipf 分布的“词”拼接而成，
+词由常用汉字随机组合，尽量贴近真实口述文本的 bigram 频率分布。
+"""
+
+import random
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.text_index import NGramIndex  # noqa: E402
+from core.translation_memory import TranslationMemory  # noqa: E402
+
+_CHARS = [chr(c) for c in range(0x4E00, 0x4E00 + 3500)]
+_TERMS = ["vLLM", "CUDA", "Python", "GitHub", "WSL2", "DeepSeek", "Qwen", "API"]
+
+
+def build_vocab(rng: random.Random, size: int = 20000) -> list[str]:
+    vocab = ["".join(rng.choices(_CHARS, k=rng.choice((1, 2, 2, 2, 3, 4))))
+             for _ in range(size)]
+    return vocab + _TERMS
+
+
+def make_sentence(rng: random.Random, vocab: list[str], weights: list[float]) -> str:
+    words = rng.choices(vocab, weights=weights, k=rng.randint(6, 20))
+    return "".join(words) + rng.choice("。？！")
+
+
+def perturb(rng: random.Random, text: str) -> str:
+    """随机替换 / 删除少量字符，模拟“几乎相同”的句子。"""
+    chars = list(text)
+    for _ in range(max(1, len(chars) // 12)):
+        i = rng.randrange(len(chars))
+        if rng.random() < 0.5:
+            chars[i] = rng.choice(_CHARS)
+        else:
+            del chars[i]
+    return "".join(chars)
+
+
+def bench(n: int, rng: random.Random, vocab: list[str], weights: list[float]):
+    corpus = [make_sentence(rng, vocab, weights) for _ in range(n)]
+
+    t0 = time.perf_counter()
+    index = NGramIndex()
+    for i, text in enumerate(corpus):
+        index.add(i, text)
+    build_s = time.perf_counter() - t0
+
+    tm = TranslationMemory()
+    for text in corpus:
+        tm.add(text, "translation", "English")
+
+    near_src = [rng.randrange(n) for _ in range(500)]
+    near = [perturb(rng, corpus[i]) for i in near_src]
+    novel = [make_sentence(rng, vocab, weights) for _ in range(500)]
+    exact = [rng.choice(corpus) for _ in range(500)]
+    # 搜索框关键词：从语料中截取 2~4 字的片段
+    keywords = []
+    for _ in range(500):
+        text = rng.choice(corpus)
+        start = rng.randrange(max(1, len(text) - 4))
+        keywords.append(text[start:start + rng.randint(2, 4)])
+
+    def timed(queries, fn):
+        samples = []
+        for q in queries:
+            t = time.perf_counter()
+            fn(q)
+            samples.append((time.perf_counter() - t) * 1000)
+        samples.sort()
+        return sum(samples) / len(samples), samples[int(len(samples) * 0.99) - 1]
+
+    rows = [
+        ("相近句 similar", timed(near, lambda q: index.similar(q, 1, 0.6))),
+        ("新句子 similar", timed(novel, lambda q: index.similar(q, 1, 0.6))),
+        ("TM 精确命中", timed(exact, lambda q: tm.lookup(q, "English"))),
+        ("TM 相近命中", timed(near, lambda q: tm.lookup(q, "English"))),
+        ("BM25 top-5", timed(novel, lambda q: index.search(q, 5))),
+        ("关键词前 200", timed(keywords, lambda q: list(islice(index.match(q), 200)))),
+    ]
+    found = sum(
+        1 for i, q in zip(near_src, near)
+        if any(doc_id == i for doc_id, _ in index.similar(q, 5, 0.6))
+    )
+    print(f"\n== {n:,} 条  建索引 {build_s:.2f}s  相近句召回 {found / len(near):.1%} ==")
+    for name, (avg, p99) in rows:
+        print(f"  {name:<14} avg {avg:.3f} ms   p99 {p99:.3f} ms")
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    rng = random.Random(42)
+    vocab = build_vocab(rng)
+    weights = [1.0 / (rank + 1) for rank in range(len(vocab))]
+    for n in sizes:
+        bench(n, rng, vocab, weights)
+
+
+if __name__ == "__main__":
+    main()
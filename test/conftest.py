@@ -0,0 +1,22 @@
+"""测试公共设置。
+
+运行：python -m pytest test（在仓库根目录）
+"""
+
+import pytest
+
+from config import Config
+from core.persistence import background_writer
+
+# 需要真实服务 / 录音设备的手动脚本，不作为测试收集
+collect_ignore = ["test_asr.py", "test_flash.py", "client.py"]
+
+
+@pytest.fixture
+def app_dir(tmp_path, monkeypatch):
+    """把 %APPDATA% 指向临时目录，并在前后重置配置单例。"""
+    monkeypatch.setenv("APPDATA", str(tmp_path))
+    monkeypatch.setattr(Config, "_instance", None)
+    yield tmp_path / "MouthWrite"
+    # 后台写线程可能仍在写临时目录中的文件
+    background_writer().flush()
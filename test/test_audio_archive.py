@@ -0,0 +1,93 @@
+"""录音归档：编解码无损，按内容寻址，保存后立即读取也能读到，相同录音只写一次。
+
+运行：python -m pytest test/test_audio_archive.py
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from core import audio_archive
+from core.audio_archive import AudioArchive, decode_pcm, encode_pcm
+
+
+@pytest.mark.parametrize("channels", [1, 2])
+def test_codec_is_lossless(channels):
+    rng = np.random.default_rng(0)
+    pcm = rng.integers(-32768, 32768, size=(4000, channels)).astype(np.int16)
+    # 含满幅跳变：差分需要按 16 位回绕
+    pcm[:4] = [[32767] * channels, [-32768] * channels, [32767] * channels, [0] * channels]
+    decoded = decode_pcm(encode_pcm(pcm), len(pcm), channels)
+    assert decoded.dtype == np.int16
+    assert np.array_equal(decoded, pcm)
+
+
+def test_codec_compresses_speech_like_signal():
+    t = np.arange(16000) / 16000
+    pcm = (3000 * np.sin(2 * np.pi * 220 * t)).astype(np.int16).reshape(-1, 1)
+    assert len(encode_pcm(pcm)) < pcm.nbytes * 0.6
+
+
+def test_codec_handles_empty_recording():
+    pcm = np.zeros((0, 1), dtype=np.int16)
+    assert decode_pcm(encode_pcm(pcm), 0, 1).shape == (0, 1)
+
+
+# ── 归档 ──────────────────────────────────────────────────
+@pytest.fixture
+def archive(tmp_path):
+    return AudioArchive(tmp_path / "audio")
+
+
+def _pcm(seed: int, frames: int = 16000) -> np.ndarray:
+    return np.random.default_rng(seed).integers(-3000, 3000, size=frames).astype(np.int16)
+
+
+def test_load_right_after_store_waits_for_the_write(archive):
+    pcm = _pcm(1)
+    key = archive.store(pcm, 16000)
+    # 不等待后台写入：load() 应等到录音写完
+    loaded = archive.load(key)
+    assert loaded is not None
+    assert np.array_equal(np.asarray(loaded).reshape(-1), pcm)
+    assert archive.info(key) == (16000, 1, len(pcm))
+
+
+def test_identical_recordings_are_written_once(archive, monkeypatch):
+    written = []
+    original = audio_archive.atomic_write
+
+    def counting_write(path, data):
+        written.append(path)
+        original(path, data)
+
+    monkeypatch.setattr(audio_archive, "atomic_write", counting_write)
+    pcm = _pcm(2)
+    keys = {archive.store(pcm, 16000) for _ in range(5)}
+    assert archive.flush(5)
+    assert len(keys) == 1
+    assert len(written) == 1
+    # 已写入的录音再次保存只刷新使用时间
+    archive.store(pcm, 16000)
+    assert archive.flush(5)
+    assert len(written) == 1
+
+
+def test_same_pcm_different_sample_rate_is_a_different_key(archive):
+    pcm = _pcm(3)
+    assert archive.store(pcm, 16000) != archive.store(pcm, 8000)
+    assert archive.flush(5)
+    assert len(list(archive._dir.glob("*.mwa"))) == 2
+
+
+def test_eviction_keeps_total_under_limit(archive):
+    keys = [archive.store(_pcm(seed), 16000) for seed in range(4)]
+    assert archive.flush(5)
+    size = archive.total_bytes() // 4
+    archive.max_bytes = size * 2 + size // 2
+    deadline = time.monotonic() + 5
+    while archive.total_bytes() > archive.max_bytes and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert archive.total_bytes() <= archive.max_bytes
+    assert archive.contains(keys[-1])
@@ -0,0 +1,47 @@
+"""个人字符语言模型：纠错对只在替换后更像用户的常用表达时采用，长度不同的候选不偏向短的一方。
+
+运行：python -m pytest test/test_char_lm.py
+"""
+
+from core.char_lm import CharNGramLM
+
+_CORPUS = ["今天天气很好我们去公园散步吧"] * 50 + ["人工智能正在改变世界"] * 50
+
+
+def _model(buckets: int = 1 << 16) -> CharNGramLM:
+    lm = CharNGramLM(buckets=buckets)
+    lm.train_many(_CORPUS)
+    return lm
+
+
+def test_rescore_applies_familiar_correction():
+    text, applied = _model().rescore("人工只能正在改变世界", [("人工只能", "人工智能")])
+    assert text == "人工智能正在改变世界"
+    assert applied == [("人工只能", "人工智能")]
+
+
+def test_rescore_keeps_text_when_replacement_is_not_better():
+    text = "我们讨论一下银河系统的问题"
+    # 更短的写法不能只因打分的字符更少就胜出
+    assert _model().rescore(text, [("银河系统", "银")]) == (text, [])
+    assert _model().rescore("今天天气很好", [("天气", "天")]) == ("今天天气很好", [])
+
+
+def test_untrained_model_does_nothing():
+    lm = CharNGramLM(buckets=1 << 10)
+    assert lm.rescore("人工只能", [("人工只能", "人工智能")]) == ("人工只能", [])
+
+
+def test_train_many_stops_at_capacity():
+    lm = CharNGramLM(buckets=64)
+    lm.train_many(["一二三四五六七八九十"] * 20)
+    assert lm.capacity == 32
+    assert 32 <= lm.total_chars < 32 + 10
+    lm.train_many(["更多文本"])
+    assert lm.total_chars < 32 + 10
+
+
+def test_train_many_accepts_explicit_capacity():
+    lm = CharNGramLM(buckets=1 << 10)
+    lm.train_many(["一二三四五"] * 10, capacity=10)
+    assert lm.total_chars == 10
@@ -0,0 +1,64 @@
+"""合并模式的流式输出按分隔行拆成优化结果与译文，分隔符被拆在多个增量块中也能识别。
+
+运行：python -m pytest test/test_combined_splitter.py（需要 PySide6 / httpx）
+"""
+
+import pytest
+
+pytest.importorskip("PySide6")
+pytest.importorskip("httpx")
+
+from core.llm_client import OPTIMIZE_TRANSLATE_DELIMITER, CombinedStreamSplitter
+
+
+def _run(chunks: list[str]) -> dict[str, str]:
+    splitter = CombinedStreamSplitter()
+    out = {"optimize": "", "translate": ""}
+    for chunk in chunks:
+        for block, text in splitter.feed(chunk):
+            out[block] += text
+    for block, text in splitter.flush():
+        out[block] += text
+    return out
+
+
+def test_splits_at_delimiter():
+    out = _run([f"你好世界\n{OPTIMIZE_TRANSLATE_DELIMITER}\nHello world"])
+    assert out == {"optimize": "你好世界\n", "translate": "Hello world"}
+
+
+@pytest.mark.parametrize("cut", range(1, len(OPTIMIZE_TRANSLATE_DELIMITER)))
+def test_delimiter_split_across_chunks(cut):
+    d = OPTIMIZE_TRANSLATE_DELIMITER
+    out = _run(["你好", f"世界\n{d[:cut]}", f"{d[cut:]}\n", "Hello", " world"])
+    assert out == {"optimize": "你好世界\n", "translate": "Hello world"}
+
+
+def test_delimiter_prefix_that_is_not_delimiter_is_released():
+    splitter = CombinedStreamSplitter()
+    assert splitter.feed("a <<") == [("optimize", "a ")]
+    assert splitter.feed("b") == [("optimize", "<<b")]
+    assert splitter.block == "optimize"
+
+
+def test_flush_releases_pending_prefix():
+    splitter = CombinedStreamSplitter()
+    assert splitter.feed("结尾<<<") == [("optimize", "结尾")]
+    assert splitter.flush() == [("optimize", "<<<")]
+    assert splitter.flush() == []
+
+
+def test_leading_whitespace_after_delimiter_is_dropped():
+    d = OPTIMIZE_TRANSLATE_DELIMITER
+    splitter = CombinedStreamSplitter()
+    assert splitter.feed(f"文本{d}") == [("optimize", "文本")]
+    assert splitter.block == "translate"
+    assert splitter.feed("\n\n") == []
+    assert splitter.feed("  Text\n") == [("translate", "Text\n")]
+    # 译文开始后的空白原样保留
+    assert splitter.feed("\nMore") == [("translate", "\nMore")]
+
+
+def test_without_delimiter_everything_is_optimize():
+    out = _run(["只有", "优化结果"])
+    assert out == {"optimize": "只有优化结果", "translate": ""}
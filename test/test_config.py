@@ -0,0 +1,115 @@
+"""配置校验与事务：不合法的取值被拒绝，事务整体提交或回滚，只通知一次。
+
+运行：python -m pytest test/test_config.py
+"""
+
+import json
+
+import pytest
+
+from config import DEFAULT_CONFIG, Config, validate_config
+from core.persistence import background_writer
+
+
+def _write_config(app_dir, data: dict):
+    app_dir.mkdir(parents=True, exist_ok=True)
+    (app_dir / "config.json").write_text(json.dumps(data), encoding="utf-8")
+
+
+def test_default_config_is_valid():
+    assert validate_config(DEFAULT_CONFIG) == []
+
+
+@pytest.mark.parametrize(
+    "key, value",
+    [
+        ("history.hot_days", 2.5),       # 整数项不接受小数
+        ("history.hot_days", True),      # bool 是 int 的子类，也要排除
+        ("history.hot_days", -1),
+        ("optimize.rescoring_margin", "2"),
+        ("paste.streaming", 1),
+        ("asr.glossary", "术语"),
+        ("asr.glossary", ["术语", 1]),
+    ],
+)
+def test_set_rejects_invalid_value(app_dir, key, value):
+    config = Config()
+    before = config.get(key)
+    with pytest.raises(ValueError):
+        config.set(key, value)
+    assert config.get(key) == before
+
+
+def test_float_setting_accepts_int(app_dir):
+    config = Config()
+    config.set("optimize.rescoring_margin", 3)
+    assert config.get("optimize.rescoring_margin") == 3
+
+
+def test_unknown_key_is_not_validated(app_dir):
+    config = Config()
+    config.set("experimental.flag", "x")
+    assert config.get("experimental.flag") == "x"
+
+
+def test_transaction_notifies_once_and_persists(app_dir):
+    config = Config()
+    calls = []
+    config.add_listener("history", calls.append)
+    with config.transaction():
+        config.set("history.hot_days", 7)
+        config.set("history.hot_max_records", 100)
+        assert calls == []
+    assert calls == [{"history.hot_days", "history.hot_max_records"}]
+    background_writer().flush()
+    saved = json.loads((app_dir / "config.json").read_text(encoding="utf-8"))
+    assert saved["history"]["hot_days"] == 7
+
+
+def test_transaction_rolls_back_on_invalid_value(app_dir):
+    config = Config()
+    calls = []
+    config.add_listener("history", calls.append)
+    with pytest.raises(ValueError):
+        with config.transaction():
+            config.set("history.hot_days", 7)
+            config.set("history.hot_max_records", 1.5)
+    assert config.get("history.hot_days") == DEFAULT_CONFIG["history"]["hot_days"]
+    assert calls == []
+
+
+def test_invalid_values_in_file_fall_back_to_defaults(app_dir):
+    _write_config(app_dir, {"history": {"hot_days": "30", "context_count": 3}})
+    config = Config()
+    assert config.get("history.hot_days") == DEFAULT_CONFIG["history"]["hot_days"]
+    assert config.get("history.context_count") == 3
+
+
+def test_reload_keeps_config_when_file_is_invalid(app_dir):
+    config = Config()
+    config.set("history.hot_days", 7)
+    background_writer().flush()
+    data = json.loads((app_dir / "config.json").read_text(encoding="utf-8"))
+    data["history"]["hot_days"] = 2.5
+    _write_config(app_dir, data)
+    assert not config.reload()
+    assert config.get("history.hot_days") == 7
+
+
+def test_reload_notifies_changed_keys(app_dir):
+    config = Config()
+    background_writer().flush()
+    calls = []
+    config.add_listener("history", calls.append)
+    data = json.loads((app_dir / "config.json").read_text(encoding="utf-8"))
+    data["history"]["hot_days"] = 9
+    _write_config(app_dir, data)
+    assert config.reload()
+    assert config.get("history.hot_days") == 9
+    assert calls == [{"history.hot_days"}]
+
+
+def test_get_returns_read_only_values(app_dir):
+    config = Config()
+    config.set("asr.glossary", ["术语"])
+    assert config.get("asr.glossary") == ("术语",)
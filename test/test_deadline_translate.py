@@ -0,0 +1,134 @@
+"""超时交付原文后点击翻译：点击粘贴的监听不应被停止，译文完成后仍可点击粘贴。
+
+运行：python -m pytest test/test_deadline_translate.py（仅 Windows，需要 PySide6 / pynput）
+"""
+
+import sys
+
+import pytest
+
+if sys.platform != "win32":
+    pytest.skip("控制器依赖 Windows API", allow_module_level=True)
+pytest.importorskip("PySide6")
+pytest.importorskip("pynput")
+
+from PySide6.QtCore import QObject
+
+import core.controller as controller_module
+from core.controller import Controller
+
+
+class _FakeListener:
+    instances: list["_FakeListener"] = []
+
+    def __init__(self, on_click=None):
+        self.on_click = on_click
+        self.running = False
+        _FakeListener.instances.append(self)
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+
+class _FakeWindow:
+    """只记录调用的悬浮窗替身。"""
+
+    def __init__(self):
+        self.calls: list[str] = []
+
+    def isVisible(self):
+        return True
+
+    def has_block(self, name):
+        return True
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.calls.append(name)
+        return record
+
+
+class _FakeHotkey:
+    def __init__(self):
+        self.dismiss_mode = False
+
+    def set_dismiss_mode(self, enabled):
+        self.dismiss_mode = enabled
+
+
+class _FakeHistory:
+    def add_record(self, asr_text, optimized_text, **kwargs):
+        return {"id": 1, "asr_text": asr_text, "optimized_text": optimized_text}
+
+
+class _FakeConfig:
+    def __init__(self, values):
+        self._values = values
+
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    _FakeListener.instances.clear()
+    monkeypatch.setattr(controller_module.pynput_mouse, "Listener", _FakeListener)
+    ctrl = Controller.__new__(Controller)
+    QObject.__init__(ctrl)
+    ctrl._window = _FakeWindow()
+    ctrl._hotkey = _FakeHotkey()
+    ctrl._history = _FakeHistory()
+    ctrl._config = _FakeConfig({
+        "llm.api_key": "sk-test",
+        "translation.target_language": "English",
+        "translation.memory_enabled": False,
+        "translation.pipeline": False,
+    })
+    ctrl._raw_asr_text = "你好世界"
+    ctrl._optimized_text = ""
+    ctrl._session_audio = ""
+    ctrl._deferred_record_id = None
+    ctrl._session_record_id = None
+    ctrl._deadline_hit = True
+    ctrl._pasted = False
+    ctrl._waiting_paste = False
+    ctrl._mouse_listener = None
+    ctrl._combined_splitter = None
+    ctrl._release_time = 0.0
+    ctrl.clipboard: list[str] = []
+    ctrl._copy_to_clipboard = ctrl.clipboard.append
+    ctrl.llm_requests: list[str] = []
+    ctrl._start_llm_worker = lambda prompt, *callbacks: ctrl.llm_requests.append(prompt)
+    return ctrl
+
+
+def test_translate_after_deadline_keeps_click_to_paste(controller):
+    controller._deliver_deferred()
+    listener = controller._mouse_listener
+    assert listener is not None and listener.running
+    assert controller.clipboard == ["你好世界"]
+
+    controller._on_translate()
+
+    assert controller.llm_requests, "应发起翻译请求"
+    assert controller._mouse_listener is listener
+    assert listener.running
+    assert controller._waiting_paste
+
+
+def test_upgrade_rearms_click_to_paste(controller):
+    controller._deliver_deferred()
+    # 监听已被停止（例如旧版本在点击翻译时关闭了它）
+    controller._mouse_listener.stop()
+    controller._mouse_listener = None
+    controller._waiting_paste = False
+
+    controller._deliver_upgrade("Hello world", "translate")
+
+    assert controller.clipboard[-1] == "Hello world"
+    assert controller._mouse_listener is not None
+    assert controller._mouse_listener.running
+    assert controller._waiting_paste
@@ -0,0 +1,151 @@
+"""历史归档：按月封存、同月合并、分页与搜索（布隆过滤器 + 检索列）都要读到完整的记录。
+
+运行：python -m pytest test/test_history_archive.py
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.history import HistoryManager
+from core.history_archive import ArchiveSegment, HistoryArchive
+
+
+def _records(first_id: int, n: int, month: str, text: str = "记录") -> list[dict]:
+    return [
+        {
+            "id": first_id + i,
+            "time": f"{month}-01 08:{i // 60 % 60:02d}:{i % 60:02d}",
+            "asr_text": f"{text}{first_id + i}",
+            "optimized_text": f"{text}{first_id + i}。",
+        }
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = HistoryArchive(tmp_path / "history")
+    yield archive
+    archive.close()
+
+
+def test_seal_splits_by_month(archive):
+    archive.seal(_records(1, 3, "2026-01") + _records(4, 2, "2026-02"))
+    assert [s.month for s in archive.segments] == ["2026-01", "2026-02"]
+    assert archive.count == 5
+    assert archive.last_id == 5
+
+
+def test_seal_merges_same_month(archive):
+    archive.seal(_records(1, 300, "2026-01"))
+    archive.seal(_records(301, 10, "2026-01"))
+    segments = archive.segments
+    assert len(segments) == 1
+    assert (segments[0].first_id, segments[0].last_id) == (1, 310)
+    assert len(list(archive._dir.glob("*.seg"))) == 1
+
+
+def test_seal_ignores_already_sealed_ids(archive):
+    archive.seal(_records(1, 5, "2026-01"))
+    archive.seal(_records(3, 5, "2026-01"))
+    assert [r["id"] for r in archive.iter_oldest_first()] == list(range(1, 8))
+
+
+def test_get_page_spans_blocks_and_segments(archive):
+    archive.seal(_records(1, 200, "2026-01") + _records(201, 200, "2026-02"))
+    page = archive.get_page(150, 100)
+    assert [r["id"] for r in page] == list(range(250, 150, -1))
+
+
+def test_search_finds_records_in_every_block(archive):
+    records = _records(1, 400, "2026-01")
+    records[10]["translated_text"] = "Needle in the haystack"
+    records[390]["asr_text"] = "找到了大海捞针"
+    archive.seal(records)
+    assert [r["id"] for r in archive.search("needle")] == [11]
+    assert [r["id"] for r in archive.search("海捞")] == [391]
+    # 单字查询走过滤器中的单字
+    assert [r["id"] for r in archive.search("捞")] == [391]
+    assert list(archive.search("不存在的内容")) == []
+
+
+def test_search_returns_newest_first(archive):
+    archive.seal(_records(1, 300, "2026-01", "共同") + _records(301, 5, "2026-02", "共同"))
+    ids = [r["id"] for r in archive.search("共同")]
+    assert ids == list(range(305, 0, -1))
+
+
+def test_reload_drops_segment_contained_in_newer_one(archive):
+    archive.seal(_records(1, 5, "2026-01"))
+    old = archive.segments[0].path
+    # 模拟合并后、删除旧段前退出：旧段文件仍在
+    merged = ArchiveSegment.write(archive._dir, _records(1, 8, "2026-01"))
+    assert old.exists() and merged.exists()
+    archive.reload()
+    assert [s.path for s in archive.segments] == [merged]
+    assert not old.exists()
+
+
+def test_snapshot_survives_merge(archive):
+    archive.seal(_records(1, 5, "2026-01"))
+    copies = archive.snapshot()
+    archive.seal(_records(6, 5, "2026-01"))
+    try:
+        assert [r["id"] for r in copies[0].iter_records()] == [1, 2, 3, 4, 5]
+    finally:
+        for segment in copies:
+            segment.close()
+
+
+# ── HistoryManager：热段 + 归档 ───────────────────────────
+def _fill(history: HistoryManager, n: int, text: str = "条目"):
+    for i in range(n):
+        history.add_record(f"{text}{i}", f"{text}{i}。", f"item {i}", "English")
+    history._finish_seal()
+
+
+@pytest.fixture
+def history(app_dir):
+    return HistoryManager(hot_days=0, hot_max_records=10)
+
+
+def test_old_records_are_sealed(history):
+    _fill(history, 300)
+    assert history.count() == 300
+    assert history._archive.count > 0
+    assert len(history._records) < 300
+
+
+def test_readers_fall_through_to_archive(history):
+    _fill(history, 300)
+    assert [r["id"] for r in history.get_recent(250)] == list(range(300, 50, -1))
+    assert [r["id"] for r in history.get_page(280, 50)] == list(range(20, 0, -1))
+    # 标点在规范化时去掉："条目3" 命中 条目3 与 条目30–39（id 为编号 + 1）
+    assert [r["id"] for r in history.search("条目3")] == list(range(40, 30, -1)) + [4]
+
+
+def test_iter_snapshot_covers_hot_and_archive(history):
+    _fill(history, 300)
+    snapshot = history.iter_snapshot()
+    newest = history.iter_snapshot(newest_first=True)
+    # 快照之后的新增与封存不影响遍历结果
+    _fill(history, 300, "新增")
+    assert [r["id"] for r in snapshot] == list(range(1, 301))
+    assert [r["id"] for r in newest] == list(range(300, 0, -1))
+
+
+def test_hot_window_is_passed_in(app_dir):
+    now = datetime.now()
+    history = HistoryManager(hot_days=0, hot_max_records=0)
+    _fill(history, 5)
+    assert history._archive.count == 0
+    history.set_hot_window(hot_days=0, hot_max_records=2, retention_days=0)
+    history.reload()
+    assert len(history._records) == 2
+    assert history.count() == 5
+    assert history._hot_window()[2] == ""
+    history.set_hot_window(hot_days=30, hot_max_records=0, retention_days=10)
+    hot_days, _, keep_from = history._hot_window()
+    assert hot_days == 10
+    assert keep_from[:10] == (now - timedelta(days=10)).strftime("%Y-%m-%d")
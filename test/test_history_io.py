@@ -0,0 +1,62 @@
+"""历史导入导出：JSONL / CSV 往返不丢字段，按时间归并，内容哈希不看 id 与用量。
+
+运行：python -m pytest test/test_history_io.py
+"""
+
+import pytest
+
+from core.history_io import content_hash, merge_by_time, read_records, write_records
+
+_RECORDS = [
+    {
+        "id": 1,
+        "time": "2026-01-01 08:00:00",
+        "asr_text": "原文，含逗号",
+        "optimized_text": "优化\n两行",
+        "translated_text": "Text",
+        "target_language": "English",
+        "translations": {"English": "Text", "Japanese": "テキスト"},
+        "usage": {"prompt_tokens": 10},
+    },
+    {"id": 2, "time": "2026-01-02 08:00:00", "asr_text": "第二条", "optimized_text": ""},
+]
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".csv"])
+def test_round_trip(tmp_path, suffix):
+    path = tmp_path / f"export{suffix}"
+    assert write_records(iter(_RECORDS), path) == 2
+    records = list(read_records(path))
+    # 导入时丢弃 id、重新编号
+    expected = [{k: v for k, v in r.items() if k != "id"} for r in _RECORDS]
+    assert records == expected
+    assert not path.with_name(path.name + ".tmp").exists()
+
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        write_records([], tmp_path / "export.txt")
+
+
+def test_empty_and_broken_lines_are_skipped(tmp_path):
+    path = tmp_path / "import.jsonl"
+    path.write_text(
+        '{"time": "t", "asr_text": "有内容"}\n\nnot json\n{"time": "t"}\n',
+        encoding="utf-8",
+    )
+    assert [r["asr_text"] for r in read_records(path)] == ["有内容"]
+
+
+def test_merge_by_time_is_stable():
+    a = [{"time": "1", "src": "a"}, {"time": "3", "src": "a"}]
+    b = [{"time": "1", "src": "b"}, {"time": "2", "src": "b"}]
+    assert [(r["time"], r["src"]) for r in merge_by_time(a, b)] == [
+        ("1", "a"), ("1", "b"), ("2", "b"), ("3", "a"),
+    ]
+
+
+def test_content_hash_ignores_id_and_usage():
+    record = _RECORDS[0]
+    other = {**record, "id": 99, "usage": {}}
+    assert content_hash(record) == content_hash(other)
+    assert content_hash(record) != content_hash({**record, "asr_text": "不同"})
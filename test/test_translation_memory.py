@@ -0,0 +1,44 @@
+"""翻译记忆：由历史记录（最旧在前）构建，同一原文以最新译文为准，按目标语言分开。
+
+运行：python -m pytest test/test_translation_memory.py
+"""
+
+from core.translation_memory import TranslationMemory
+
+
+def _record(source: str, translation: str, language: str = "", **extra) -> dict:
+    record = {"optimized_text": source, "translated_text": translation, **extra}
+    if language:
+        record["target_language"] = language
+    return record
+
+
+def test_from_history_keeps_newest_translation():
+    records = [
+        _record("你好世界", "Hi world", "English"),
+        _record("你好世界", "Hello world", "English"),
+    ]
+    tm = TranslationMemory.from_history(iter(records), default_language="English")
+    match = tm.lookup("你好 世界", "English")
+    assert match is not None and match.exact
+    assert match.translation == "Hello world"
+
+
+def test_old_records_use_default_language_and_extra_translations():
+    records = [
+        _record("早上好", "Good morning", translations={"Japanese": "おはよう"}),
+    ]
+    tm = TranslationMemory.from_history(records, default_language="English")
+    assert tm.lookup("早上好", "English").translation == "Good morning"
+    assert tm.lookup("早上好", "Japanese").translation == "おはよう"
+    assert tm.lookup("早上好", "French") is None
+
+
+def test_fuzzy_match_and_punctuation_sensitive_exact_match():
+    tm = TranslationMemory()
+    tm.add("明天下午三点开会", "Meeting at 3 pm tomorrow", "English")
+    fuzzy = tm.lookup("明天下午三点开个会", "English", min_score=0.5)
+    assert fuzzy is not None and not fuzzy.exact
+    # 标点改变语气：只能作为相近命中交给大模型参考，不能本地直出
+    question = tm.lookup("明天下午三点开会？", "English")
+    assert question is not None and not question.exact
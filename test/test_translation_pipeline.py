@@ -0,0 +1,107 @@
+"""分句流水线翻译：译文按句子顺序输出，翻译记忆命中的句子也不能丢。
+
+运行：python -m pytest test/test_translation_pipeline.py（需要 PySide6）
+"""
+
+import pytest
+
+pytest.importorskip("PySide6")
+
+from PySide6.QtCore import QObject, Signal
+
+from core.translation_pipeline import SentenceTranslationPipeline
+
+
+class _FakeWorker(QObject):
+    """不发请求的翻译 worker，由测试手动推送译文。"""
+
+    chunk_received = Signal(str)
+    finished_text = Signal(str)
+    error = Signal(str)
+
+    def __init__(self, source: str):
+        super().__init__()
+        self.source = source
+        self.started = False
+        self.cancelled = False
+
+    def start(self):
+        self.started = True
+
+    def cancel(self):
+        self.cancelled = True
+
+    def reply(self, text: str):
+        self.chunk_received.emit(text)
+        self.finished_text.emit(text)
+
+
+class _Harness:
+    def __init__(self, memory: dict | None = None, max_concurrency: int = 2):
+        self.workers: dict[str, _FakeWorker] = {}
+        self.chunks: list[str] = []
+        self.finished: list[str] = []
+        self.errors: list[str] = []
+        self.pipeline = SentenceTranslationPipeline(
+            self._make_worker,
+            max_concurrency=max_concurrency,
+            lookup=(memory or {}).get,
+        )
+        self.pipeline.chunk_received.connect(self.chunks.append)
+        self.pipeline.finished_text.connect(self.finished.append)
+        self.pipeline.error.connect(self.errors.append)
+
+    def _make_worker(self, source: str) -> _FakeWorker:
+        worker = _FakeWorker(source)
+        self.workers[source] = worker
+        return worker
+
+
+def test_output_follows_sentence_order():
+    h = _Harness()
+    h.pipeline.feed("你好。今天天气好。")
+    h.pipeline.close()
+    # 第二句先完成：缓存到第一句完成后再输出
+    h.workers["今天天气好。"].reply("Nice weather today.")
+    assert h.chunks == []
+    h.workers["你好。"].reply("Hello.")
+    assert h.finished == ["Hello. Nice weather today."]
+    assert "".join(h.chunks) == h.finished[0]
+
+
+def test_memory_hit_on_head_sentence_is_emitted():
+    h = _Harness(memory={"你好。": "Hello."})
+    h.pipeline.feed("你好。今天天气好。")
+    assert "你好。" not in h.workers
+    assert "".join(h.chunks) == "Hello."
+    h.pipeline.close()
+    h.workers["今天天气好。"].reply("Nice weather today.")
+    assert h.finished == ["Hello. Nice weather today."]
+
+
+def test_memory_hit_behind_running_sentence_waits_its_turn():
+    h = _Harness(memory={"今天天气好。": "Nice weather today."})
+    h.pipeline.feed("你好。今天天气好。")
+    h.pipeline.close()
+    assert h.chunks == []
+    h.workers["你好。"].reply("Hello.")
+    assert h.finished == ["Hello. Nice weather today."]
+
+
+def test_concurrency_limit_queues_sentences():
+    h = _Harness(max_concurrency=1)
+    # 末尾的句子要等到后面还有文本（或 close()）才算完整
+    h.pipeline.feed("一。二。三")
+    assert h.workers["一。"].started and "二。" not in h.workers
+    h.workers["一。"].reply("One.")
+    assert h.workers["二。"].started
+
+
+def test_error_cancels_remaining_sentences():
+    h = _Harness()
+    h.pipeline.feed("一。二。三")
+    h.workers["一。"].error.emit("boom")
+    assert h.errors == ["boom"]
+    assert h.workers["二。"].cancelled
+    h.pipeline.close()
+    assert h.finished == []